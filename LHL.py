@@ -6,17 +6,30 @@
 
 from re import S
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QAction, QLabel, QLineEdit, QPushButton, QFileDialog, QTableWidget, QTableWidgetItem, QHeaderView, QComboBox, QMessageBox, QWidgetAction, QStyledItemDelegate, QStyle, QMenu, QFileDialog, QDialog, QVBoxLayout, QTextEdit, QPushButton, QHBoxLayout, QMessageBox
-from PyQt5.QtCore import Qt, QTimer, QTime, QDate, QRegExp, QFile, QTextStream, QEvent, QDateTime
+import time
+STARTED = time.perf_counter()  # for python LHL.py --timing
+from PyQt5.QtWidgets import QApplication, QMainWindow, QAction, QLabel, QLineEdit, QPushButton, QFileDialog, QTableView, QAbstractItemView, QHeaderView, QComboBox, QMessageBox, QProgressBar, QProgressDialog, QWidgetAction, QStyledItemDelegate, QStyle, QMenu, QFileDialog, QDialog, QVBoxLayout, QTextEdit, QPushButton, QHBoxLayout, QMessageBox, QCheckBox, QTableWidget, QTableWidgetItem, QTabWidget, QDateEdit
+from PyQt5.QtCore import Qt, QObject, QSettings, QTimer, QDate, QRegExp, QFile, QTextStream, QEvent, QAbstractTableModel, QAbstractProxyModel, QModelIndex, QPersistentModelIndex, QThread, pyqtSignal
 from PyQt5.QtGui import QFont, QRegExpValidator, QGuiApplication, QIntValidator, QCursor, QBrush, QColor, QPainter
 import datetime
-import json
 import os
 import calendar
+import threading
+import collections
+import operator
+import bisect
 import uuid
-import webbrowser
 from datetime import timezone
 
+from lhl.records import LOG_FIELDS, LOG_COLUMNS, SORT_KEYS, BAND_ORDER, LogRecord, ChangeSet, date_text, parse_date_days
+from lhl.search import QueryError, SearchIndex, compile_query
+from lhl.indexes import WorkedIndex, LogStats, DatetimeIndex
+from lhl.paging import PagedRecords
+from lhl.storage import LOG_SUFFIXES, SQLITE_SUFFIXES, JsonLogStorage, open_log_storage, create_log_storage, copy_log
+from lhl.wsjtx import WSJTX_HOST, WSJTX_PORT, read_wsjtx_qso
+from lhl.adif import qso_key, read_adif, read_last_export, write_adif
+from lhl.profiler import PROFILER, run_profiled
+
 ### DPI setup for monitor resolution 
 QGuiApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
 QGuiApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
@@ -86,13 +99,6 @@ class DateDelegate(QStyledItemDelegate):
             QMessageBox.warning(editor, "Invalid Date", "Date is out of range. Please enter a valid date (YYYY-MM-DD).")
             model.setData(index, text, Qt.EditRole)
 
- ### Date Format       
-class DateTableWidgetItem(QTableWidgetItem):
-    def __lt__(self, other):
-        self_date = QDate.fromString(self.text(), "yyyy-MM-dd")
-        other_date = QDate.fromString(other.text(), "yyyy-MM-dd")
-        return self_date < other_date
-
 ### Letter With Numbers and Symbols 
 class AlphanumericDelegate(QStyledItemDelegate):
     def createEditor(self, parent, option, index):
@@ -132,46 +138,6 @@ class NumericWithSymbolsDelegate(QStyledItemDelegate):
         editor.setMaxLength(4)
         return editor
 
-### Sorting of Table Items to ensure Numeric Sort by Value
-class NumericTableWidgetItem(QTableWidgetItem):
-    def __init__(self, text):
-        super().__init__(text)
-        self.numeric_value = self.parse_value(text) 
-
-    def parse_value(self, text):
-        try:
-            return float(text)
-        except ValueError:
-            return 0  
-
-    def setData(self, role, value):
-        if role == Qt.DisplayRole:
-            if isinstance(value, (int, float)):                
-                if self.column() == 6:
-                    display_text = f"{value:.3f}" 
-                elif self.column() in [7, 8]:
-                    display_text = f"{int(value)}"  
-                elif self.column() == 9:
-                    display_text = f"{value:.2f}" if '.' in str(value) else f"{int(value)}"  
-                else:
-                    display_text = str(value)
-                super().setData(role, display_text)
-            else:
-                super().setData(role, value)
-        else:
-            super().setData(role, value)
-
-    def __lt__(self, other):
-        if isinstance(other, NumericTableWidgetItem):           
-            if self.numeric_value is not None and other.numeric_value is not None:
-                return self.numeric_value < other.numeric_value           
-            elif self.numeric_value is None and other.numeric_value is not None:
-                return False
-            elif self.numeric_value is not None and other.numeric_value is None:
-                return True
-            return super().__lt__(other)
-        return super().__lt__(other)
-  
 ### Dropdown Menus in table editor
 class DropdownDelegate(QStyledItemDelegate):
     def __init__(self, items, parent=None):
@@ -205,48 +171,299 @@ class DropdownDelegate(QStyledItemDelegate):
                     return True 
         return super().eventFilter(editor, event)
 
-### Table Items Format and Sorting   
-class TimeTableWidgetItem(QTableWidgetItem):
-    def __lt__(self, other):
-        return QTime.fromString(self.text(), "HH:mm") < QTime.fromString(other.text(), "HH:mm")
+### Table Model over the Records
+# Only the rows Qt actually paints are asked for, so a large log no longer
+# needs a QTableWidgetItem per cell.
+class LogTableModel(QAbstractTableModel):
+    cellEdited = pyqtSignal(int, int, str)
 
-class DateTableWidgetItem(QTableWidgetItem):
-    def __lt__(self, other):
-        return QDate.fromString(self.text(), "yyyy-MM-dd") < QDate.fromString(other.text(), "yyyy-MM-dd")
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.records = []
+        self.edited = set()
+        self.sort_column = 0
+        self.sort_order = Qt.DescendingOrder
 
-class CallTableWidgetItem(QTableWidgetItem):
-    def __lt__(self, other):
-        return self.text() < other.text()
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.records)
 
-class ModeTableWidgetItem(QTableWidgetItem):
-    def __lt__(self, other):
-        return self.text() < other.text()
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(LOG_COLUMNS)
 
-class BandTableWidgetItem(QTableWidgetItem):
-    def __lt__(self, other):
-        return self.text() < other.text()
-    
-class BandTableWidgetItem(QTableWidgetItem):
-    BAND_ORDER = {
-        "160m": 1,
-        "80m": 2,
-        "60m": 3,
-        "40m": 4,
-        "30m": 5,
-        "20m": 6,
-        "17m": 7,
-        "15m": 8,
-        "12m": 9,
-        "10m": 10,
-        "6m": 11,
-        "2m": 12,
-        "70cm": 14,
-
-    }
-    def __lt__(self, other):
-        if isinstance(other, BandTableWidgetItem):
-            return self.BAND_ORDER[self.text()] < self.BAND_ORDER[other.text()]
-        return super().__lt__(other)
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return LOG_COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if 1 <= index.column() <= 10:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.records[index.row()]
+        col = index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return record.text(col)
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.ForegroundRole:
+            if (id(record), col) in self.edited:
+                return QBrush(QColor("blue"))
+            if col == 0 and record.has_note:
+                return QBrush(QColor("#4CBB17"))  # Light green
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        record = self.records[index.row()]
+        old_text = record.text(index.column())
+        record.set_text(index.column(), str(value))
+        self.dataChanged.emit(index, index)
+        self.cellEdited.emit(index.row(), index.column(), old_text)
+        return True
+
+### Record Access
+    def record(self, row):
+        return self.records[row]
+
+    def text(self, row, col):
+        return self.records[row].text(col)
+
+    def set_records(self, records):
+        self.beginResetModel()
+        self.records = records
+        self.edited.clear()
+        self.endResetModel()
+
+    def insert_record(self, row, record):
+        self.insert_records(row, [record])
+
+    def insert_records(self, row, records):
+        if records:
+            self.beginInsertRows(QModelIndex(), row, row + len(records) - 1)
+            self.records[row:row] = records
+            self.endInsertRows()
+
+    def append_records(self, records):
+        if records:
+            self.beginInsertRows(QModelIndex(), len(self.records), len(self.records) + len(records) - 1)
+            self.records.extend(records)
+            self.endInsertRows()
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        record = self.records.pop(row)
+        self.endRemoveRows()
+        self.edited = {key for key in self.edited if key[0] != id(record)}
+        return record
+
+    def refresh_row(self, row):
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+### Edited Cells Shown in Blue
+    def set_cell_edited(self, row, col, edited):
+        key = (id(self.records[row]), col)
+        if edited:
+            self.edited.add(key)
+        else:
+            self.edited.discard(key)
+        self.dataChanged.emit(self.index(row, col), self.index(row, col))
+
+    def set_row_edited(self, row):
+        for col in range(self.columnCount()):
+            self.edited.add((id(self.records[row]), col))
+        self.refresh_row(row)
+
+    def clear_edited(self):
+        self.edited.clear()
+        if self.records:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.records) - 1, self.columnCount() - 1))
+
+### Records Paged from a Mapped Log, see lhl/paging.py
+# Searching and sorting there reset the model, the view only asks again
+# for the rows it shows.
+    def is_paged(self):
+        return isinstance(self.records, PagedRecords)
+
+    def set_matches(self, matches):
+        self.beginResetModel()
+        self.records.set_matches(matches)
+        self.endResetModel()
+
+### Sorting
+    def sort(self, column, order=Qt.AscendingOrder):
+        if self.is_paged():
+            self.beginResetModel()
+            self.records.sort_by(column, order == Qt.DescendingOrder)
+            self.sort_column = column
+            self.sort_order = order
+            self.endResetModel()
+            return
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        tracked = [(self.records[index.row()], index.column()) for index in persistent]
+        self.records.sort(key=operator.attrgetter(SORT_KEYS[column]), reverse=(order == Qt.DescendingOrder))
+        self.sort_column = column
+        self.sort_order = order
+        if persistent:
+            row_of = {id(record): row for row, record in enumerate(self.records)}
+            self.changePersistentIndexList(persistent, [self.index(row_of[id(record)], col) for record, col in tracked])
+        self.layoutChanged.emit()
+
+    def is_sorted_by(self, column, order):
+        return self.sort_column == column and self.sort_order == order
+
+### Rows Shown by the Table, Filtered by the Search Box
+# Sits between the table and LogTableModel. Without a filter every row
+# is shown as the model has it. With one, rows holds the model rows of
+# the matching records in model order, so a new filter is one pass over
+# the records and the view only lays out the rows it shows, instead of
+# hiding rows one at a time. Sorting is left to the model, the filter
+# keeps its order. Rows inserted while a filter is on are shown, as a
+# new QSO always was, and a model reset drops the filter.
+#
+# The search box filters once typing pauses for SEARCH_DELAY_MS.
+SEARCH_DELAY_MS = 150
+
+class LogFilterProxy(QAbstractProxyModel):
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.matches = None
+        self.rows = None
+        self.removed = None
+        self.tracked = None
+        self.setSourceModel(model)
+        model.dataChanged.connect(self.on_data_changed)
+        model.rowsAboutToBeInserted.connect(self.on_rows_about_to_be_inserted)
+        model.rowsInserted.connect(self.on_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self.on_rows_about_to_be_removed)
+        model.rowsRemoved.connect(self.on_rows_removed)
+        model.layoutAboutToBeChanged.connect(self.on_layout_about_to_be_changed)
+        model.layoutChanged.connect(self.on_layout_changed)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self.on_model_reset)
+
+### Records to Show, None for All
+    def set_matches(self, matches):
+        self.beginResetModel()
+        self.matches = matches
+        self.rows = None if matches is None else self.matching_rows()
+        self.endResetModel()
+
+    def matching_rows(self):
+        matches = self.matches
+        return [row for row, record in enumerate(self.sourceModel().records) if record in matches]
+
+    def source_row(self, row):
+        return row if self.rows is None else self.rows[row]
+
+    # -1 if the model row is filtered out
+    def proxy_row(self, source_row):
+        if self.rows is None:
+            return source_row
+        row = bisect.bisect_left(self.rows, source_row)
+        return row if row < len(self.rows) and self.rows[row] == source_row else -1
+
+### Qt Model Interface
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.sourceModel().rowCount() if self.rows is None else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.sourceModel().columnCount()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < self.rowCount() and 0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    # parent() with no index is still QObject.parent
+    def parent(self, index=None):
+        if index is None:
+            return super().parent()
+        return QModelIndex()
+
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self.source_row(index.row()), index.column())
+
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        row = self.proxy_row(index.row())
+        return self.index(row, index.column()) if row >= 0 else QModelIndex()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        return self.sourceModel().headerData(section, orientation, role)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+### Model Changes, Passed on in Table Rows
+    def on_data_changed(self, top_left, bottom_right, roles=[]):
+        first, last = top_left.row(), bottom_right.row()
+        if self.rows is not None:
+            first = bisect.bisect_left(self.rows, first)
+            last = bisect.bisect_right(self.rows, last) - 1
+            if first > last:
+                return
+        self.dataChanged.emit(self.index(first, top_left.column()), self.index(last, bottom_right.column()), roles)
+
+    def on_rows_about_to_be_inserted(self, parent, first, last):
+        row = first if self.rows is None else bisect.bisect_left(self.rows, first)
+        self.beginInsertRows(QModelIndex(), row, row + last - first)
+
+    def on_rows_inserted(self, parent, first, last):
+        if self.rows is not None:
+            count = last - first + 1
+            at = bisect.bisect_left(self.rows, first)
+            self.rows[at:] = list(range(first, last + 1)) + [row + count for row in self.rows[at:]]
+            records = self.sourceModel().records
+            self.matches.update(records[row] for row in range(first, last + 1))
+        self.endInsertRows()
+
+    def on_rows_about_to_be_removed(self, parent, first, last):
+        if self.rows is None:
+            self.removed = (first, last + 1)
+        else:
+            self.removed = (bisect.bisect_left(self.rows, first), bisect.bisect_right(self.rows, last))
+        if self.removed[0] < self.removed[1]:
+            self.beginRemoveRows(QModelIndex(), self.removed[0], self.removed[1] - 1)
+
+    def on_rows_removed(self, parent, first, last):
+        start, stop = self.removed
+        self.removed = None
+        if self.rows is not None:
+            count = last - first + 1
+            self.rows[start:] = [row - count for row in self.rows[stop:]]
+        if start < stop:
+            self.endRemoveRows()
+
+### A Sort Moves the Shown Rows with their Records
+    def on_layout_about_to_be_changed(self):
+        self.layoutAboutToBeChanged.emit()
+        self.tracked = [(index, QPersistentModelIndex(self.mapToSource(index))) for index in self.persistentIndexList()]
+
+    def on_layout_changed(self):
+        if self.matches is not None:
+            self.rows = self.matching_rows()
+        tracked, self.tracked = self.tracked, None
+        if tracked:
+            self.changePersistentIndexList([index for index, source in tracked],
+                                           [self.mapFromSource(QModelIndex(source)) for index, source in tracked])
+        self.layoutChanged.emit()
+
+    def on_model_reset(self):
+        self.matches = None
+        self.rows = None
+        self.endResetModel()
 
 ### Delegation for Deleting a Row
 class HighlightAndDeleteDelegate(QStyledItemDelegate):
@@ -266,10 +483,10 @@ class HighlightAndDeleteDelegate(QStyledItemDelegate):
         return False
 
 class NotesDialog(QDialog):
-    def __init__(self, uuid, notes_filename, parent=None):
+    def __init__(self, uuid, notes, parent=None):
         super().__init__(parent)
         self.uuid = uuid
-        self.notes_filename = notes_filename
+        self.notes = notes
         self.setWindowTitle("Contact Notes")
         self.setMinimumSize(400, 300)
 
@@ -294,10 +511,8 @@ class NotesDialog(QDialog):
 
 
     def load_notes(self):
-        if os.path.exists(self.notes_filename):
-            with open(self.notes_filename, "r") as file:
-                notes_data = json.load(file)
-                self.text_edit.setPlainText(notes_data.get(self.uuid, ""))
+        with PROFILER.span("notes.load"):
+            self.text_edit.setPlainText(self.notes.get(self.uuid))
 
 
     def save_notes(self):
@@ -305,48 +520,29 @@ class NotesDialog(QDialog):
 
         if self.parent() and getattr(self.parent(), "edit_mode", False):
         # Check if UUID is already in the saved log
-            uuid_exists = False
-            if hasattr(self.parent(), "file_name") and os.path.exists(self.parent().file_name):
-                with open(self.parent().file_name, "r") as log_file:
-                    try:
-                        data = json.load(log_file)
-                        uuid_exists = any(entry.get("uuid") == self.uuid for entry in data.get("log", []))
-                    except Exception:
-                        pass  # fallback to temp save if file is unreadable
+            uuid_exists = self.parent().is_saved_entry(self.uuid)
 
             if not uuid_exists:
             # Save temporarily
                 self.parent().temp_notes_data[self.uuid] = notes_text
-                QMessageBox.information(self, "Saved", "Notes saved successfully.")
             else:
             # Save directly to file
-                notes_data = {}
-                if os.path.exists(self.notes_filename):
-                    with open(self.notes_filename, "r") as nf:
-                        notes_data = json.load(nf)
-
-                notes_data[self.uuid] = notes_text
-                with open(self.notes_filename, "w") as nf:
-                    json.dump(notes_data, nf, indent=4)
-
-                QMessageBox.information(self, "Saved", "Notes saved successfully.")
+                self.write_notes(notes_text)
         else:
         # Not in edit mode — save directly
-            notes_data = {}
-            if os.path.exists(self.notes_filename):
-                with open(self.notes_filename, "r") as nf:
-                    notes_data = json.load(nf)
-
-            notes_data[self.uuid] = notes_text
-            with open(self.notes_filename, "w") as nf:
-                json.dump(notes_data, nf, indent=4)
-
-            QMessageBox.information(self, "Saved", "Notes saved successfully.")
+            self.write_notes(notes_text)
 
+        QMessageBox.information(self, "Saved", "Notes saved successfully.")
         self.accept()
 
         if self.parent():
-            self.parent().update_note_indicator(self.uuid)
+            self.parent().update_note_indicator(self.uuid, notes_text)
+
+    def write_notes(self, notes_text):
+        if hasattr(self.parent(), "writer"):
+            self.parent().writer.update_notes(self.notes, {self.uuid: notes_text})
+        else:
+            self.notes.set(self.uuid, notes_text)
 
 
 ## Blocks table focus
@@ -357,7 +553,7 @@ class NoFocusDelegate(QStyledItemDelegate):
             option.state ^= QStyle.State_Selected
         super().paint(painter, option, index)
  
-class BlankTableWidget(QTableWidget):
+class BlankTableView(QTableView):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.initUI()
@@ -365,7 +561,7 @@ class BlankTableWidget(QTableWidget):
 ### Colors and Borders
     def initUI(self):
         self.setStyleSheet("""
-            QTableWidget { 
+            QTableView { 
                 border: 2px solid black; 
                 background-color: #d3d3d3; 
             }
@@ -379,7 +575,7 @@ class BlankTableWidget(QTableWidget):
             QHeaderView:vertical {
                 border: none; /* Hide vertical grid lines */
             }
-            QTableWidget::item:selected { 
+            QTableView::item:selected { 
                 background-color: #a9a9a9; 
                 color: black;
             }           
@@ -390,9 +586,9 @@ class BlankTableWidget(QTableWidget):
         self.setAlternatingRowColors(True)
         self.verticalHeader().setVisible(False)
         self.horizontalHeader().setVisible(True)
-        self.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.setSelectionMode(QTableWidget.SingleSelection)
-        self.setSelectionBehavior(QTableWidget.SelectItems)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setSelectionBehavior(QAbstractItemView.SelectItems)
         self.setFocusPolicy(Qt.StrongFocus)
         self.verticalScrollBar().setEnabled(True)  
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
@@ -402,29 +598,6 @@ class BlankTableWidget(QTableWidget):
         self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
 
 
-### Data Format and Behavoir
-    def addItemCentered(self, row, col, item):
-        try:
-            value = float(item)
-        except ValueError:
-            value = 0  
-        if col == 6:  # Freq
-            formatted_value = f"{value:.3f}"  
-            table_item = NumericTableWidgetItem(formatted_value)
-        elif col in [7, 8]: # RX,Tx
-            formatted_value = f"{int(value)}"  
-            table_item = NumericTableWidgetItem(formatted_value)
-        elif col == 9:  # PWR
-            formatted_value = f"{value:.2f}" if '.' in str(item) else f"{int(value)}"
-            table_item = NumericTableWidgetItem(formatted_value)
-        elif col == 5:  # Band
-            table_item = BandTableWidgetItem(item)
-        else:
-            table_item = QTableWidgetItem(item)
-
-        table_item.setTextAlignment(Qt.AlignCenter)
-        self.setItem(row, col, table_item)
-
 ### Columns and Rows
     def setColumnWidths(self, widths):
         for col, width in widths.items():
@@ -437,17 +610,563 @@ class BlankTableWidget(QTableWidget):
         def keyPressEvent(self, event):
             if event.key() == Qt.Key_Tab:
                 current_index = self.currentIndex()
-                column_count = self.columnCount()
+                column_count = self.model().columnCount()
 
                 if current_index.column() == column_count - 1:
                     next_row = current_index.row() + 1
-                    if next_row < self.rowCount():
-                        self.setCurrentCell(next_row, 0)
+                    if next_row < self.model().rowCount():
+                        self.setCurrentIndex(self.model().index(next_row, 0))
                 else:
                     super().keyPressEvent(event)
             else:
                 super().keyPressEvent(event)
 
+### UDP Listener Thread
+# QSOs arriving within BATCH_WINDOW seconds are handed over together and
+# written to the log with one fsync. The Logged ADIF copy of a QSO that
+# already came in as QSO Logged is dropped.
+class WsjtxListener(QThread):
+    qsos_logged = pyqtSignal(list)
+    failed = pyqtSignal(str)
+    BATCH_WINDOW = 0.5
+
+    def __init__(self, host=WSJTX_HOST, port=WSJTX_PORT, parent=None):
+        super().__init__(parent)
+        self.host = host
+        self.port = port
+        self.seen = collections.deque(maxlen=200)
+
+    def run(self):
+        import socket
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.host, self.port))
+            sock.settimeout(0.2)
+        except OSError as e:
+            self.failed.emit(f"Could not listen on UDP port {self.port}: {e}")
+            return
+
+        batch = []
+        deadline = None
+        with sock:
+            while not self.isInterruptionRequested():
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    data = None
+                except OSError as e:
+                    self.failed.emit(str(e))
+                    break
+                qso = read_wsjtx_qso(data) if data else None
+                if qso is not None:
+                    key = (qso['call'], qso['date'], qso['time'], qso['mode'])
+                    if key not in self.seen:
+                        self.seen.append(key)
+                        batch.append(qso)
+                        if deadline is None:
+                            deadline = time.monotonic() + self.BATCH_WINDOW
+                if batch and time.monotonic() >= deadline:
+                    self.qsos_logged.emit(batch)
+                    batch = []
+                    deadline = None
+        if batch:
+            self.qsos_logged.emit(batch)
+
+class AdifExporter(QThread):
+    progress = pyqtSignal(int)
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    profiled = pyqtSignal(str, object)
+
+    def __init__(self, file_name, records, written_by, since, parent=None):
+        super().__init__(parent)
+        self.file_name = file_name
+        self.records = records
+        self.written_by = written_by
+        self.since = since
+        self.profile_name = None
+
+    def run(self):
+        run_profiled(self.profile_name, self.profiled.emit, self.export)
+
+    def export(self):
+        try:
+            exported_at = datetime.datetime.now(timezone.utc)
+            count = write_adif(self.file_name, self.records, self.written_by, exported_at, self.since,
+                               self.progress.emit, self.isInterruptionRequested)
+            self.done.emit(count)
+        except OSError as e:
+            self.failed.emit(str(e))
+
+### Reads, Dedupes and Sorts an .adi on a Worker Thread
+# known holds qso_key tuples of the QSOs already in the log. done gets
+# the new entries oldest first, their notes, and the duplicate count.
+class AdifImporter(QThread):
+    progress = pyqtSignal(int)
+    done = pyqtSignal(list, dict, int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_name, known, parent=None):
+        super().__init__(parent)
+        self.file_name = file_name
+        self.known = known
+
+    def run(self):
+        try:
+            result = read_adif(self.file_name, self.known, self.progress.emit, self.isInterruptionRequested)
+        except OSError as e:
+            self.failed.emit(str(e))
+            return
+        if result is not None:
+            self.done.emit(*result)
+
+### Background Log and Notes Writer
+# The only thread that writes the open log and its notes. Jobs run one at
+# a time in the order they were queued. An append or notes save queued
+# right behind another one of the same kind is folded into it, so a burst
+# of QSOs costs one write. A mergeable job waits up to GROUP_COMMIT
+# seconds for more to join it, so QSOs logged in quick succession share
+# one fsync. flush waits until everything queued is on disk, readers call
+# it before they look at the files.
+class LogWriter(QThread):
+    done = pyqtSignal(str)
+    failed = pyqtSignal(str, str)
+    GROUP_COMMIT = 0.05
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = collections.deque()
+        self.condition = threading.Condition()
+        self.busy = False
+        self.flushing = 0
+        self.stopping = False
+
+    def submit(self, name, func, *args, merge=None):
+        with self.condition:
+            if merge is not None and self.jobs:
+                last_name, last_func, last_args, _ = self.jobs[-1]
+                if last_name == name and last_func == func:
+                    merge(last_args, args)
+                    PROFILER.count(f"writer.{name} merged")
+                    return
+            self.jobs.append((name, func, args, merge))
+            self.condition.notify_all()
+
+    def append(self, storage, entries):
+        self.submit("log", storage.extend, list(entries),
+                    merge=lambda queued, new: queued[0].extend(new[0]))
+
+    def update_notes(self, notes, changes, deleted=()):
+        def merge(queued, new):
+            queued[0].update(new[0])
+            queued[1].extend(new[1])
+        self.submit("notes", notes.update, dict(changes), list(deleted), merge=merge)
+
+    def flush(self):
+        with self.condition:
+            self.flushing += 1
+            self.condition.notify_all()
+            while self.jobs or self.busy:
+                self.condition.wait()
+            self.flushing -= 1
+
+    def stop(self):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.jobs and not self.stopping:
+                    self.condition.wait()
+                if not self.jobs:
+                    return
+                deadline = time.monotonic() + self.GROUP_COMMIT
+                while len(self.jobs) == 1 and self.jobs[0][3] is not None and not (self.stopping or self.flushing):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                name, func, args, _ = self.jobs.popleft()
+                self.busy = True
+            span = PROFILER.span(f"writer.{name}")
+            try:
+                func(*args)
+            except Exception as e:
+                self.failed.emit(name, str(e))
+            else:
+                self.done.emit(name)
+            finally:
+                span.end()
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
+
+### Background Log Loading
+# Reads the log on a worker thread and hands LogRecords to the window in
+# batches, newest first, so the latest QSOs show up straight away. At most
+# MAX_PENDING batches wait in the event queue, otherwise the window would
+# take them all in one go and stall.
+#
+# With paged=True a .json log is mapped from its snapshot instead and
+# handed over whole with mapped, the table pages its rows in from there.
+# The batches that follow are only counted into the worked index and the
+# statistics, and dropped.
+PAGED_LOG_BYTES = 16 * 1024 * 1024
+
+class LogLoader(QThread):
+    header = pyqtSignal(str, str, int)
+    mapped = pyqtSignal(object)
+    batch = pyqtSignal(list)
+    failed = pyqtSignal(str)
+    profiled = pyqtSignal(str, object)
+    BATCH_SIZE = 2000
+    MAX_PENDING = 2
+
+    def __init__(self, storage, notes_data, paged=False, parent=None):
+        super().__init__(parent)
+        self.storage = storage
+        self.notes_data = notes_data
+        self.paged = paged
+        self.snapshot = storage.begin_read()
+        self.pending = threading.Semaphore(self.MAX_PENDING)
+        self.profile_name = None
+
+    def batch_done(self):
+        self.pending.release()
+
+    def mapped_batches(self, log):
+        for stop in range(log.count, 0, -self.BATCH_SIZE):
+            yield log.records(max(stop - self.BATCH_SIZE, 0), stop)[::-1]
+
+    def run(self):
+        run_profiled(self.profile_name, self.profiled.emit, self.load)
+
+    def load(self):
+        try:
+            log = self.storage.map_log(self.snapshot) if self.paged else None
+            if log is not None:
+                self.header.emit(log.mycall, log.grid, log.count)
+                self.mapped.emit(log)
+                total, batches = log.count, self.mapped_batches(log)
+            else:
+                mycall, grid, total, batches = self.storage.stream(self.BATCH_SIZE, self.snapshot)
+                self.header.emit(mycall, grid, total)
+            line = total
+            for records in batches:
+                while not self.pending.acquire(timeout=0.1):
+                    if self.isInterruptionRequested():
+                        return
+                if self.isInterruptionRequested():
+                    return
+                for record in records:
+                    record.line = line
+                    record.has_note = bool(self.notes_data.get(record.uuid, "").strip())
+                    line -= 1
+                self.batch.emit(records)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+### Startup Timing, Printed with python LHL.py --timing
+# Milliseconds since LHL.py started, on stderr: imports done, window
+# built, first paint, and interactive once the event loop is free after
+# the first paint. A log reopened at startup also reports when its first
+# rows are shown and when it has finished loading.
+class StartupTimer(QObject):
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.painted = False
+        window.installEventFilter(self)
+
+    def mark(self, name):
+        print(f"startup: {name} {(time.perf_counter() - STARTED) * 1000:.0f} ms", file=sys.stderr)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and not self.painted:
+            self.painted = True
+            self.mark("first paint")
+            QTimer.singleShot(0, self.interactive)
+        return False
+
+    def interactive(self):
+        self.mark("interactive")
+        self.window.removeEventFilter(self)
+        if self.window.loader is None:
+            self.window.startup_timer = None
+
+### Statistics, File > Statistics
+# Counts from the window's LogStats. Twice a second while open, only the
+# rows whose counts changed are redrawn, so a new QSO costs the same on a
+# log of any size. Loading a log redraws everything once.
+class CountTable(QTableWidget):
+    def __init__(self, heading, sort_key, parent=None):
+        super().__init__(0, 2, parent)
+        self.sort_key = sort_key
+        self.keys = []
+        self.sort_keys = []
+        self.setStyleSheet("background-color: #d3d3d3; color: black;")
+        self.setHorizontalHeaderLabels([heading, "QSOs"])
+        self.verticalHeader().setVisible(False)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+
+    def set_counts(self, counts):
+        self.keys = sorted(counts, key=self.sort_key)
+        self.sort_keys = [self.sort_key(key) for key in self.keys]
+        self.setRowCount(len(self.keys))
+        for row, key in enumerate(self.keys):
+            self.set_row(row, key, counts[key])
+
+### One Row Added, Changed or Removed, Found by its Sort Key
+    def set_count(self, key, count):
+        sort_key = self.sort_key(key)
+        row = bisect.bisect_left(self.sort_keys, sort_key)
+        shown = row < len(self.keys) and self.keys[row] == key
+        if count:
+            if not shown:
+                self.keys.insert(row, key)
+                self.sort_keys.insert(row, sort_key)
+                self.insertRow(row)
+            self.set_row(row, key, count)
+        elif shown:
+            del self.keys[row]
+            del self.sort_keys[row]
+            self.removeRow(row)
+
+    def set_row(self, row, key, count):
+        self.setItem(row, 0, QTableWidgetItem(key or "-"))
+        item = QTableWidgetItem(str(count))
+        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.setItem(row, 1, item)
+
+class StatsDialog(QDialog):
+    def __init__(self, stats, parent=None):
+        super().__init__(parent)
+        self.stats = stats
+        self.setWindowTitle("Statistics")
+        self.setMinimumSize(360, 400)
+
+        self.summary = QLabel(self)
+        self.tables = {
+            'bands': CountTable("Band", lambda band: (band not in BAND_ORDER, BAND_ORDER.get(band, 0), band), self),
+            'modes': CountTable("Mode", lambda mode: (not mode, mode), self),
+            'days': CountTable("Day", lambda day: (not day, -parse_date_days(day), day), self),
+            'hours': CountTable("Hour (UTC)", lambda hour: (not hour, hour), self),
+        }
+        tabs = QTabWidget(self)
+        for title, group in (("Bands", 'bands'), ("Modes", 'modes'), ("Days", 'days'), ("Hours", 'hours')):
+            tabs.addTab(self.tables[group], title)
+        close_button = QPushButton("Close", self)
+        close_button.clicked.connect(self.close)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.summary)
+        layout.addWidget(tabs)
+        layout.addWidget(close_button)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start(500)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        cleared, changed = self.stats.take_changes()
+        for group, table in self.tables.items():
+            counts = self.stats.counts[group]
+            if cleared:
+                table.set_counts(counts)
+            else:
+                for key in changed[group]:
+                    table.set_count(key, counts.get(key, 0))
+        qso = self.stats.counts['qso']
+        self.summary.setText(f"{self.stats.total} QSOs, {self.stats.unique_calls()} calls, "
+                             f"{qso.get('Sent', 0)} sent, {qso.get('Rcvd', 0)} received")
+
+### Show Date Range, File > Show Date Range
+# From and To are UTC days, both included.
+class DateRangeDialog(QDialog):
+    def __init__(self, first_days, last_days, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Show Date Range")
+
+        self.first = QDateEdit(QDate.fromString(date_text(first_days), "yyyy-MM-dd"), self)
+        self.last = QDateEdit(QDate.fromString(date_text(last_days), "yyyy-MM-dd"), self)
+        for edit in (self.first, self.last):
+            edit.setDisplayFormat("yyyy-MM-dd")
+            edit.setCalendarPopup(True)
+        show_button = QPushButton("Show", self)
+        cancel_button = QPushButton("Cancel", self)
+
+        date_layout = QHBoxLayout()
+        date_layout.addWidget(QLabel("From", self))
+        date_layout.addWidget(self.first)
+        date_layout.addWidget(QLabel("To", self))
+        date_layout.addWidget(self.last)
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(show_button)
+        button_layout.addWidget(cancel_button)
+
+        layout = QVBoxLayout()
+        layout.addLayout(date_layout)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        show_button.clicked.connect(self.accept)
+        cancel_button.clicked.connect(self.reject)
+
+    # (first, last) day, in order whichever way they were entered
+    def days(self):
+        days = sorted(parse_date_days(edit.date().toString("yyyy-MM-dd")) for edit in (self.first, self.last))
+        return days[0], days[1]
+
+### Diagnostics, File > Diagnostics
+# The PROFILER timings of the slow paths, refreshed every second while
+# open. Timings are only collected while Collect Timings is on, or with
+# python LHL.py --profile. Profile Next Operation runs the next timed
+# operation under cProfile and shows where its time went.
+class DiagnosticsDialog(QDialog):
+    COLUMNS = ["Operation", "Count", "Mean ms", "p50 ms", "p95 ms", "Max ms", "Total ms"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostics")
+        self.setMinimumSize(640, 360)
+
+        self.collect = QCheckBox("Collect Timings", self)
+        self.collect.setChecked(PROFILER.enabled)
+        self.collect.toggled.connect(self.set_collecting)
+        self.status = QLabel(self)
+
+        self.table = QTableWidget(0, len(self.COLUMNS), self)
+        self.table.setStyleSheet("background-color: #d3d3d3; color: black;")
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+
+        self.reset_button = QPushButton("Reset", self)
+        self.save_button = QPushButton("Save...", self)
+        self.profile_button = QPushButton("Profile Next Operation", self)
+        self.close_button = QPushButton("Close", self)
+        self.reset_button.clicked.connect(self.reset)
+        self.save_button.clicked.connect(self.save)
+        self.profile_button.clicked.connect(self.profile_next)
+        self.close_button.clicked.connect(self.close)
+
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(self.collect)
+        top_layout.addWidget(self.status, 1)
+        button_layout = QHBoxLayout()
+        for button in (self.reset_button, self.save_button, self.profile_button, self.close_button):
+            button_layout.addWidget(button)
+        layout = QVBoxLayout()
+        layout.addLayout(top_layout)
+        layout.addWidget(self.table)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.collect.setChecked(PROFILER.enabled)
+        self.refresh()
+        self.timer.start(1000)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def set_collecting(self, checked):
+        PROFILER.enabled = checked
+        if not checked:
+            PROFILER.cancel_profile()
+        self.refresh()
+
+### Spans First, then Counters
+    def refresh(self):
+        snapshot = PROFILER.snapshot()
+        rows = [[name, stats["count"], stats["mean_ms"], stats["p50_ms"], stats["p95_ms"], stats["max_ms"], stats["total_ms"]]
+                for name, stats in snapshot["spans"].items()]
+        rows += [[name, count] for name, count in snapshot["counters"].items()]
+        self.table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for col in range(len(self.COLUMNS)):
+                value = values[col] if col < len(values) else ""
+                item = QTableWidgetItem(f"{value:.1f}" if isinstance(value, float) else str(value))
+                if col:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, col, item)
+        if PROFILER.armed is not None:
+            self.status.setText("The next timed operation will be profiled")
+        elif snapshot["enabled"]:
+            self.status.setText(f"Since {snapshot['since']}")
+        else:
+            self.status.setText("Timings are off")
+
+    def reset(self):
+        PROFILER.reset()
+        self.refresh()
+
+    def save(self):
+        file_name, _ = QFileDialog.getSaveFileName(self, "Save Timings", "lhl_timings.json", "JSON files (*.json)")
+        if file_name:
+            try:
+                PROFILER.dump(file_name)
+            except OSError as e:
+                QMessageBox.critical(self, "Error", f"Could not save the timings: {e}")
+
+    def profile_next(self):
+        PROFILER.profile_next(self.on_profiled)
+        self.collect.setChecked(True)
+        self.refresh()
+
+### Called as the Profiled Operation Ends, so the Report is not Modal
+    def on_profiled(self, name, profile):
+        import io
+        import pstats
+        text = io.StringIO()
+        pstats.Stats(profile, stream=text).sort_stats("cumulative").print_stats(40)
+        report = QDialog(self)
+        report.setWindowTitle(f"Profile of {name}")
+        report.setMinimumSize(760, 420)
+        report.setAttribute(Qt.WA_DeleteOnClose)
+        text_edit = QTextEdit(report)
+        text_edit.setReadOnly(True)
+        text_edit.setLineWrapMode(QTextEdit.NoWrap)
+        text_edit.setFont(QFont("Courier New", 9))
+        text_edit.setStyleSheet("background-color: #d3d3d3; color: black;")
+        text_edit.setPlainText(text.getvalue())
+        save_button = QPushButton("Save .prof...", report)
+        save_button.clicked.connect(lambda: self.save_profile(report, profile))
+        layout = QVBoxLayout()
+        layout.addWidget(text_edit)
+        layout.addWidget(save_button)
+        report.setLayout(layout)
+        report.show()
+        self.refresh()
+
+    def save_profile(self, report, profile):
+        file_name, _ = QFileDialog.getSaveFileName(report, "Save Profile", "lhl.prof", "Profiles (*.prof)")
+        if file_name:
+            try:
+                profile.dump_stats(file_name)
+            except OSError as e:
+                QMessageBox.critical(report, "Error", f"Could not save the profile: {e}")
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -457,9 +1176,28 @@ class MainWindow(QMainWindow):
         self.file_created = False
         self.file_loaded = False
         self.time_update_paused = False
-        self.original_cell_value = None
-        self.row_uuid_map = {}
         self.temp_notes_data = {}
+        self.search_index = SearchIndex()
+        self.worked_index = WorkedIndex()
+        self.log_stats = LogStats()
+        self.datetime_index = DatetimeIndex()
+        self.changes = ChangeSet()
+        self.storage = None
+        self.loader = None
+        self.rows_to_load = None
+        self.wsjtx_listener = None
+        self.wsjtx_pending = []
+        self.exporter = None
+        self.importer = None
+        self.writer = LogWriter(self)
+        self.writer.failed.connect(self.on_write_failed)
+        self.writer.start()
+        self.settings = QSettings("LHL", "LHL")
+        self.startup_timer = None
+        self.diagnostics_dialog = None
+        self.stats_dialog = None
+        self.edit_delegates_installed = False
+        self.search_active = False
         
 ### Main window properties        
         self.setWindowTitle(" LHL ")
@@ -499,7 +1237,56 @@ class MainWindow(QMainWindow):
         export_action.setShortcut('Ctrl+X')
         export_action.triggered.connect(self.export_adi)  
         file_menu.addAction(export_action)
+
+### Import
+        import_action = QAction('Import', self)
+        import_action.setShortcut('Ctrl+I')
+        import_action.triggered.connect(self.import_adi)
+        file_menu.addAction(import_action)
+
+### Convert
+        convert_action = QAction('Convert', self)
+        convert_action.triggered.connect(self.convert_log_file)
+        file_menu.addAction(convert_action)
+
+### WSJT-X Listener
+        self.wsjtx_action = QAction('WSJT-X Listener', self)
+        self.wsjtx_action.setCheckable(True)
+        self.wsjtx_action.setToolTip(f"Log QSOs sent by WSJT-X or JTDX to UDP port {WSJTX_PORT}")
+        self.wsjtx_action.toggled.connect(self.toggle_wsjtx_listener)
+        file_menu.addAction(self.wsjtx_action)
         
+### Reopen Last Log at Startup
+        self.reopen_action = QAction('Reopen Last Log at Startup', self)
+        self.reopen_action.setCheckable(True)
+        self.reopen_action.setChecked(self.settings.value("reopen_last_log", False, type=bool))
+        self.reopen_action.toggled.connect(lambda checked: self.settings.setValue("reopen_last_log", checked))
+        file_menu.addAction(self.reopen_action)
+
+### Page Large Logs from Disk, from the Next Load on
+        self.paged_action = QAction('Page Large Logs from Disk', self)
+        self.paged_action.setCheckable(True)
+        self.paged_action.setToolTip("Only keep the rows in view in memory for .json logs over "
+                                     f"{PAGED_LOG_BYTES >> 20} MB, edit mode is off for them")
+        self.paged_action.setChecked(self.settings.value("paged_logs", False, type=bool))
+        self.paged_action.toggled.connect(lambda checked: self.settings.setValue("paged_logs", checked))
+        file_menu.addAction(self.paged_action)
+
+### Show Date Range
+        date_range_action = QAction('Show Date Range', self)
+        date_range_action.triggered.connect(self.show_date_range)
+        file_menu.addAction(date_range_action)
+
+### Statistics
+        stats_action = QAction('Statistics', self)
+        stats_action.triggered.connect(self.show_stats)
+        file_menu.addAction(stats_action)
+
+### Diagnostics
+        diagnostics_action = QAction('Diagnostics', self)
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        file_menu.addAction(diagnostics_action)
+
 ### Exit
         exit_action = QAction('Exit', self)
         exit_action.setShortcut('Ctrl+Q')
@@ -540,11 +1327,13 @@ class MainWindow(QMainWindow):
         self.create_button.setStyleSheet("background-color: #d3d3d3;")
         self.create_button.clicked.connect(self.create_file)        
 ### Table
-        self.log = BlankTableWidget(self)
+        self.log = BlankTableView(self)
         self.log.setGeometry(10, 70, 780, 285)  
-        self.log.setColumnCount(12)
-        self.log.setHorizontalHeaderLabels(["#", "Time", "Date", "Call", "Mode", "Band", "Freq", "Tx", "Rx", "Pwr", "QSO", "UUID"])
+        self.log_model = LogTableModel(self.log)
+        self.log_filter = LogFilterProxy(self.log_model, self.log)
+        self.log.setModel(self.log_filter)
         self.log.setColumnHidden(11, True) 
+        self.log.verticalHeader().setDefaultSectionSize(20)
         self.log.setColumnWidths({
             0: 50,  
             1: 50,   
@@ -560,12 +1349,18 @@ class MainWindow(QMainWindow):
         })
         
         self.log.horizontalHeader().sectionClicked.connect(self.enable_sorting_on_user_click)
-        self.log.setSortingEnabled(True)
-        self.log.cellClicked.connect(self.on_cell_clicked)
-        self.log.currentCellChanged.connect(self.on_cell_edit_start_from_navigation)
-        self.log.itemChanged.connect(self.on_cell_edit_end)
+        self.log.clicked.connect(self.on_cell_clicked)
+        self.log_model.cellEdited.connect(self.on_cell_edit_end)
         self.log.setItemDelegateForColumn(0, HighlightAndDeleteDelegate(self.log))      
         self.log.setSortingEnabled(True) 
+        self.log.horizontalHeader().setSortIndicator(0, Qt.DescendingOrder)
+
+### Log Loading Progress
+        self.load_progress = QProgressBar(self)
+        self.load_progress.setGeometry(10, 434, 200, 15)
+        self.load_progress.setFont(QFont("Arial", 8))
+        self.load_progress.setFormat("Loading log %p%")
+        self.load_progress.setVisible(False)
 
 ### Local Time
         self.label_local_time = QLabel("Local Time:",self)
@@ -636,6 +1431,7 @@ class MainWindow(QMainWindow):
         self.call.setPlaceholderText("Call Sign")
         self.call.setMaxLength(7)  
         self.call.textChanged.connect(self.uppercase_text_call)
+        self.call.textChanged.connect(self.update_worked_indicator)
         
 ### Mode
         self.label_mode = QLabel("Mode:", self)
@@ -645,6 +1441,7 @@ class MainWindow(QMainWindow):
         self.mode.setGeometry(243, 400, 85, 25) 
         self.mode.setStyleSheet("background-color: #d3d3d3;")
         self.mode.addItems(["SSB", "CW", "AM", "FM", "FT-8","WSPR"])
+        self.mode.currentIndexChanged.connect(self.update_worked_indicator)
     
 ### Band
         self.label_band = QLabel("Band:", self)
@@ -654,6 +1451,7 @@ class MainWindow(QMainWindow):
         self.band.setGeometry(379, 365, 70, 25)  
         self.band.setStyleSheet("background-color: #d3d3d3;")
         self.band.addItems(["160m", "80m", "60m", "40m", "30m", "20m", "17m", "15m", "10m", "12m", "6m", "2m", "70cm"]) 
+        self.band.currentIndexChanged.connect(self.update_worked_indicator)
         
 ### Freq       
         self.label_Freq = QLabel("Freq:", self)
@@ -737,7 +1535,15 @@ class MainWindow(QMainWindow):
         self.search.setAlignment(Qt.AlignCenter)
         self.search.setFont(QFont("Arial", 10))
         self.search.setPlaceholderText("Search")
+        self.search.setToolTip("Text in any column, or fields such as call:K1* band:20m mode:CW "
+                               "date:2025-06-01..2025-06-30 pwr:>100 qso:Sent")
         self.search.textChanged.connect(self.uppercase_text_search)
+        self.search.returnPressed.connect(self.search_log)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.filter_log)
+        self.search.textChanged.connect(self.search_timer.start)
 
 ### Button Search
         self.search_button = QPushButton("Search", self)
@@ -774,15 +1580,18 @@ class MainWindow(QMainWindow):
     
 ### Initialize row count for table
         self.row_count = 0        
+
+### Last Log is Opened once the Window is Up
+        QTimer.singleShot(0, self.reopen_last_log)
 ## Key Press Events       
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Return or event.key() == Qt.Key_Enter:
             if isinstance(self.focusWidget(), QPushButton):
                 self.focusWidget().click()
             elif self.edit_mode and self.log.hasFocus():
-                current_item = self.log.currentItem()
-                if current_item:
-                    self.log.editItem(current_item)
+                current_index = self.log.currentIndex()
+                if current_index.isValid():
+                    self.log.edit(current_index)
         else:
             super().keyPressEvent(event)
             
@@ -802,6 +1611,25 @@ class MainWindow(QMainWindow):
     def uppercase_text_call(self, text):
         self.call.setText(text.upper())
 
+### Call Field Colour, Dupe / Worked this Band / Worked Before / New
+    def update_worked_indicator(self):
+        call = self.call.text().strip()
+        if not call:
+            self.call.setStyleSheet("background-color: #d3d3d3;")
+            self.call.setToolTip("")
+            return
+        worked, on_band, dupe = self.worked_index.status(call, self.band.currentText(), self.mode.currentText())
+        if dupe:
+            color, hint = "#ff8080", f"Dupe, worked {dupe}x on {self.band.currentText()} {self.mode.currentText()}"
+        elif on_band:
+            color, hint = "#ffc266", f"Worked {on_band}x on {self.band.currentText()}, new mode"
+        elif worked:
+            color, hint = "#fff176", f"Worked {worked}x before, new band"
+        else:
+            color, hint = "#a5d6a7", "New station"
+        self.call.setStyleSheet(f"background-color: {color};")
+        self.call.setToolTip(hint)
+
     def uppercase_text_qso(self, text):
         self.qso.setCurrentText(text.capitalize())
         
@@ -809,11 +1637,10 @@ class MainWindow(QMainWindow):
         self.search.setText(text.upper())
             
     def show_notes_placeholder(self, row):
-        uuid_item = self.log.item(row, 11)
-        if uuid_item:
-            uuid = uuid_item.text()
-            notes_filename = self.file_name.replace(".json", "_notes.json")
-            dialog = NotesDialog(uuid, notes_filename, self)
+        uuid = self.log_model.text(row, 11) if 0 <= row < self.log_model.rowCount() else ""
+        if uuid:
+            self.writer.flush()
+            dialog = NotesDialog(uuid, self.notes, self)
             dialog.exec_()
         else:
             QMessageBox.warning(self, "Error", "No UUID found for this row.")
@@ -884,12 +1711,15 @@ class MainWindow(QMainWindow):
             self.setWindowTitle(f"LHL : {self.file_name}")
                    
 ### Delete Row
-    def on_cell_clicked(self, row, column):
-        if column == 0:
+    def on_cell_clicked(self, index):
+        row = index.row()
+        if index.column() == 0:
             self.log.selectRow(row)
             self.show_context_menu(row)
-                
+
+# row is the table row, delete and notes work on the model row
     def show_context_menu(self, row):
+        row = self.log_filter.source_row(row)
         menu = QMenu(self)
 
         if self.edit_mode:
@@ -915,71 +1745,46 @@ class MainWindow(QMainWindow):
             self.delete_row(row)
 
     def delete_row(self, row):
-    # Get UUID from the hidden column
-        uuid_item = self.log.item(row, 11)
-        if uuid_item:
-            uuid = uuid_item.text()
-            notes_filename = self.file_name.replace(".json", "_notes.json")
-
-        # Remove note from notes file if it exists
-            if os.path.exists(notes_filename):
-                with open(notes_filename, "r") as file:
-                    notes_data = json.load(file)
-
-                if uuid in notes_data:
-                    del notes_data[uuid]
-                    with open(notes_filename, "w") as file:
-                        json.dump(notes_data, file, indent=4)
+    # Drop any unsaved note, a saved one is deleted with the row on Done
+        self.temp_notes_data.pop(self.log_model.text(row, 11), None)
 
     # Remove the row from the table
-        self.log.removeRow(row)
+        record = self.log_model.remove_row(row)
+        self.changes.delete(record)
+        self.search_index.remove(record)
+        self.worked_index.remove(record)
+        self.log_stats.remove(record)
+        self.datetime_index.remove(record)
 
 
 
-    def update_note_indicator(self, uuid):
-        for row in range(self.log.rowCount()):
-            uuid_item = self.log.item(row, 11)
-            if uuid_item and uuid_item.text() == uuid:
-                line_item = self.log.item(row, 0)
-                if line_item:
-                    base_number = line_item.text().replace("*", "")
-                    line_item.setText(f"{base_number}")
-                    line_item.setForeground(QBrush(QColor("#4CBB17")))  # Light green
+    def update_note_indicator(self, uuid, note=None):
+        if note is None:
+            note = self.temp_notes_data.get(uuid, self.notes.get(uuid))
+        if self.log_model.is_paged():
+            self.log_model.records.set_note(uuid, note)
+            self.log.viewport().update()
+            return
+        for row, record in enumerate(self.log_model.records):
+            if record.uuid == uuid:
+                record.has_note = bool(note.strip())
+                self.log_model.refresh_row(row)
                 break
 
+### Entry Already Written to the Log File
+    def is_saved_entry(self, uuid):
+        return any(record.uuid == uuid and record.line for record in self.log_model.records)
+
     
     def open_qrz_page(self):
         callsign = self.search.text().strip()
         if not callsign:
             QMessageBox.warning(self, "Input Error", "Please enter a callsign in the search field.")
             return
+        import webbrowser
         url = f"https://www.qrz.com/db/{callsign}"
         webbrowser.open(url)
 
-### Table Sorting       
-    def enable_sorting_on_user_click(self, index):
-        self.log.setSortingEnabled(True)
- 
-    def on_cell_edit_start_from_navigation(self, current_row, current_column, previous_row, previous_column):
-        item = self.log.item(current_row, current_column)
-        if item:
-            self.original_cell_value = item.text()
-            self.log.setSortingEnabled(False)
-            
-            if current_column in [6, 7, 8, 9]:  # Freq, Tx, Rx, Pwr
-                item.setTextAlignment(Qt.AlignCenter)
-                
-    def on_cell_edit_end(self, item):
-        if not self.edit_mode or item is None:
-            return
-
-        original_value = item.data(Qt.UserRole)
-        if original_value is not None and item.text() != original_value:
-            item.setForeground(QBrush(QColor("blue")))
-        else:
-            item.setForeground(QBrush(QColor("black")))
-            
-                
 ## Create New Form
     def on_new_triggered(self):
         if self.edit_mode:
@@ -996,16 +1801,19 @@ class MainWindow(QMainWindow):
         file_dialog = QFileDialog(self)
         file_dialog.setDefaultSuffix('json') 
         file_dialog.setFileMode(QFileDialog.AnyFile)
-        file_dialog.setNameFilter("JSON files (*.json)")
+        file_dialog.setNameFilters(["JSON files (*.json)", "SQLite logs (*.sqlite)"])
         file_dialog.setAcceptMode(QFileDialog.AcceptSave)    
 
         if file_dialog.exec_() == QFileDialog.Accepted:
             file_path = file_dialog.selectedFiles()[0]
-            if not file_path.lower().endswith('.json'): 
-                file_path += '.json'        
+            if not file_path.lower().endswith(LOG_SUFFIXES): 
+                file_path += '.sqlite' if 'SQLite' in file_dialog.selectedNameFilter() else '.json'
+            self.close_storage()
             self.file_name = file_path
-            with open(self.file_name, 'w') as file:
-                file.write(json.dumps({"mycall": self.mycall.text(), "grid": self.grid.text(), "log": []})) 
+            self.storage = create_log_storage(self.file_name, self.mycall.text(), self.grid.text())
+            self.notes = self.storage.notes
+            self.settings.setValue("last_log", os.path.abspath(file_path))
+            self.flush_wsjtx_pending()
     
             self.file_created = True
             self.create_button.setVisible(False)
@@ -1045,8 +1853,6 @@ class MainWindow(QMainWindow):
         if not pwr_text:
             pwr_text = 0
     
-### Disables Sorting 
-        self.log.setSortingEnabled(False)
         self.time.setFocus()
         
 ### Checks File was Created    
@@ -1054,68 +1860,97 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "File Not Created", "Please create a file first using the 'Create' button.")
             return
         
-### Load Existing Data
-        with open(self.file_name, 'r') as file:
-            data = json.load(file)           
-            self.log.setSortingEnabled(False)
-
-### Append New Log Entry
-        entry_uuid = str(uuid.uuid4())
-        data['log'].append({
-            'uuid': entry_uuid,
-            'time': time_text,
-            'date': date_text,
-            'call': call_text,
-            'mode': mode_text,
-            'band': band_text,
-            'freq': freq_text,
-            'tx': tx_text,
-            'rx': rx_text,
-            'pwr': pwr_text,
-            'qso': qso_text
-        })
-
-### Write Update to File
-        with open(self.file_name, 'w') as file:
-            json.dump(data, file, indent=4)
-
-### Insert New Table Row
-        self.log.insertRow(0)
-        self.log.addItemCentered(0, 0, f"{len(data['log']):04d}")  
-        self.log.addItemCentered(0, 1, time_text)
-        self.log.addItemCentered(0, 2, date_text)
-        self.log.addItemCentered(0, 3, call_text)
-        self.log.addItemCentered(0, 4, mode_text)
-        self.log.addItemCentered(0, 5, band_text)
-        self.log.addItemCentered(0, 6, str(freq_text))
-        self.log.addItemCentered(0, 7, str(tx_text))
-        self.log.addItemCentered(0, 8, str(rx_text))
-        self.log.addItemCentered(0, 9, str(pwr_text))
-        self.log.addItemCentered(0, 10, qso_text)
-        
-        uuid_item = QTableWidgetItem(entry_uuid)
-        uuid_item.setTextAlignment(Qt.AlignCenter)
-        self.log.setItem(0, 11, uuid_item)
+### Append New Log Entry to Storage
+        with PROFILER.span("update_data"):
+            entry = {
+                'uuid': str(uuid.uuid4()),
+                'time': time_text,
+                'date': date_text,
+                'call': call_text,
+                'mode': mode_text,
+                'band': band_text,
+                'freq': freq_text,
+                'tx': tx_text,
+                'rx': rx_text,
+                'pwr': pwr_text,
+                'qso': qso_text
+            }
+            self.commit_entries([entry])
 
+### Clear Call, Tx, Rx Lines
+            self.call.clear()       
+            self.tx.clear()
+            self.rx.clear()
+            self.time.setFocus()
+            self.time.setText(current_time)
+            self.date.setText(current_date)
+            
+            self.time_update_paused = False
+            self.update_time()
         
-        self.log.setRowHeight(0, 20)
+### Store New Entries and Insert Table Rows, Newest First
+# Shared by the Update button and the WSJT-X listener, notes maps a
+# uuid to note text for entries that come with one.
+    def commit_entries(self, entries, notes=None):
+        PROFILER.count("qsos logged", len(entries))
+        notes = notes or {}
+        self.writer.append(self.storage, entries)
+        if notes:
+            self.writer.update_notes(self.notes, notes)
+        if not self.log_model.is_sorted_by(0, Qt.DescendingOrder):
+            self.log.sortByColumn(0, Qt.DescendingOrder)
+
+        first_line = self.log_model.rowCount() + (self.rows_to_load or 0) + 1
+        records = [LogRecord(entry, first_line + i, bool(notes.get(entry['uuid'])))
+                   for i, entry in enumerate(entries)]
+        self.log_model.insert_records(0, records[::-1])
+        for record in records:
+            self.search_index.add(record)
+            self.worked_index.add(record)
+            self.log_stats.add(record)
+            self.datetime_index.add(record)
+        self.update_worked_indicator()
+
+### WSJT-X Listener
+    def toggle_wsjtx_listener(self, checked):
+        if checked:
+            self.wsjtx_listener = WsjtxListener(parent=self)
+            self.wsjtx_listener.qsos_logged.connect(self.log_wsjtx_qsos)
+            self.wsjtx_listener.failed.connect(self.on_wsjtx_failed)
+            self.wsjtx_listener.start()
+        else:
+            self.stop_wsjtx_listener()
+
+    def stop_wsjtx_listener(self):
+        if self.wsjtx_listener is not None:
+            self.wsjtx_listener.requestInterruption()
+            self.wsjtx_listener.wait()
+            self.wsjtx_listener = None
+        self.wsjtx_action.setChecked(False)
+
+    def on_wsjtx_failed(self, message):
+        self.stop_wsjtx_listener()
+        QMessageBox.critical(self, "WSJT-X Listener", message)
+
+### QSOs Wait while Editing or with no Log Open
+    def log_wsjtx_qsos(self, qsos):
+        self.wsjtx_pending.extend(qsos)
+        self.flush_wsjtx_pending()
+
+    def flush_wsjtx_pending(self):
+        if not self.wsjtx_pending or self.edit_mode or self.storage is None:
+            return
+        entries = []
+        notes = {}
+        for qso in self.wsjtx_pending:
+            entry = dict(qso, uuid=str(uuid.uuid4()), qso=self.qso.currentText())
+            comment = entry.pop('comment', '')
+            if comment:
+                notes[entry['uuid']] = comment
+            entries.append(entry)
+        self.wsjtx_pending = []
+        self.commit_entries(entries, notes)
 
-### Clear Call, Tx, Rx Lines Enable Sorting
-        self.call.clear()       
-        self.tx.clear()
-        self.rx.clear()
-        self.log.sortItems(0, Qt.DescendingOrder)
-        self.log.setSortingEnabled(True)
-        self.time.setFocus()
-        self.time.setText(current_time)
-        self.date.setText(current_date)
-        
-        self.time_update_paused = False
-        self.update_time()
-      
-        
-        self.log.setSortingEnabled(True)
-        
     def clear_data(self):
         self.call.clear()
         self.freq.clear()
@@ -1126,8 +1961,8 @@ class MainWindow(QMainWindow):
         self.band.setCurrentText("160m")
         self.qso.setCurrentText("Sent")        
  
+### Table Sorting       
     def enable_sorting_on_user_click(self, index):
-        self.log.setSortingEnabled(True)        
         self.update_time()
         self.update_date()
         self.time_update_paused = False
@@ -1144,77 +1979,173 @@ class MainWindow(QMainWindow):
         file_dialog = QFileDialog(self)
         file_dialog.setDefaultSuffix('json')  
         file_dialog.setFileMode(QFileDialog.ExistingFile)
-        file_dialog.setNameFilter("JSON files (*.json)")        
+        file_dialog.setNameFilters(["LHL logs (*.json *.sqlite *.db)", "JSON files (*.json)", "SQLite logs (*.sqlite *.db)"])
    
         if file_dialog.exec_() == QFileDialog.Accepted:
-            file_path = file_dialog.selectedFiles()[0]
-            self.file_name = file_path
-            self.log.setSortingEnabled(False) 
-            self.log.setRowCount(0)
-
-            with open(self.file_name, 'r') as file:
-                data = json.load(file)
-                mycall = data.get('mycall', '')
-                grid = data.get('grid', '')
-                log_entries = data.get('log', [])
-                self.mycall.setText(mycall)
-                self.grid.setText(grid)
-
-### Populate Table Reversed Order
-                for i, entry in enumerate(reversed(log_entries)):
-                    row_position = self.log.rowCount()
-                    self.log.insertRow(row_position)
-
-                    uuid = entry.get("uuid", "")
-                    notes_filename = self.file_name.replace(".json", "_notes.json")
-                    has_note = False
-                    if os.path.exists(notes_filename):
-                        with open(notes_filename, "r") as notes_file:
-                            notes_data = json.load(notes_file)
-                            has_note = bool(notes_data.get(uuid, "").strip())
-
-    # Format line number with optional green asterisk
-                    line_number = f"{len(log_entries) - i:04d}" + ("" if has_note else "")
-                    line_item = QTableWidgetItem(line_number)
-                    line_item.setTextAlignment(Qt.AlignCenter)
-                    if has_note:
-                        line_item.setForeground(QBrush(QColor("#4CBB17")))
-                    self.log.setItem(row_position, 0, line_item)
-
-                    self.log.addItemCentered(row_position, 1, entry['time'])
-                    self.log.addItemCentered(row_position, 2, entry['date'])
-                    self.log.addItemCentered(row_position, 3, entry['call'])
-                    self.log.addItemCentered(row_position, 4, entry['mode'])
-                    self.log.addItemCentered(row_position, 5, entry['band'])
-                    self.log.addItemCentered(row_position, 6, entry['freq'])
-                    self.log.addItemCentered(row_position, 7, entry['tx'])
-                    self.log.addItemCentered(row_position, 8, entry['rx'])
-                    self.log.addItemCentered(row_position, 9, entry['pwr'])
-                    self.log.addItemCentered(row_position, 10, entry['qso'])
-
-                    uuid_item = QTableWidgetItem(uuid)
-                    uuid_item.setTextAlignment(Qt.AlignCenter)
-                    self.log.setItem(row_position, 11, uuid_item)
-
-                    self.log.setRowHeight(row_position, 20)
-                    self.row_uuid_map[row_position] = uuid
-                                            
-### Visibility Create Button
-            self.file_loaded = True
-            self.create_button.setVisible(False)
-
-### Disable Editing and Enable Sorting
-            self.mycall.setReadOnly(True)
-            self.grid.setReadOnly(True)
-            self.log.sortItems(0, Qt.DescendingOrder)
-            self.log.setSortingEnabled(True)  
-            self.time.setFocus()
+            self.open_log_file(file_dialog.selectedFiles()[0])
 
 ### Reset Form if Canceled    
         else:
             if not self.file_loaded:
                 self.reset_form()
 
+    def open_log_file(self, file_path):
+        self.close_storage()
+        self.file_name = file_path
+        self.storage = open_log_storage(self.file_name)
+        self.notes = self.storage.notes
+        self.settings.setValue("last_log", os.path.abspath(file_path))
+        self.start_loading()
+        self.flush_wsjtx_pending()
+                                        
+### Visibility Create Button
+        self.file_loaded = True
+        self.create_button.setVisible(False)
+
+### Disable Editing and Enable Sorting
+        self.mycall.setReadOnly(True)
+        self.grid.setReadOnly(True)
+        self.time.setFocus()
+
+    def reopen_last_log(self):
+        file_path = self.settings.value("last_log", "", type=str)
+        if not self.reopen_action.isChecked() or not file_path or self.storage is not None:
+            return
+        if not os.path.isfile(file_path):
+            return
+        try:
+            self.open_log_file(file_path)
+        except Exception as e:
+            QMessageBox.warning(self, "Reopen Last Log", f"Could not open {file_path}: {e}")
+
+### Populate Table Newest First from a LogLoader
+# Rows arrive in batches while the operator can already log. QSOs
+# logged before the loader reports the QSO count are numbered from 1
+# and moved up past the loaded ones once the count is known.
+    def start_loading(self, span_name="load_file"):
+        self.stop_loading()
+        profile_done = PROFILER.take_profile()
+        self.load_span = PROFILER.span(span_name)
+        self.first_rows_span = PROFILER.span(f"{span_name}.first_rows")
+        self.writer.flush()
+        self.search_active = False
+        self.log_model.set_records([])
+        self.search_index.clear()
+        self.worked_index.clear()
+        self.log_stats.clear()
+        self.datetime_index.clear()
+        self.log_model.sort_column = 0
+        self.log_model.sort_order = Qt.DescendingOrder
+        self.log.horizontalHeader().setSortIndicator(0, Qt.DescendingOrder)
+        self.rows_to_load = None
+        self.load_progress.setMaximum(0)
+        self.load_progress.setValue(0)
+        self.load_progress.setVisible(True)
+
+        with PROFILER.span("notes.read"):
+            notes_data = self.notes.all()
+        paged = (self.paged_action.isChecked() and isinstance(self.storage, JsonLogStorage)
+                 and os.path.getsize(self.file_name) >= PAGED_LOG_BYTES)
+        self.loader = LogLoader(self.storage, notes_data, paged, self)
+        self.profile_worker(self.loader, span_name, profile_done)
+        self.loader.header.connect(self.on_load_header)
+        self.loader.mapped.connect(self.on_load_mapped)
+        self.loader.batch.connect(self.on_load_batch)
+        self.loader.failed.connect(self.on_load_failed)
+        self.loader.finished.connect(self.on_load_finished)
+        self.loader.start()
+
+### Profile Next Operation, Run on the Worker Thread Doing the Work
+# cProfile only sees its own thread, so the profile taken before the
+# operation's spans goes to the worker's run(), see lhl/profiler.py.
+    def profile_worker(self, worker, name, done):
+        if done is not None:
+            worker.profile_name = name
+            worker.profiled.connect(done)
+
+    def stop_loading(self):
+        if self.loader is not None:
+            self.loader.requestInterruption()
+            self.loader.wait()
+            self.first_rows_span.end()
+            self.load_span.end()
+            self.loader = None
+            self.rows_to_load = None
+            self.load_progress.setVisible(False)
+
+    def on_load_header(self, mycall, grid, total):
+        if self.sender() is not self.loader:
+            return
+        self.mycall.setText(mycall)
+        self.grid.setText(grid)
+        self.rows_to_load = total
+        for row, record in enumerate(self.log_model.records):
+            record.line += total
+            self.log_model.refresh_row(row)
+        self.load_progress.setMaximum(max(total, 1))
+
+### QSOs Logged while Loading Stay in Memory, Above the Paged Rows
+    def on_load_mapped(self, log):
+        if self.sender() is not self.loader:
+            return
+        self.log_model.set_records(PagedRecords(log, self.loader.notes_data, reversed(self.log_model.records)))
+
+    def on_load_batch(self, records):
+        if self.sender() is not self.loader:
+            return
+        if self.log_model.is_paged():
+            for record in records:
+                self.worked_index.count(record)
+                self.log_stats.count(record)
+        else:
+            self.log_model.append_records(records)
+            for record in records:
+                self.search_index.add(record)
+                self.worked_index.add(record)
+                self.log_stats.add(record)
+                self.datetime_index.add(record)
+        self.rows_to_load -= len(records)
+        self.load_progress.setValue(self.load_progress.maximum() - self.rows_to_load)
+        self.loader.batch_done()
+        self.first_rows_span.end()
+        if self.startup_timer is not None and self.log_model.rowCount() == len(records):
+            self.startup_timer.mark("first rows")
+
+    def on_load_failed(self, message):
+        if self.sender() is not self.loader:
+            return
+        QMessageBox.critical(self, "Error", f"Could not load the log: {message}")
+
+    def on_load_finished(self):
+        loader = self.sender()
+        loader.deleteLater()
+        if loader is not self.loader:
+            return
+        self.loader = None
+        self.rows_to_load = None
+        self.load_progress.setVisible(False)
+        if not self.log_model.is_sorted_by(0, Qt.DescendingOrder):
+            self.log_model.sort(self.log_model.sort_column, self.log_model.sort_order)
+        self.first_rows_span.end()  # an empty log has no rows
+        self.load_span.end()
+        if self.startup_timer is not None:
+            self.startup_timer.mark("log loaded")
+            self.startup_timer = None
+        if self.storage is not None and self.storage.leftover:
+            self.writer.submit("log", self.storage.compact_leftover)
+        if self.storage is not None and self.storage.recovered:
+            self.storage.journal.recovered = False
+            QMessageBox.warning(self, "Log Recovered",
+                                f"{self.file_name} was damaged and has been restored from its backup "
+                                f"({os.path.basename(self.file_name)}.bak). The damaged file was kept as "
+                                f"{os.path.basename(self.file_name)}.broken.")
+
+    def is_loading(self):
+        if self.loader is None:
+            return False
+        QMessageBox.information(self, "Loading", "The log is still loading, try again in a moment.")
+        return True
+
 ## Reset form to initial state
     def reset_form(self):
         if self.edit_mode:
@@ -1229,60 +2160,121 @@ class MainWindow(QMainWindow):
         self.rx.clear()
         self.pwr.clear()
         self.qso.setCurrentIndex(0)
-        self.log.setRowCount(0)
+        self.log_model.set_records([])
+        self.search_index.clear()
+        self.worked_index.clear()
+        self.log_stats.clear()
+        self.datetime_index.clear()
+        self.search_active = False
         self.mycall.setReadOnly(False)
         self.grid.setReadOnly(False)
         self.create_button.setVisible(True)
         
         if hasattr(self, 'file_name'):
+            self.close_storage()
             delattr(self, 'file_name')
         
         self.file_created = False
         self.file_loaded = False
         self.mycall.setFocus()
         
-## Search Function      
+## Search Function
+# The Search button and Enter search straight away, typing filters the
+# table once it pauses for SEARCH_DELAY_MS.
     def search_log(self):
+        self.search_timer.stop()
         search_term = self.search.text().strip().lower()
         if not search_term:
             QMessageBox.warning(self, "Input Error", "Please enter a search term.")
             return                
-        matches = []
-        for row in range(self.log.rowCount()):       
-            row_data = [
-                self.log.item(row, col).text().lower() if self.log.item(row, col) else ""
-                for col in range(self.log.columnCount())
-            ]
-            
-### Check for Search Term
-            if any(search_term in cell for cell in row_data):
-                matches.append(row)
-    
-### Hide Rows That Don't Match
-        if matches:
-            for row in range(self.log.rowCount()):
-                self.log.setRowHidden(row, row not in matches)
-        else:
+        try:
+            matches = self.filter_rows(search_term, "search_log")
+        except QueryError as e:
+            QMessageBox.warning(self, "Search Error", f"{e}.")
+            return
+        if not matches:
             QMessageBox.information(self, "No Matches", f"No matches found for '{search_term}'.")
-            
+
+### Filter as you Type
+# Not for a paged log, each search there reads the whole mapped file.
+    def filter_log(self):
+        search_term = self.search.text().strip().lower()
+        if self.log_model.is_paged():
+            return
+        if search_term:
+            try:
+                self.filter_rows(search_term, "filter_log")
+            except QueryError:
+                pass  # still being typed, such as date:2025-
+        else:
+            self.show_all_rows()
+
+### Matches from the Search Index, Shown through the Filter
+# The search text is a query, field:value words such as band:20m are
+# looked up in field indexes, see lhl/search.py.
+    def filter_rows(self, search_term, span_name):
+        query = compile_query(search_term)
+        with PROFILER.span(span_name):
+            matches = self.search_index.query(query)
+
+### Paged Rows are Searched in the Mapped Log, the Index only has New QSOs
+            if self.log_model.is_paged():
+                matches = self.log_model.records.search(query, matches.__contains__)
+                self.log_model.set_matches(matches)
+            else:
+                self.log_filter.set_matches(matches)
+            self.search_active = True
+        return matches
+
 ### Clearing Search
     def clear_search(self):
         self.search.clear()
-        for row in range(self.log.rowCount()):
-            self.log.setRowHidden(row, False)
+        self.search_timer.stop()
+        self.show_all_rows()
+
+    def show_all_rows(self):
+        if self.search_active:
+            if self.log_model.is_paged():
+                self.log_model.set_matches(None)
+            else:
+                self.log_filter.set_matches(None)
+            self.search_active = False
+
+### Show Date Range, the QSOs of Some Days
+# Looked up in the datetime index, a paged log has none for its mapped
+# rows and is filtered by the same date: query the search box shows.
+# Clear Search shows every QSO again.
+    def show_date_range(self):
+        if not self.file_loaded and not self.file_created:
+            QMessageBox.critical(self, "Error", "No file loaded. Load a file first.")
+            return
+        if self.is_loading():
+            return
+        span = None if self.log_model.is_paged() else self.datetime_index.span()
+        if span is None:
+            today = parse_date_days(datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d"))
+            span = (today * 1440, today * 1440)
+        dialog = DateRangeDialog(span[0] // 1440, span[1] // 1440, self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        first, last = dialog.days()
+        query = f"date:{date_text(first)}..{date_text(last)}"
+        self.search_timer.stop()
+        self.search.blockSignals(True)
+        self.search.setText(query)
+        self.search.blockSignals(False)
+        if self.log_model.is_paged():
+            matches = self.filter_rows(query, "show_date_range")
+        else:
+            with PROFILER.span("show_date_range"):
+                matches = set(self.datetime_index.between(first * 1440, last * 1440 + 1439))
+                self.log_filter.set_matches(matches)
+                self.search_active = True
+        if not matches:
+            QMessageBox.information(self, "No Matches", f"No QSOs from {date_text(first)} to {date_text(last)}.")
  
 ### Add Row in Edit
     def add_row(self):
-        self.log.setSortingEnabled(False)
-        row_position = 0
-        self.log.insertRow(row_position)
-
-    # Line number cell
-        item = QTableWidgetItem("")
-        item.setTextAlignment(Qt.AlignCenter)
-        item.setForeground(QBrush(QColor("blue")))
-        self.log.setItem(row_position, 0, item)
-
     # Placeholder values for the new row
         now_utc = datetime.datetime.now(datetime.timezone.utc)
         placeholders = [
@@ -1290,21 +2282,17 @@ class MainWindow(QMainWindow):
             now_utc.strftime("%Y-%m-%d"), 
             "CALL", "SSB", "20m", "14.000", "59", "59", "100", "Sent"
     ]
-        for col, value in enumerate(placeholders, start=1):
-            placeholder_item = QTableWidgetItem(value)
-            placeholder_item.setTextAlignment(Qt.AlignCenter)
-            placeholder_item.setForeground(QBrush(QColor("blue"))) 
-            self.log.setItem(row_position, col, placeholder_item)
 
     #  Add a temporary UUID so Notes can be used immediately
-        entry_uuid = str(uuid.uuid4())
-        uuid_item = QTableWidgetItem(entry_uuid)
-        uuid_item.setTextAlignment(Qt.AlignCenter)
-        uuid_item.setForeground(QBrush(QColor("blue")))
-        self.log.setItem(row_position, 11, uuid_item)
-
-    # Optionally store it in the row_uuid_map if needed
-        self.row_uuid_map[row_position] = entry_uuid
+        entry = dict(zip(LOG_FIELDS, placeholders), uuid=str(uuid.uuid4()))
+        record = LogRecord(entry)
+        self.log_model.insert_record(0, record)
+        self.log_model.set_row_edited(0)
+        self.changes.insert(record)
+        self.search_index.add(record)
+        self.worked_index.add(record)
+        self.log_stats.add(record)
+        self.datetime_index.add(record)
             
 ## Editing             
     def toggle_edit_mode(self):
@@ -1321,18 +2309,24 @@ class MainWindow(QMainWindow):
                 self.done_button.setVisible(False)
                 self.add_button.setVisible(False)
                 self.cancel_edit_button.setVisible(False)
-                self.log.setEditTriggers(QTableWidget.NoEditTriggers)
+                self.log.setEditTriggers(QAbstractItemView.NoEditTriggers)
                 self.mycall.setReadOnly(True)
                 self.grid.setReadOnly(True)
 
             msg_box.finished.connect(close_message_box)
             msg_box.exec_()
         else:
+            if not self.edit_mode and self.is_loading():
+                return
+            if not self.edit_mode and self.log_model.is_paged():
+                QMessageBox.information(self, "Edit Mode", "This log is paged from disk and can't be edited. "
+                                        "Turn off File > Page Large Logs from Disk and load it again to edit it.")
+                return
             self.edit_mode = not self.edit_mode
             self.done_button.setVisible(self.edit_mode)
             self.cancel_edit_button.setVisible(self.edit_mode)
             self.add_button.setVisible(self.edit_mode)
-            self.log.setEditTriggers(QTableWidget.DoubleClicked if self.edit_mode else QTableWidget.NoEditTriggers)
+            self.log.setEditTriggers(QAbstractItemView.DoubleClicked if self.edit_mode else QAbstractItemView.NoEditTriggers)
             self.mycall.setReadOnly(not self.edit_mode)
             self.grid.setReadOnly(not self.edit_mode)
             self.label_time.setVisible(not self.edit_mode)
@@ -1362,88 +2356,101 @@ class MainWindow(QMainWindow):
             
 
             if self.edit_mode:
-                self.log.setItemDelegateForColumn(0, HighlightAndDeleteDelegate(self.log))
-                self.log.setItemDelegateForColumn(1, TimeDelegate(self.log))
-                self.log.setItemDelegateForColumn(2, DateDelegate(self.log))
-                self.log.setItemDelegateForColumn(3, AlphanumericDelegate(self.log))
-                self.log.setItemDelegateForColumn(4, DropdownDelegate(["SSB", "CW", "AM", "FM", "FT-8", "WSPR"], self.log))
-                self.log.setItemDelegateForColumn(5, DropdownDelegate(["160m", "80m", "40m", "20m", "15m", "10m", "6m", "2m", "70cm"], self.log))
-                self.log.setItemDelegateForColumn(6, NumericWithDecimalDelegate(self.log))
-                self.log.setItemDelegateForColumn(7, NumericWithSymbolsDelegate(self.log))
-                self.log.setItemDelegateForColumn(8, NumericWithSymbolsDelegate(self.log))
-                self.log.setItemDelegateForColumn(9, IntegerDelegate(self.log))
-                self.log.setItemDelegateForColumn(10, DropdownDelegate(["Sent", "Rcvd"], self.log))
+                self.changes.clear()
+                self.edit_header = (self.mycall.text(), self.grid.text())
+                self.install_edit_delegates()
 
                 QMessageBox.information(self, "Edit Mode", "Log Unlocked")
             else:
-                self.reload_current_file()       
-
-    def on_cell_edit_end(self, item):
+### Leaving without Done Discards Edits, Nothing to Reload after Done
+                if not self.changes.is_empty() or self.temp_notes_data:
+                    self.reload_current_file()
+                self.changes.clear()
+                self.mycall.setText(self.edit_header[0])
+                self.grid.setText(self.edit_header[1])
+                self.flush_wsjtx_pending()
+
+### Cell Editors, Made the First Time Edit Mode is Turned on
+    def install_edit_delegates(self):
+        if self.edit_delegates_installed:
+            return
+        self.log.setItemDelegateForColumn(1, TimeDelegate(self.log))
+        self.log.setItemDelegateForColumn(2, DateDelegate(self.log))
+        self.log.setItemDelegateForColumn(3, AlphanumericDelegate(self.log))
+        self.log.setItemDelegateForColumn(4, DropdownDelegate(["SSB", "CW", "AM", "FM", "FT-8", "WSPR"], self.log))
+        self.log.setItemDelegateForColumn(5, DropdownDelegate(["160m", "80m", "40m", "20m", "15m", "10m", "6m", "2m", "70cm"], self.log))
+        self.log.setItemDelegateForColumn(6, NumericWithDecimalDelegate(self.log))
+        self.log.setItemDelegateForColumn(7, NumericWithSymbolsDelegate(self.log))
+        self.log.setItemDelegateForColumn(8, NumericWithSymbolsDelegate(self.log))
+        self.log.setItemDelegateForColumn(9, IntegerDelegate(self.log))
+        self.log.setItemDelegateForColumn(10, DropdownDelegate(["Sent", "Rcvd"], self.log))
+        self.edit_delegates_installed = True
+
+    def on_cell_edit_end(self, row, col, original_value):
         if not self.edit_mode:
             return
-        if item and self.original_cell_value is not None:
-            if item.text() != self.original_cell_value:
-                item.setForeground(QBrush(QColor("blue")))
-            else:
-                item.setForeground(QBrush(QColor("black")))
-        self.original_cell_value = None
+        record = self.log_model.record(row)
+        field = LOG_FIELDS[col - 1]
+        self.changes.update(record, field, original_value, self.log_model.text(row, col))
+        self.log_model.set_cell_edited(row, col, self.changes.is_changed(record, field))
+        self.search_index.update(record)
+        self.worked_index.update(record)
+        self.log_stats.update(record)
+        self.datetime_index.update(record)
         
 ### Cancel Edits           
     def cancel_edit_mode(self):
         if not hasattr(self, 'file_name') or not self.file_name:
             return    
-        self.reload_current_file()
         self.toggle_edit_mode()
         self.temp_notes_data.clear()
         QMessageBox.information(self, "Edit Mode", "Changes reverted")
 
     def reload_current_file(self):
         if hasattr(self, 'file_name') and self.file_name:    
-            with open(self.file_name, 'r') as file:
-                data = json.load(file)
-            self.log.setSortingEnabled(False)
-            self.log.setRowCount(0)
-
-            for i, entry in enumerate(reversed(data['log'])):
-                row_position = self.log.rowCount()
-                self.log.insertRow(row_position)
-
-                uuid = entry.get("uuid", "")
-                notes_filename = self.file_name.replace(".json", "_notes.json")
-                has_note = False
-                if os.path.exists(notes_filename):
-                    with open(notes_filename, "r") as notes_file:
-                        notes_data = json.load(notes_file)
-                        has_note = bool(notes_data.get(uuid, "").strip())
-
-    # Format line number with optional green asterisk
-                line_number = f"{len(data['log']) - i:04d}" + ("" if has_note else "")
-                line_item = QTableWidgetItem(line_number)
-                line_item.setTextAlignment(Qt.AlignCenter)
-
-                if has_note:
-                    line_item.setForeground(QBrush(QColor("#4CBB17")))
-                self.log.setItem(row_position, 0, line_item)
-            
-                self.log.addItemCentered(row_position, 1, entry['time'])
-                self.log.addItemCentered(row_position, 2, entry['date'])
-                self.log.addItemCentered(row_position, 3, entry['call'])
-                self.log.addItemCentered(row_position, 4, entry['mode'])
-                self.log.addItemCentered(row_position, 5, entry['band'])
-                self.log.addItemCentered(row_position, 6, entry['freq'])
-                self.log.addItemCentered(row_position, 7, entry['tx'])
-                self.log.addItemCentered(row_position, 8, entry['rx'])
-                self.log.addItemCentered(row_position, 9, entry['pwr'])
-                self.log.addItemCentered(row_position, 10, entry['qso'])
-               
-                uuid_item = QTableWidgetItem(entry.get("uuid", ""))
-                uuid_item.setTextAlignment(Qt.AlignCenter)
-                self.log.setItem(row_position, 11, uuid_item)
-
-                self.log.setRowHeight(row_position, 20)
-
-            self.log.setSortingEnabled(True)
+            self.start_loading("reload_current_file")
             
+### Close Storage, Folds the Journal into the .json Log
+    def close_storage(self):
+        self.stop_loading()
+        self.writer.flush()
+        if self.log_model.is_paged():
+            if self.exporter is not None:
+                self.exporter.wait()
+            self.search_active = False
+            self.log_model.set_records([])
+        if getattr(self, 'storage', None) is not None:
+            with PROFILER.span("close_storage"):
+                self.storage.close()
+            self.storage = None
+
+    def on_write_failed(self, name, message):
+        what = "notes" if name == "notes" else "log"
+        QMessageBox.critical(self, "Error", f"Could not save the {what}: {message}")
+
+### Statistics and Diagnostics Dialogs, Kept for the Session
+    def show_stats(self):
+        if self.stats_dialog is None:
+            self.stats_dialog = StatsDialog(self.log_stats, self)
+        self.stats_dialog.show()
+        self.stats_dialog.raise_()
+
+    def show_diagnostics(self):
+        if self.diagnostics_dialog is None:
+            self.diagnostics_dialog = DiagnosticsDialog(self)
+        self.diagnostics_dialog.show()
+        self.diagnostics_dialog.raise_()
+
+    def closeEvent(self, event):
+        for worker in (self.exporter, self.importer):
+            if worker is not None:
+                worker.requestInterruption()
+                worker.wait()
+        self.stop_wsjtx_listener()
+        self.close_storage()
+        self.writer.stop()
+        super().closeEvent(event)
+
     def show_edit_mode_warning(self):
         msg_box = QMessageBox(self)
         msg_box.setWindowTitle("Warning")
@@ -1455,114 +2462,86 @@ class MainWindow(QMainWindow):
 ### Save Edits      
     def save_edits(self):
         if hasattr(self, 'file_name'):
-            with open(self.file_name, 'r+') as file:
-                data = json.load(file)
-                num_rows = self.log.rowCount()
-                
-                self.log.setSortingEnabled(True)
-                self.log.sortItems(0, Qt.AscendingOrder)
-                
-                for row in range(self.log.rowCount()):
-                    for col in range(self.log.columnCount()):
-                        item = self.log.item(row, col)
-                        if item:
-                            item.setForeground(QBrush(QColor("black")))
-                rows = []
-                for row in range(num_rows):
-                    time_item = self.log.item(row, 1)
-                    date_item = self.log.item(row, 2)
-                    if time_item and date_item:
-                        try:
-                            row_datetime = datetime.datetime.strptime(
-                                f"{date_item.text()} {time_item.text()}", "%Y-%m-%d %H:%M"
-                            )
-                        except ValueError:
-                            row_datetime = datetime.datetime.min
-                    else:
-                        row_datetime = datetime.datetime.min
-
-                    row_data = [self.log.item(row, col).text() if self.log.item(row, col) else "" for col in range(self.log.columnCount())]
-                    rows.append((row_datetime, row_data))
-                rows.sort(key=lambda x: x[0])
-                self.log.setRowCount(0)
-                
-                save_data = []
-                for i, (dt, row_data) in enumerate(rows):
-                    self.log.insertRow(i)
-                    row_id = f"{i+1:04d}"
-                    item = QTableWidgetItem(row_id)
-                    item.setTextAlignment(Qt.AlignCenter)
-                    self.log.setItem(i, 0, item)
-
-    # Extract UUID from original row_data
-                    original_uuid = row_data[-1] if len(row_data) > 11 else str(uuid.uuid4())
-                    self.row_uuid_map[i] = original_uuid
-
-                    entry = {
-                        'uuid': original_uuid,
-                        'time': row_data[1],
-                        'date': row_data[2],
-                        'call': row_data[3],
-                        'mode': row_data[4],
-                        'band': row_data[5],
-                        'freq': row_data[6],
-                        'tx': row_data[7],
-                        'rx': row_data[8],
-                        'pwr': row_data[9],
-                        'qso': row_data[10]
-                    }
-
-    # Reapply UUID to table
-                    uuid_item = QTableWidgetItem(original_uuid)
-                    uuid_item.setTextAlignment(Qt.AlignCenter)
-                    self.log.setItem(i, 11, uuid_item)
-
-                    save_data.append(entry)
-
-
-### Update JSON data
-                data['log'] = save_data
-                data['mycall'] = self.mycall.text()
-                data['grid'] = self.grid.text()
-                
- # Save any temporary notes
-                notes_filename = self.file_name.replace(".json", "_notes.json")
-                notes_data = {}
-                if os.path.exists(notes_filename):
-                    with open(notes_filename, "r") as notes_file:
-                        notes_data = json.load(notes_file)
-
-    # Merge temporary notes
-                notes_data.update(self.temp_notes_data)
-
-                with open(notes_filename, "w") as notes_file:
-                    json.dump(notes_data, notes_file, indent=4)
-
-    # Clear temp notes
+            with PROFILER.span("save_edits"):
+### Renumber by Date and Time, New Rows after Existing Ones
+# The datetime index has the rows in that order already.
+                records = self.log_model.records
+                last_line = max((record.line for record in records), default=0)
+                for i, record in enumerate(self.changes.inserted.values()):
+                    record.line = last_line + i + 1
+                    self.datetime_index.update(record)
+                stored = sorted(records, key=operator.attrgetter('line'))
+                ordered = self.datetime_index.between()
+                start = next((i for i, (a, b) in enumerate(zip(stored, ordered)) if a is not b), None)
+                for i, record in enumerate(ordered):
+                    record.line = i + 1
+
+     # Save any temporary notes, drop the notes of deleted rows
+                self.writer.update_notes(self.notes, self.temp_notes_data, self.changes.deleted)
                 self.temp_notes_data.clear()
 
-    # Now safe to write to the original log file
-                file.seek(0)
-                json.dump(data, file, indent=4)
-                file.truncate()
-
+### Write Only the Changes, a Log from before uuids is Rewritten Once
+                header = (self.mycall.text(), self.grid.text())
+                if any(not record.uuid for record in records):
+                    for record in records:
+                        if not record.uuid:
+                            record.uuid = str(uuid.uuid4())
+                    self.writer.submit("log", self.storage.replace_all, header[0], header[1],
+                                       [record.to_entry() for record in ordered])
+                else:
+                    updated = {entry_uuid: {field: new for field, (old, new) in fields.items()}
+                               for entry_uuid, fields in self.changes.updated.items()}
+                    self.writer.submit("log", self.storage.apply_changes,
+                        header if header != self.edit_header else None,
+                        sorted(self.changes.deleted),
+                        updated,
+                        [record.to_entry() for record in self.changes.inserted.values()],
+                        (start, [record.uuid for record in ordered[start:]]) if start is not None else None)
+                self.changes.clear()
+                self.log_model.clear_edited()
+                self.edit_header = header
 
 ### Reset UI
-            self.mycall.setReadOnly(True)
-            self.grid.setReadOnly(True)
-            self.toggle_edit_mode()
-            self.time.setFocus()
-            self.log.sortItems(0, Qt.DescendingOrder)
+                self.mycall.setReadOnly(True)
+                self.grid.setReadOnly(True)
+                self.toggle_edit_mode()
+                self.time.setFocus()
+                self.log.sortByColumn(0, Qt.DescendingOrder)
 
             QMessageBox.information(self, "Edits Saved", "Edits have been saved.")
 
 
+### Convert .json to SQLite and Back
+    def convert_log_file(self):
+        if self.edit_mode:
+            self.show_edit_mode_warning()
+            return
+        if self.storage is None:
+            QMessageBox.critical(self, "Error", "No file loaded. Load a file first.")
+            return
+        to_sqlite = isinstance(self.storage, JsonLogStorage)
+        name_filter = "SQLite logs (*.sqlite)" if to_sqlite else "JSON files (*.json)"
+        file_name, _ = QFileDialog.getSaveFileName(self, "Convert Log", "", name_filter)
+        if file_name:
+            if to_sqlite and not file_name.lower().endswith(SQLITE_SUFFIXES):
+                file_name += '.sqlite'
+            elif not to_sqlite and not file_name.lower().endswith('.json'):
+                file_name += '.json'
+            if os.path.abspath(file_name) == os.path.abspath(self.file_name):
+                QMessageBox.warning(self, "Convert Log", "Choose a different file than the open log.")
+                return
+            self.writer.flush()
+            copy_log(self.storage, file_name)
+            QMessageBox.information(self, "Convert Log", f"Log written to {file_name}")
+
 ### Export adi
     
     def export_adi(self):    
         if self.edit_mode:
             self.show_edit_mode_warning()
             return
+        if self.is_loading():
+            return
     
         if not self.file_loaded:  
             msg_box = QMessageBox(self)
@@ -1577,64 +2556,120 @@ class MainWindow(QMainWindow):
         if file_name:
             if not file_name.endswith('.adi'):
                 file_name += '.adi'
-            last_export_date = QDateTime()
-
-            if os.path.exists(file_name):
-                with open(file_name, 'r') as file:
-                    lines = file.readlines()
-                    for line in lines:
-                        if line.startswith("Log exported on:"):
-                            last_export_date_str = line[len("Log exported on:"):].strip()
-                            last_export_date = QDateTime.fromString(last_export_date_str, 'yyyy-MM-dd HH:mm:ss UTC')
-                            break
-        
-### ADIF Header  
-            adi_data = "ADIF Export from LHL Amateur Log 1.0\n"
-            adi_data += f"Written by: {os.path.splitext(os.path.basename(self.file_name))[0]}\n"
-            adi_data += f"Log exported on: {QDateTime.currentDateTimeUtc().toString('yyyy-MM-dd HH:mm:ss')} UTC\n"
-            adi_data += "<EOH>\n\n"
-
-### Iterate Log Table
-            for row in range(self.log.rowCount()):
-                time = self.log.item(row, 1).text() if self.log.item(row, 1) else ""
-                date = self.log.item(row, 2).text() if self.log.item(row, 2) else ""
-                call = self.log.item(row, 3).text() if self.log.item(row, 3) else ""
-                mode = self.log.item(row, 4).text() if self.log.item(row, 4) else ""
-                band = self.log.item(row, 5).text() if self.log.item(row, 5) else ""
-                freq = self.log.item(row, 6).text() if self.log.item(row, 6) else ""
-                tx = self.log.item(row, 7).text() if self.log.item(row, 7) else ""
-                rx = self.log.item(row, 8).text() if self.log.item(row, 8) else ""
-                pwr = self.log.item(row, 9).text() if self.log.item(row, 9) else ""
-
-                if len(date) == 10:
-                    date = date.replace('-', '')
-                if len(time) == 5:
-                    time = time.replace(':', '')
-
-## Check if the log entry is after the last export date
-                entry_date_time_str = f"{date} {time}"
-                entry_date_time = QDateTime.fromString(entry_date_time_str, 'yyyyMMdd HHmm')
-            
-                if entry_date_time > last_export_date:
-                    adi_data += f"<CALL:{len(call)}>{call} \n"
-                    adi_data += f"<QSO_DATE:{len(date)}>{date} \n"
-                    adi_data += f"<TIME_ON:{len(time)}>{time} \n"
-                    adi_data += f"<BAND:{len(band)}>{band} \n"
-                    adi_data += f"<FREQ:{len(freq)}>{freq} \n"
-                    adi_data += f"<MODE:{len(mode)}>{mode} \n"
-                    adi_data += f"<TX_PWR:{len(pwr)}>{pwr} \n"
-                    adi_data += f"<RST_SENT:{len(tx)}>{tx} \n"
-                    adi_data += f"<RST_RCVD:{len(rx)}>{rx} \n"
-                    adi_data += "<EOR>\n\n"
-          
-            with open(file_name, 'w') as file:
-                file.write(adi_data)
+
+### Written on an AdifExporter Thread, Only QSOs Since the Last Export
+# Those are looked up in the datetime index, oldest first. A paged log
+# puts its rows in the same order from the snapshot's keys.
+            try:
+                since = read_last_export(file_name)
+            except OSError as e:
+                QMessageBox.critical(self, "Error", f"ADIF export failed: {e}")
+                return
+            first = None if since is None else since // 60 + 1
+            if self.log_model.is_paged():
+                total, records = self.log_model.records.between(first)
+            else:
+                records = self.datetime_index.between(first)
+                total = len(records)
+            written_by = os.path.splitext(os.path.basename(self.file_name))[0]
+            self.export_progress = QProgressDialog("Exporting ADIF...", "Cancel", 0, max(total, 1), self)
+            self.export_progress.setWindowTitle("Export")
+            self.export_progress.setWindowModality(Qt.WindowModal)
+            self.export_progress.setMinimumDuration(500)
+
+            profile_done = PROFILER.take_profile()
+            self.export_span = PROFILER.span("export_adi")
+            self.exporter = AdifExporter(file_name, records, written_by, since, self)
+            self.profile_worker(self.exporter, "export_adi", profile_done)
+            self.exporter.progress.connect(self.export_progress.setValue)
+            self.exporter.done.connect(self.on_export_done)
+            self.exporter.failed.connect(self.on_export_failed)
+            self.exporter.finished.connect(self.export_span.end)  # also if run() raised
+            self.exporter.finished.connect(self.exporter.deleteLater)
+            self.export_progress.canceled.connect(self.exporter.requestInterruption)
+            self.exporter.start()
+
+    def on_export_done(self, count):
+        self.export_span.end()
+        self.exporter = None
+        self.export_progress.reset()
+        if count is None:
+            QMessageBox.information(self, "Export", "ADIF export cancelled.")
+        else:
             QMessageBox.information(self, "ADIF file exported", "ADIF file exported successfully.")
 
+    def on_export_failed(self, message):
+        self.export_span.end()
+        self.exporter = None
+        self.export_progress.reset()
+        QMessageBox.critical(self, "Error", f"ADIF export failed: {message}")
+
+### Import adi
+    def import_adi(self):
+        if self.edit_mode:
+            self.show_edit_mode_warning()
+            return
+        if self.storage is None:
+            QMessageBox.critical(self, "Error", "No file loaded. Load a file first.")
+            return
+        if self.is_loading():
+            return
+        file_name, _ = QFileDialog.getOpenFileName(self, "Import ADIF File", "", "ADIF Files (*.adi *.adif);;All Files (*)")
+        if not file_name:
+            return
+
+### Parsed on an AdifImporter Thread, QSOs Already in the Log are Skipped
+        records = self.log_model.records
+        known = {qso_key(record.call, record.date, record.time, record.band, record.mode)
+                 for record in (records.all_records() if self.log_model.is_paged() else records)}
+        self.import_progress = QProgressDialog("Reading ADIF...", "Cancel", 0, max(os.path.getsize(file_name), 1), self)
+        self.import_progress.setWindowTitle("Import")
+        self.import_progress.setWindowModality(Qt.WindowModal)
+        self.import_progress.setMinimumDuration(500)
+
+        self.importer = AdifImporter(file_name, known, self)
+        self.importer.progress.connect(self.import_progress.setValue)
+        self.importer.done.connect(self.on_import_done)
+        self.importer.failed.connect(self.on_import_failed)
+        self.importer.finished.connect(self.on_import_finished)
+        self.import_progress.canceled.connect(self.importer.requestInterruption)
+        self.importer.start()
+
+### New QSOs are Stored with a Single Write
+    def on_import_done(self, entries, notes, duplicates):
+        self.import_progress.reset()
+        if entries:
+            self.clear_search()
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                self.commit_entries(entries, notes)
+            finally:
+                QApplication.restoreOverrideCursor()
+        QMessageBox.information(self, "ADIF Import", f"Imported {len(entries)} QSOs, skipped {duplicates} already in the log.")
+
+    def on_import_failed(self, message):
+        self.import_progress.reset()
+        QMessageBox.critical(self, "Error", f"ADIF import failed: {message}")
+
+    def on_import_finished(self):
+        self.import_progress.reset()
+        self.importer.deleteLater()
+        self.importer = None
+
 
 if __name__ == '__main__':
+    timing = '--timing' in sys.argv
+    if timing:
+        sys.argv.remove('--timing')
+        print(f"startup: imports {(time.perf_counter() - STARTED) * 1000:.0f} ms", file=sys.stderr)
+    if '--profile' in sys.argv:
+        sys.argv.remove('--profile')
+        PROFILER.enabled = True
     app = QApplication(sys.argv)
     mainWindow = MainWindow()
+    if timing:
+        mainWindow.startup_timer = StartupTimer(mainWindow)
+        mainWindow.startup_timer.mark("window built")
     mainWindow.show()
     sys.exit(app.exec_())
 
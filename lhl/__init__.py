@@ -0,0 +1,12 @@
+# LHL core library: log records, storage, search and ADIF without Qt.
+# LHL.py is the GUI on top of it, python -m lhl the command line tool.
+from .records import LOG_FIELDS, LogRecord
+from .storage import copy_log, create_log_storage, open_log_storage
+from .search import QueryError, SearchIndex, compile_query
+from .indexes import DatetimeIndex, LogStats, WorkedIndex
+from .adif import read_adif, write_adif
+from .profiler import PROFILER
+
+__all__ = ['LOG_FIELDS', 'LogRecord', 'copy_log', 'create_log_storage', 'open_log_storage',
+           'QueryError', 'SearchIndex', 'compile_query', 'DatetimeIndex', 'LogStats', 'WorkedIndex',
+           'read_adif', 'write_adif', 'PROFILER']
@@ -0,0 +1,193 @@
+# LHL core: ADIF (.adi) export and import.
+import calendar
+import datetime
+import os
+import re
+import uuid
+
+from .records import band_for_freq, datetime_key, log_mode, parse_number
+from .storage import fsync_directory
+
+### ADIF Export
+# Written one QSO at a time to a buffered temporary file that replaces
+# the .adi when done, so a cancelled or failed export leaves the old file.
+# Tag lengths count UTF-8 bytes.
+ADIF_VERSION = "3.1.4"
+ADIF_PROGRAM_ID = "LHL"
+ADIF_PROGRAM_VERSION = "1.0"
+ADIF_EXPORT_STAMP = "Log exported on:"
+ADIF_STAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# (ADIF tag, LogRecord column)
+ADIF_FIELDS = [
+    ("CALL", 3), ("QSO_DATE", 2), ("TIME_ON", 1), ("BAND", 5), ("FREQ", 6),
+    ("MODE", 4), ("TX_PWR", 9), ("RST_SENT", 7), ("RST_RCVD", 8),
+]
+
+def adif_field(name, value):
+    value = str(value)
+    return f"<{name}:{len(value.encode('utf-8'))}>{value}"
+
+def adif_header(written_by, exported_at):
+    return ("ADIF Export from LHL Amateur Log 1.0\n"
+            f"Written by: {written_by}\n"
+            f"{ADIF_EXPORT_STAMP} {exported_at.strftime(ADIF_STAMP_FORMAT)} UTC\n"
+            f"{adif_field('ADIF_VER', ADIF_VERSION)}\n"
+            f"{adif_field('PROGRAMID', ADIF_PROGRAM_ID)}\n"
+            f"{adif_field('PROGRAMVERSION', ADIF_PROGRAM_VERSION)}\n"
+            f"{adif_field('CREATED_TIMESTAMP', exported_at.strftime('%Y%m%d %H%M%S'))}\n"
+            "<EOH>\n\n")
+
+def adif_record(record):
+    fields = []
+    for name, col in ADIF_FIELDS:
+        value = record.text(col)
+        if col == 2 and len(value) == 10:
+            value = value.replace('-', '')
+        elif col == 1 and len(value) == 5:
+            value = value.replace(':', '')
+        fields.append(adif_field(name, value) + " \n")
+    return "".join(fields) + "<EOR>\n\n"
+
+### Time of the Previous Export in an Existing .adi, as Epoch Seconds
+def read_last_export(file_name):
+    if not os.path.exists(file_name):
+        return None
+    with open(file_name, 'r', encoding='utf-8', errors='replace') as file:
+        for line in file:
+            if line.startswith(ADIF_EXPORT_STAMP):
+                try:
+                    stamp = datetime.datetime.strptime(line[len(ADIF_EXPORT_STAMP):].strip(), ADIF_STAMP_FORMAT + " UTC")
+                except ValueError:
+                    return None
+                return calendar.timegm(stamp.timetuple())
+            if line.startswith("<EOH>"):
+                break
+    return None
+
+### Only QSOs Newer than since (Epoch Seconds) are Written
+# Returns the number of QSOs written, or None when cancelled.
+def write_adif(file_name, records, written_by, exported_at, since=None, progress=None, cancelled=None):
+    temp_name = file_name + ".tmp"
+    count = 0
+    try:
+        with open(temp_name, 'w', encoding='utf-8', newline='\n', buffering=1 << 16) as file:
+            file.write(adif_header(written_by, exported_at))
+            for i, record in enumerate(records):
+                if i % 1000 == 0:
+                    if cancelled is not None and cancelled():
+                        return None
+                    if progress is not None:
+                        progress(i)
+                if since is None or record.datetime_key * 60 > since:
+                    file.write(adif_record(record))
+                    count += 1
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_name, file_name)
+        fsync_directory(file_name)
+    finally:
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+    return count
+
+
+### ADIF Import
+# iter_adif_records reads <FIELD:len>value tags in 64 KiB chunks and
+# yields one {field: value} dict per <EOR>, field names in lower case.
+# Lengths count bytes. The header, up to <EOH>, is skipped.
+ADIF_TAG = re.compile(rb'<([A-Za-z0-9_]+)(?::(\d+)(?::[A-Za-z])?)?>')
+
+def iter_adif_records(file, chunk_size=1 << 16):
+    buffer = b""
+    pos = 0
+    eof = False
+    fields = {}
+    while True:
+        match = ADIF_TAG.search(buffer, pos)
+        length = int(match.group(2)) if match is not None and match.group(2) else 0
+        if match is None or match.end() + length > len(buffer):
+            if not eof:
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                keep = match.start() if match is not None else buffer.rfind(b'<', pos)
+                buffer = (buffer[keep:] if keep >= 0 else b"") + chunk
+                pos = 0
+                continue
+            if match is None:
+                break
+
+        name = match.group(1).lower()
+        if match.group(2) is not None:
+            fields[name.decode('ascii')] = buffer[match.end():match.end() + length].decode('utf-8', 'replace')
+            pos = match.end() + length
+        else:
+            pos = match.end()
+            if name == b'eor':
+                if fields:
+                    yield fields
+                fields = {}
+            elif name == b'eoh':
+                fields = {}
+
+### ADIF Record as a Log Entry, None without a Call
+# The extra 'comment' key holds the ADIF COMMENT for the notes file.
+def adif_entry(fields):
+    call = fields.get('call', '').strip().upper()
+    if not call:
+        return None
+    qso_date = fields.get('qso_date', '').strip()
+    time_on = fields.get('time_on', '').strip()
+    freq = fields.get('freq', '').strip()
+    mode = fields.get('mode', '').strip()
+    if mode.upper() == 'MFSK' and fields.get('submode'):
+        mode = fields['submode']
+    qsl = (fields.get('qsl_rcvd', '') + fields.get('lotw_qsl_rcvd', '')).upper()
+    return {
+        'time': f"{time_on[:2]}:{time_on[2:4]}" if len(time_on) >= 4 else time_on,
+        'date': f"{qso_date[:4]}-{qso_date[4:6]}-{qso_date[6:8]}" if len(qso_date) == 8 else qso_date,
+        'call': call,
+        'mode': log_mode(mode),
+        'band': fields.get('band', '').strip().lower() or band_for_freq(parse_number(freq)),
+        'freq': freq or 0,
+        'tx': fields.get('rst_sent', '').strip() or 0,
+        'rx': fields.get('rst_rcvd', '').strip() or 0,
+        'pwr': fields.get('tx_pwr', '').strip() or 0,
+        'qso': "Rcvd" if 'Y' in qsl else "Sent",
+        'comment': fields.get('comment', '').strip()
+    }
+
+def qso_key(call, date, time, band, mode):
+    return (str(call).upper(), str(date), str(time), str(band).lower(), str(mode).upper())
+
+### Reads an .adi, Skips QSOs Already in the Log
+# known holds qso_key tuples of the QSOs already in the log and gets the
+# new ones added. Returns the new entries oldest first, their notes by
+# uuid and the duplicate count, or None when cancelled. progress gets the
+# file position.
+def read_adif(file_name, known, progress=None, cancelled=None):
+    entries = []
+    notes = {}
+    duplicates = 0
+    with open(file_name, 'rb') as file:
+        for i, fields in enumerate(iter_adif_records(file)):
+            if i % 1000 == 0:
+                if cancelled is not None and cancelled():
+                    return None
+                if progress is not None:
+                    progress(file.tell())
+            entry = adif_entry(fields)
+            if entry is None:
+                continue
+            key = qso_key(entry['call'], entry['date'], entry['time'], entry['band'], entry['mode'])
+            if key in known:
+                duplicates += 1
+                continue
+            known.add(key)
+            entry['uuid'] = str(uuid.uuid4())
+            comment = entry.pop('comment')
+            if comment:
+                notes[entry['uuid']] = comment
+            entries.append(entry)
+    entries.sort(key=lambda entry: datetime_key(entry['date'], entry['time']))
+    return entries, notes, duplicates
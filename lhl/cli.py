@@ -0,0 +1,182 @@
+# LHL core: the lhl command, for working on logs without the GUI.
+#
+#   python -m lhl stats LOG...                QSO, call, band, mode and Sent/Rcvd counts
+#   python -m lhl export-adif LOG OUT.adi     QSOs since the last export to OUT.adi
+#   python -m lhl import-adif LOG IN.adi...   QSOs not already in the log
+#   python -m lhl search LOG QUERY            QSOs with any cell containing QUERY, or
+#                                             matching field:value words, see search.py
+#
+# stats and search take --json for one JSON object per line. The exit
+# status is 1 if any log could not be read. --profile, before the
+# command, prints where the command spent its time on stderr.
+import argparse
+import datetime
+import json
+import os
+import pstats
+import sys
+from datetime import timezone
+
+from .adif import qso_key, read_adif, read_last_export, write_adif
+from .indexes import DatetimeIndex, LogStats
+from .profiler import profile_call
+from .records import LOG_COLUMNS, LogRecord
+from .search import compile_query, search_values
+from .storage import LOG_SUFFIXES, open_log_storage
+
+class CommandError(Exception):
+    pass
+
+# Anything not named like a log is refused, not read as a .json log.
+def open_log(file_name):
+    if not file_name.lower().endswith(LOG_SUFFIXES):
+        raise CommandError(f"{file_name}: not an LHL log, expected {', '.join(LOG_SUFFIXES)}")
+    if not os.path.isfile(file_name):
+        raise CommandError(f"{file_name}: no such log")
+    return open_log_storage(file_name)
+
+### Records Numbered Oldest First, like the Table
+def load_records(storage):
+    data = storage.load()
+    records = [LogRecord(entry, line) for line, entry in enumerate(data.get('log', []), start=1)]
+    return data, records
+
+### stats
+def log_stats(file_name):
+    storage = open_log(file_name)
+    try:
+        data, records = load_records(storage)
+    finally:
+        storage.close()
+    stats = LogStats()
+    for record in records:
+        stats.add(record)
+    dated = [record.datetime_key for record in records if record.datetime_key >= 0]
+    return {
+        "file": file_name,
+        "mycall": data.get('mycall', ''),
+        "grid": data.get('grid', ''),
+        "qsos": stats.total,
+        "calls": stats.unique_calls(),
+        "first": minutes_text(min(dated)) if dated else None,
+        "last": minutes_text(max(dated)) if dated else None,
+        "bands": dict(stats.counts['bands'].most_common()),
+        "modes": dict(stats.counts['modes'].most_common()),
+        "qso": dict(stats.counts['qso'].most_common()),
+    }
+
+def minutes_text(minutes):
+    return (datetime.datetime(1970, 1, 1) + datetime.timedelta(minutes=minutes)).strftime("%Y-%m-%d %H:%M")
+
+def counts_text(counts):
+    return ", ".join(f"{name or '-'} {count}" for name, count in counts.items()) or "-"
+
+def run_stats(args):
+    failed = False
+    for file_name in args.logs:
+        try:
+            stats = log_stats(file_name)
+        except (CommandError, OSError, ValueError) as e:
+            print(f"lhl: {e}", file=sys.stderr)
+            failed = True
+            continue
+        if args.json:
+            print(json.dumps(stats))
+        else:
+            print(f"{file_name}: {stats['mycall']} {stats['grid']}, {stats['qsos']} QSOs, {stats['calls']} calls, "
+                  f"{stats['first'] or '-'} to {stats['last'] or '-'}")
+            print(f"  bands: {counts_text(stats['bands'])}")
+            print(f"  modes: {counts_text(stats['modes'])}")
+            print(f"  qso: {counts_text(stats['qso'])}")
+    return 1 if failed else 0
+
+### export-adif, Oldest First by Date and Time as the GUI Writes it
+def run_export(args):
+    storage = open_log(args.log)
+    try:
+        data, records = load_records(storage)
+    finally:
+        storage.close()
+    since = None if args.all else read_last_export(args.output)
+    index = DatetimeIndex()
+    for record in records:
+        index.add(record)
+    records = index.between(None if since is None else since // 60 + 1)
+    written_by = os.path.splitext(os.path.basename(args.log))[0]
+    count = write_adif(args.output, records, written_by, datetime.datetime.now(timezone.utc), since)
+    print(f"{count} QSOs written to {args.output}")
+    return 0
+
+### import-adif
+def run_import(args):
+    storage = open_log(args.log)
+    try:
+        data, records = load_records(storage)
+        known = {qso_key(record.call, record.date, record.time, record.band, record.mode) for record in records}
+        for file_name in args.adif:
+            entries, notes, duplicates = read_adif(file_name, known)
+            storage.extend(entries)
+            storage.notes.update(notes)
+            print(f"{file_name}: {len(entries)} QSOs imported, {duplicates} already in the log")
+    finally:
+        storage.close()
+    return 0
+
+### search
+def run_search(args):
+    query = compile_query(args.query)
+    storage = open_log(args.log)
+    try:
+        data, records = load_records(storage)
+    finally:
+        storage.close()
+    for record in reversed(records):
+        if query.matches(search_values(record)):
+            if args.json:
+                print(json.dumps(dict(record.to_entry(), line=record.line)))
+            else:
+                print("\t".join(record.text(col) for col in range(len(LOG_COLUMNS) - 1)))
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="lhl", description="Work on LHL logs (.json or .sqlite) without the GUI.")
+    parser.add_argument('--profile', action='store_true', help="print a cProfile report of the command on stderr")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    stats_parser = commands.add_parser('stats', help="QSO, call, band, mode and Sent/Rcvd counts")
+    stats_parser.add_argument('logs', nargs='+', metavar='LOG')
+    stats_parser.add_argument('--json', action='store_true', help="one JSON object per log")
+    stats_parser.set_defaults(run=run_stats)
+
+    export_parser = commands.add_parser('export-adif', help="write QSOs to an .adi file")
+    export_parser.add_argument('log', metavar='LOG')
+    export_parser.add_argument('output', metavar='OUT.adi')
+    export_parser.add_argument('--all', action='store_true', help="every QSO, not only those since the last export")
+    export_parser.set_defaults(run=run_export)
+
+    import_parser = commands.add_parser('import-adif', help="add QSOs from .adi files")
+    import_parser.add_argument('log', metavar='LOG')
+    import_parser.add_argument('adif', nargs='+', metavar='IN.adi')
+    import_parser.set_defaults(run=run_import)
+
+    search_parser = commands.add_parser('search', help="QSOs with any cell containing QUERY, or matching "
+                                                       "field:value words such as call:K1* band:20m")
+    search_parser.add_argument('log', metavar='LOG')
+    search_parser.add_argument('query', metavar='QUERY')
+    search_parser.add_argument('--json', action='store_true', help="one JSON object per QSO")
+    search_parser.set_defaults(run=run_search)
+
+    args = parser.parse_args(argv)
+    try:
+        if args.profile:
+            status, profile = profile_call(args.run, args)
+            pstats.Stats(profile, stream=sys.stderr).sort_stats('cumulative').print_stats(30)
+            return status
+        return args.run(args)
+    except BrokenPipeError:
+        # piped into head or similar, which stopped reading
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except (CommandError, OSError, ValueError) as e:
+        print(f"lhl: {e}", file=sys.stderr)
+        return 1
@@ -0,0 +1,191 @@
+# LHL core: lookup indexes kept up to date as QSOs are logged and edited.
+import bisect
+import collections
+
+### Worked Before Index
+# QSO counts per call, call+band and call+band+mode, so the call field
+# can show a dupe or worked-before hint on every keystroke.
+class WorkedIndex:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.counts = collections.Counter()
+        self.record_keys = {}
+
+    @staticmethod
+    def keys(call, band, mode):
+        call = str(call).strip().upper()
+        band = str(band).strip().lower()
+        mode = str(mode).strip().upper()
+        return (call,), (call, band), (call, band, mode)
+
+    def add(self, record):
+        self.record_keys[record] = self.count(record)
+
+    # counted without keeping the keys, for QSOs that are never removed
+    def count(self, record):
+        keys = self.keys(record.call, record.band, record.mode)
+        self.counts.update(keys)
+        return keys
+
+    def remove(self, record):
+        keys = self.record_keys.pop(record, ())
+        self.counts.subtract(keys)
+        for key in keys:
+            if self.counts[key] <= 0:
+                del self.counts[key]
+
+    def update(self, record):
+        self.remove(record)
+        self.add(record)
+
+### (QSOs with call, on this band, on this band and mode)
+    def status(self, call, band, mode):
+        return tuple(self.counts.get(key, 0) for key in self.keys(call, band, mode))
+
+### Log Statistics
+# QSO counts per band, mode, day, hour (UTC) and call, and Sent / Rcvd
+# from the QSO column, kept up to date one QSO at a time like the worked
+# index so a statistics view never rescans the log. take_changes hands
+# over the keys whose counts moved since it was last called, so the view
+# only redraws those rows. Until the view has seen a clear, nothing is
+# tracked, it redraws everything then anyway.
+STATS_GROUPS = ('bands', 'modes', 'days', 'hours', 'calls', 'qso')
+HOURS = [f"{hour:02d}" for hour in range(24)]
+
+class LogStats:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.total = 0
+        self.counts = {group: collections.Counter() for group in STATS_GROUPS}
+        self.counters = [self.counts[group] for group in STATS_GROUPS]
+        self.record_keys = {}
+        self.names = {}
+        self.changed = {group: set() for group in STATS_GROUPS}
+        self.cleared = True
+
+    # band, mode and QSO repeat on every row, one string each is shared
+    def keys(self, record):
+        names = self.names
+        band = str(record.band).strip().lower()
+        mode = str(record.mode).strip().upper()
+        qso = str(record.qso).strip().capitalize()
+        time_key = record.time_key
+        return (names.setdefault(band, band),
+                names.setdefault(mode, mode),
+                str(record.date).strip() if record.datetime_key >= 0 else "",
+                HOURS[time_key // 60] if time_key >= 0 else "",
+                str(record.call).strip().upper(),
+                names.setdefault(qso, qso))
+
+    def add(self, record):
+        self.record_keys[record] = self.count(record)
+
+    def count(self, record):
+        keys = self.keys(record)
+        self.total += 1
+        for counts, key in zip(self.counters, keys):
+            counts[key] += 1
+        if not self.cleared:
+            for group, key in zip(STATS_GROUPS, keys):
+                self.changed[group].add(key)
+        return keys
+
+    def remove(self, record):
+        keys = self.record_keys.pop(record, None)
+        if keys is None:
+            return
+        self.total -= 1
+        for counts, key in zip(self.counters, keys):
+            counts[key] -= 1
+            if counts[key] <= 0:
+                del counts[key]
+        if not self.cleared:
+            for group, key in zip(STATS_GROUPS, keys):
+                self.changed[group].add(key)
+
+    def update(self, record):
+        self.remove(record)
+        self.add(record)
+
+    def unique_calls(self):
+        calls = self.counts['calls']
+        return len(calls) - ("" in calls)
+
+### (cleared since last time, {group: keys whose count changed})
+    def take_changes(self):
+        cleared, changed = self.cleared, self.changed
+        self.cleared = False
+        self.changed = {group: set() for group in STATS_GROUPS}
+        return cleared, changed
+
+### Date and Time Index
+# The QSOs in datetime_key order, UTC date and time in minutes, so the
+# QSOs between two times are found with two bisects. A QSO without a
+# valid date has the key -1 and comes first. The order is sorted on the
+# first lookup, while a log loads nothing is sorted, and is kept after
+# that: a new QSO is put in place with bisect, nearly always at the end
+# as QSOs are logged in time order. QSOs with the same time are in line
+# order, so between() is the order Done in edit mode numbers the log in,
+# a QSO whose line changes has to be updated.
+class DatetimeIndex:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.record_keys = {}
+        self.keys = None
+        self.records = None
+
+    def add(self, record):
+        key = record.datetime_key
+        self.record_keys[record] = key
+        if self.keys is not None:
+            start = bisect.bisect_left(self.keys, key)
+            i = bisect.bisect_right(self.keys, key, start)
+            while i > start and self.records[i - 1].line > record.line:
+                i -= 1
+            self.keys.insert(i, key)
+            self.records.insert(i, record)
+
+    def remove(self, record):
+        key = self.record_keys.pop(record, None)
+        if key is None or self.keys is None:
+            return
+        i = bisect.bisect_left(self.keys, key)
+        while self.records[i] is not record:
+            i += 1
+        del self.keys[i]
+        del self.records[i]
+
+    def update(self, record):
+        self.remove(record)
+        self.add(record)
+
+    def __len__(self):
+        return len(self.record_keys)
+
+    def sort(self):
+        if self.keys is None:
+            keys = self.record_keys
+            self.records = sorted(keys, key=lambda record: (keys[record], record.line))
+            self.keys = [self.record_keys[record] for record in self.records]
+
+### QSOs from first to last, Both Included, Oldest First
+# None leaves that end open, between() is every QSO.
+    def between(self, first=None, last=None):
+        self.sort()
+        start = 0 if first is None else bisect.bisect_left(self.keys, first)
+        stop = len(self.keys) if last is None else bisect.bisect_right(self.keys, last)
+        return self.records[start:stop]
+
+    # (first, last) key of the QSOs with a valid date, None if there are none
+    def span(self):
+        self.sort()
+        start = bisect.bisect_left(self.keys, 0)
+        if start == len(self.keys):
+            return None
+        return self.keys[start], self.keys[-1]
@@ -0,0 +1,178 @@
+# LHL core: the table's records paged in from a mapped log.
+#
+# PagedRecords stands in for the list of LogRecords behind the table
+# when a log is too large to hold in memory. Only the pages of rows the
+# table asks for are made into LogRecords, and only the last MAX_PAGES
+# of them are kept, so memory stays the same whatever the size of the
+# log. QSOs logged since the log was opened are held as records in head.
+#
+# Rows are looked up through positions: 0 to count - 1 are the rows of
+# the mapped log, oldest first, those after are head. A sort keeps every
+# position in display order, a search the matching positions and those
+# of them shown, in the same order, all as arrays of 4 bytes a QSO. As
+# with hidden rows in a list, clearing a search shows every QSO in the
+# order it had. Sorted by #, the positions are shown newest or oldest
+# first with no array at all.
+import array
+import collections
+
+from .records import SORT_KEYS
+
+class PagedRecords:
+    PAGE_SIZE = 256
+    MAX_PAGES = 64
+
+    def __init__(self, log, notes, head=()):
+        self.log = log
+        self.notes = notes
+        self.head = list(head)
+        for position, record in enumerate(self.head, start=log.count):
+            record.line = position + 1
+        self.pages = collections.OrderedDict()
+        self.order = None
+        self.matches = None
+        self.shown = None
+        self.newest_first = True
+
+    def __len__(self):
+        if self.shown is not None:
+            return len(self.shown)
+        return self.total()
+
+    def total(self):
+        return self.log.count + len(self.head)
+
+    def __getitem__(self, row):
+        if self.shown is not None:
+            return self.record(self.shown[row])
+        if self.order is not None:
+            return self.record(self.order[row])
+        total = self.total()
+        if row < 0:
+            row += total
+        if not 0 <= row < total:
+            raise IndexError("row out of range")
+        return self.record(total - 1 - row if self.newest_first else row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+### New QSOs, Inserted at the Top Newest First
+# The table only inserts while sorted by # newest first.
+    def __setitem__(self, index, records):
+        if index != slice(0, 0):
+            raise TypeError("only inserts at the top")
+        for record in reversed(records):
+            position = self.total()
+            record.line = position + 1
+            self.head.append(record)
+            if self.order is not None:
+                self.order.insert(0, position)
+            if self.matches is not None:
+                self.matches.append(position)
+                self.shown.insert(0, position)
+
+### A Record, from its Page
+    def record(self, position):
+        count = self.log.count
+        if position >= count:
+            return self.head[position - count]
+        page, offset = divmod(position, self.PAGE_SIZE)
+        records = self.pages.get(page)
+        if records is None:
+            start = page * self.PAGE_SIZE
+            records = self.log.records(start, min(start + self.PAGE_SIZE, count))
+            for record in records:
+                record.has_note = bool(self.notes.get(record.uuid, "").strip())
+            self.pages[page] = records
+            if len(self.pages) > self.MAX_PAGES:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(page)
+        return records[offset]
+
+    def set_note(self, uuid, note):
+        self.notes[uuid] = note
+        for records in [self.head, *self.pages.values()]:
+            for record in records:
+                if record.uuid == uuid:
+                    record.has_note = bool(note.strip())
+
+### Every QSO Newest First, for Import
+# Made page by page as it is read and not kept.
+    def all_records(self):
+        yield from reversed(self.head)
+        for stop in range(self.log.count, 0, -self.PAGE_SIZE):
+            yield from reversed(self.log.records(max(stop - self.PAGE_SIZE, 0), stop))
+
+### QSOs from first on, Oldest First, for Export
+# In datetime_key order, QSOs with the same time in line order, as
+# DatetimeIndex.between has them. Returns the count and the records,
+# made a run of consecutive rows at a time: a log numbered by Done is in
+# this order already, so the runs are whole pages.
+    def between(self, first=None):
+        keys = self.log.sort_keys(2) + [record.datetime_key for record in self.head]
+        positions = sorted(range(len(keys)), key=keys.__getitem__)
+        if first is not None:
+            positions = [position for position in positions if keys[position] >= first]
+        return len(positions), self.records_at(positions)
+
+    def records_at(self, positions):
+        count = self.log.count
+        i = 0
+        while i < len(positions):
+            start = positions[i]
+            if start >= count:
+                yield self.head[start - count]
+                i += 1
+                continue
+            stop = i + 1
+            while (stop < len(positions) and stop - i < self.PAGE_SIZE
+                   and positions[stop] == start + stop - i and positions[stop] < count):
+                stop += 1
+            yield from self.log.records(start, start + stop - i)
+            i = stop
+
+### Search
+# Positions of the QSOs matching a compiled query, see search.py,
+# head_matches says which head records match.
+    def search(self, query, head_matches):
+        positions = query.positions(self.log)
+        positions.extend(position for position, record in enumerate(self.head, start=self.log.count)
+                         if head_matches(record))
+        return positions
+
+### Rows Shown, and their Order
+# matches is None for every QSO. A sort is stable, QSOs that sort the
+# same keep the order they had, like the rows of a list.
+    def set_matches(self, matches):
+        self.matches = matches
+        self.update_shown()
+
+    def sort_by(self, column, descending):
+        if column == 0:
+            self.order = None
+            self.newest_first = descending
+        else:
+            keys = self.log.sort_keys(column)
+            keys += [getattr(record, SORT_KEYS[column]) for record in self.head]
+            self.order = array.array('I', sorted(self.positions(), key=keys.__getitem__, reverse=descending))
+        self.update_shown()
+
+    # every position in display order
+    def positions(self):
+        if self.order is not None:
+            return self.order
+        return range(self.total() - 1, -1, -1) if self.newest_first else range(self.total())
+
+    def update_shown(self):
+        if self.matches is None:
+            self.shown = None
+        elif self.order is None:
+            self.shown = array.array('I', reversed(self.matches) if self.newest_first else self.matches)
+        else:
+            matched = bytearray(self.total())
+            for position in self.matches:
+                matched[position] = 1
+            self.shown = array.array('I', (position for position in self.order if matched[position]))
@@ -0,0 +1,202 @@
+# LHL core: timing spans around the slow paths, off unless turned on.
+#
+#   with PROFILER.span("search_log"):
+#       ...
+#   span = PROFILER.span("load_file")    # work that finishes in a callback
+#   ...
+#   span.end()
+#
+# While off, span() hands back one shared span that does nothing, so an
+# instrumented call only costs a method call. Use the with form unless a
+# callback ends the span, and then end it on every path, failures and
+# cancels too. A span left open is not counted, and if it was picked by
+# profile_next cProfile stays on until it ends and no report comes.
+#
+# Work done on a worker thread is profiled there: the window takes the
+# armed profile with take_profile before starting its spans, and the
+# worker's run() goes through run_profiled.
+import cProfile
+import json
+import threading
+import time
+
+### Times of One Span Name
+# Count, total, min and max, plus a histogram in fixed millisecond buckets
+# that the percentiles are read from.
+BUCKETS_MS = (0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000, 3000, 10000)
+
+class SpanStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.last = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = max(self.max, ms)
+        self.last = ms
+        bucket = 0
+        while bucket < len(BUCKETS_MS) and ms > BUCKETS_MS[bucket]:
+            bucket += 1
+        self.buckets[bucket] += 1
+
+    # upper edge of the bucket holding the percentile, capped at max
+    def percentile(self, fraction):
+        wanted = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min(BUCKETS_MS[bucket], self.max) if bucket < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self):
+        histogram = {f"<={edge}ms": count for edge, count in zip(BUCKETS_MS, self.buckets)}
+        histogram[f">{BUCKETS_MS[-1]}ms"] = self.buckets[-1]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min or 0.0, 3),
+            "max_ms": round(self.max, 3),
+            "last_ms": round(self.last, 3),
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "histogram": histogram,
+        }
+
+### Spans
+class Span:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.end()
+
+    def end(self):
+        if self.start is not None:
+            self.profiler.record(self.name, time.perf_counter() - self.start)
+            self.start = None
+
+class NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def end(self):
+        pass
+
+NO_SPAN = NoSpan()
+
+### A Span Run under cProfile
+# Started by profile_next, done(name, profile) is called once it ends.
+class ProfiledSpan(Span):
+    def __init__(self, profiler, name, done):
+        self.done = done
+        self.profile = cProfile.Profile()
+        super().__init__(profiler, name)
+        self.profile.enable()
+
+    def end(self):
+        if self.start is not None:
+            self.profile.disable()
+            super().end()
+            self.done(self.name, self.profile)
+
+### Profiler
+# Spans may end on any thread. profile_next only picks up a span started
+# on the thread that asked for it, cProfile only sees its own thread.
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.armed = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.spans = {}
+            self.counters = {}
+            self.since = time.time()
+
+    def span(self, name):
+        if not self.enabled:
+            return NO_SPAN
+        armed = self.armed
+        if armed is not None and armed[0] == threading.get_ident():
+            self.armed = None
+            return ProfiledSpan(self, name, armed[1])
+        return Span(self, name)
+
+    def record(self, name, seconds):
+        with self.lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.add(seconds)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def profile_next(self, done):
+        self.enabled = True
+        self.armed = (threading.get_ident(), done)
+
+    def cancel_profile(self):
+        self.armed = None
+
+    # done of the profile armed on this thread, None if there is none
+    def take_profile(self):
+        armed = self.armed
+        if not self.enabled or armed is None or armed[0] != threading.get_ident():
+            return None
+        self.armed = None
+        return armed[1]
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "enabled": self.enabled,
+                "since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.since)),
+                "spans": {name: stats.to_dict() for name, stats in sorted(self.spans.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def dump(self, file_name):
+        with open(file_name, 'w') as file:
+            json.dump(self.snapshot(), file, indent=4)
+
+PROFILER = Profiler()
+
+### A Worker's run() under cProfile
+# name is None unless it was given a profile, done(name, profile) is
+# called on the worker thread once func returns or raises.
+def run_profiled(name, done, func):
+    if name is None:
+        return func()
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(func)
+    finally:
+        done(name, profile)
+
+### cProfile around One Call
+def profile_call(func, *args, **kwargs):
+    profile = cProfile.Profile()
+    result = profile.runcall(func, *args, **kwargs)
+    return result, profile
@@ -0,0 +1,270 @@
+# LHL core: log records, bands and the edit mode change set.
+# Nothing in the lhl package imports Qt, so it also runs on a server
+# without a display, see cli.py.
+import datetime
+import functools
+import math
+import sys
+
+### Log Records
+# The fields of a QSO as a log stores them, and the table columns.
+LOG_FIELDS = ['time', 'date', 'call', 'mode', 'band', 'freq', 'tx', 'rx', 'pwr', 'qso']
+LOG_COLUMNS = ["#", "Time", "Date", "Call", "Mode", "Band", "Freq", "Tx", "Rx", "Pwr", "QSO", "UUID"]
+
+BAND_ORDER = {
+    "160m": 1,
+    "80m": 2,
+    "60m": 3,
+    "40m": 4,
+    "30m": 5,
+    "20m": 6,
+    "17m": 7,
+    "15m": 8,
+    "12m": 9,
+    "10m": 10,
+    "6m": 11,
+    "2m": 12,
+    "70cm": 14,
+
+}
+
+# "inf", "nan" and "1e999" count as 0 like any other text that is not a
+# number, a record keeps them as written in raw_numbers.
+def parse_number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0
+    return number if math.isfinite(number) else 0
+
+### Typed Keys for Date and Time
+# Minutes since 1970-01-01 for "YYYY-MM-DD" plus "HH:MM", -1 when the text is
+# not a valid date or time. Dates repeat a lot in a log so they are cached.
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+@functools.lru_cache(maxsize=65536)
+def parse_date_days(text):
+    try:
+        y, mo, d = map(int, text.split("-"))
+        return datetime.date(y, mo, d).toordinal() - EPOCH_ORDINAL
+    except (AttributeError, ValueError):
+        return -1
+
+def parse_time_minutes(text):
+    try:
+        h, m = map(int, text.split(":"))
+    except (AttributeError, ValueError):
+        return -1
+    if 0 <= h <= 23 and 0 <= m <= 59:
+        return h * 60 + m
+    return -1
+
+def datetime_key(date_text, time_text):
+    days = parse_date_days(date_text)
+    if days < 0:
+        return -1
+    return days * 1440 + max(parse_time_minutes(time_text), 0)
+
+### Text Back from the Keys, Shared by Every Record Showing it
+TIME_TEXTS = [f"{minutes // 60:02d}:{minutes % 60:02d}" for minutes in range(1440)]
+
+@functools.lru_cache(maxsize=65536)
+def date_text(days):
+    return datetime.date.fromordinal(days + EPOCH_ORDINAL).isoformat()
+
+def freq_text(freq):
+    return f"{freq:.3f}"
+
+### Power Keeps Decimals only if it was Written with Them
+def parse_power(value):
+    number = parse_number(value)
+    return float(number) if '.' in str(value) else int(number)
+
+def power_text(pwr):
+    return f"{pwr:.2f}" if isinstance(pwr, float) else str(pwr)
+
+# report and power values repeat, above 256 Python makes a new int for
+# each. Only ints are shared, 5.0 would otherwise come back as 5.
+NUMBERS = {}
+
+def shared_number(number):
+    return NUMBERS.setdefault(number, number) if type(number) is int else number
+
+# Values are held typed rather than as the loaded text: band, mode and QSO
+# are interned strings, freq a float, reports and power numbers, and date
+# plus time a single minutes value, datetime_key. The column text is made
+# from them when the table asks. A date or time that is not in the usual
+# YYYY-MM-DD and HH:MM form is kept as written in raw_datetime, and freq,
+# reports and power that the numbers don't give back as written, such as
+# "-05", "5.125" or "", in raw_numbers. So what is shown and saved is
+# what was logged. The *_key values double as the sort keys, date sorts
+# by date and time together so a day stays in chronological order.
+class LogRecord:
+    __slots__ = ('uuid', 'line', 'has_note', 'call', 'mode', 'band', 'qso', 'time_key', 'band_key',
+                 'freq_key', 'tx_key', 'rx_key', 'pwr_key', 'datetime_key', 'raw_datetime', 'raw_numbers')
+
+    def __init__(self, entry, line=0, has_note=False):
+        self.uuid = entry.get('uuid', '')
+        self.line = line
+        self.has_note = has_note
+        self.set_datetime(entry.get('date', ''), entry.get('time', ''))
+        self.call = str(entry.get('call', ''))
+        self.mode = sys.intern(str(entry.get('mode', '')))
+        self.band = sys.intern(str(entry.get('band', '')))
+        self.band_key = BAND_ORDER.get(self.band, 0)
+        self.qso = sys.intern(str(entry.get('qso', '')))
+        self.set_numbers(entry.get('freq', ''), entry.get('tx', ''), entry.get('rx', ''), entry.get('pwr', ''))
+
+    def set_datetime(self, date, time):
+        days = parse_date_days(date)
+        minutes = parse_time_minutes(time)
+        self.time_key = shared_number(minutes)
+        if days >= 0 and minutes >= 0 and date == date_text(days) and time == TIME_TEXTS[minutes]:
+            self.datetime_key = days * 1440 + minutes
+            self.raw_datetime = None
+        else:
+            self.datetime_key = datetime_key(date, time)
+            self.raw_datetime = (str(date), str(time))
+
+    def set_numbers(self, freq, tx, rx, pwr):
+        self.freq_key = parse_number(freq)
+        self.tx_key = shared_number(int(parse_number(tx)))
+        self.rx_key = shared_number(int(parse_number(rx)))
+        self.pwr_key = shared_number(parse_power(pwr))
+        texts = (str(freq), str(tx), str(rx), str(pwr))
+        if texts == (freq_text(self.freq_key), str(self.tx_key), str(self.rx_key), power_text(self.pwr_key)):
+            self.raw_numbers = None
+        else:
+            self.raw_numbers = tuple(map(sys.intern, texts))
+
+### Journal Updates, Applied as to the Entry Dict it was Made from
+    def update(self, fields):
+        for field, value in fields.items():
+            if field in LOG_FIELDS:
+                self.set_text(LOG_FIELDS.index(field) + 1, str(value))
+
+    def to_entry(self):
+        entry = {'uuid': self.uuid}
+        for col, field in enumerate(LOG_FIELDS, start=1):
+            entry[field] = self.text(col)
+        return entry
+
+### Column Text
+    @property
+    def date(self):
+        if self.raw_datetime is not None:
+            return self.raw_datetime[0]
+        return date_text(self.datetime_key // 1440)
+
+    @property
+    def time(self):
+        if self.raw_datetime is not None:
+            return self.raw_datetime[1]
+        return TIME_TEXTS[self.datetime_key % 1440]
+
+    @property
+    def freq(self):
+        if self.raw_numbers is not None:
+            return self.raw_numbers[0]
+        return freq_text(self.freq_key)
+
+    @property
+    def tx(self):
+        if self.raw_numbers is not None:
+            return self.raw_numbers[1]
+        return str(self.tx_key)
+
+    @property
+    def rx(self):
+        if self.raw_numbers is not None:
+            return self.raw_numbers[2]
+        return str(self.rx_key)
+
+    @property
+    def pwr(self):
+        if self.raw_numbers is not None:
+            return self.raw_numbers[3]
+        return power_text(self.pwr_key)
+
+    def text(self, col):
+        if col == 0:
+            return f"{self.line:04d}" if self.line else ""
+        if col == 11:
+            return self.uuid
+        return getattr(self, LOG_FIELDS[col - 1])
+
+    def set_text(self, col, text):
+        if col == 11:
+            self.uuid = text
+        elif col == 1:
+            self.set_datetime(self.date, text)
+        elif col == 2:
+            self.set_datetime(text, self.time)
+        elif col == 3:
+            self.call = text
+        elif col in (4, 5, 10):
+            setattr(self, LOG_FIELDS[col - 1], sys.intern(text))
+            self.band_key = BAND_ORDER.get(self.band, 0)
+        elif 6 <= col <= 9:
+            numbers = [self.freq, self.tx, self.rx, self.pwr]
+            numbers[col - 6] = text
+            self.set_numbers(*numbers)
+
+SORT_KEYS = ['line', 'time_key', 'datetime_key', 'call', 'mode', 'band_key', 'freq_key', 'tx_key', 'rx_key', 'pwr_key', 'qso', 'uuid']
+
+### Band for a Frequency in MHz, Mode as the Log Writes it
+BAND_EDGES = [
+    (1.8, 2.0, "160m"), (3.5, 4.0, "80m"), (5.06, 5.45, "60m"), (7.0, 7.3, "40m"),
+    (10.1, 10.15, "30m"), (14.0, 14.35, "20m"), (18.068, 18.168, "17m"),
+    (21.0, 21.45, "15m"), (24.89, 24.99, "12m"), (28.0, 29.7, "10m"),
+    (50.0, 54.0, "6m"), (144.0, 148.0, "2m"), (420.0, 450.0, "70cm"),
+]
+
+def band_for_freq(mhz):
+    for low, high, band in BAND_EDGES:
+        if low <= mhz <= high:
+            return band
+    return ""
+
+def log_mode(mode):
+    mode = mode.strip().upper()
+    return "FT-8" if mode == "FT8" else mode
+
+### Edit Mode Change Set
+# What changed since Edit was turned on, so Done only writes those QSOs.
+# updated maps uuid to {field: (original text, new text)}.
+class ChangeSet:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.inserted = {}
+        self.updated = {}
+        self.deleted = set()
+
+    def is_empty(self):
+        return not (self.inserted or self.updated or self.deleted)
+
+    def insert(self, record):
+        self.inserted[record.uuid] = record
+
+    def update(self, record, field, old, new):
+        if record.uuid in self.inserted:
+            return
+        fields = self.updated.setdefault(record.uuid, {})
+        if field in fields:
+            old = fields[field][0]
+        if old == new:
+            fields.pop(field, None)
+        else:
+            fields[field] = (old, new)
+        if not fields:
+            del self.updated[record.uuid]
+
+    def delete(self, record):
+        if self.inserted.pop(record.uuid, None) is None:
+            self.updated.pop(record.uuid, None)
+            self.deleted.add(record.uuid)
+
+    def is_changed(self, record, field):
+        return record.uuid in self.inserted or field in self.updated.get(record.uuid, ())
@@ -0,0 +1,426 @@
+# LHL core: search over the table text of log records, and field queries.
+import array
+import bisect
+import collections
+import datetime
+import math
+import re
+
+from .records import EPOCH_ORDINAL, parse_date_days, parse_time_minutes
+
+### Search Index
+# Every distinct cell text (lower case) points to the records showing it. A
+# trigram index over the distinct texts is built on the first search that
+# needs it, so a search only checks the texts that can contain the term
+# instead of every cell of every row.
+SEARCH_COLUMNS = range(1, 11)
+
+def search_values(record):
+    return tuple(record.text(col).lower() for col in SEARCH_COLUMNS)
+
+class SearchIndex:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.postings = {}
+        self.trigrams = None
+        self.record_values = {}
+        self.fields = {}
+
+    def rebuild(self, records):
+        self.clear()
+        for record in records:
+            self.add(record)
+
+    def add(self, record):
+        values = search_values(record)
+        postings = self.postings
+        for value in values:
+            records = postings.get(value)
+            if records is None:
+                records = postings[value] = set()
+                if self.trigrams is not None:
+                    self.add_trigrams(value)
+            records.add(record)
+        self.record_values[record] = values
+        for column, field in self.fields.items():
+            field.add(values[column - 1])
+
+    def remove(self, record):
+        values = self.record_values.pop(record, ())
+        if values:
+            for column, field in self.fields.items():
+                field.remove(values[column - 1])
+        for value in values:
+            records = self.postings.get(value)
+            if records is None:
+                continue
+            records.discard(record)
+            if not records:
+                del self.postings[value]
+                if self.trigrams is not None:
+                    self.remove_trigrams(value)
+
+    def update(self, record):
+        self.remove(record)
+        self.add(record)
+
+### Trigrams of the Distinct Texts
+    def add_trigrams(self, value):
+        for i in range(len(value) - 2):
+            self.trigrams.setdefault(value[i:i + 3], set()).add(value)
+
+    def remove_trigrams(self, value):
+        for i in range(len(value) - 2):
+            values = self.trigrams.get(value[i:i + 3])
+            if values is not None:
+                values.discard(value)
+                if not values:
+                    del self.trigrams[value[i:i + 3]]
+
+### Records with any Cell Containing the Term
+    def search(self, term):
+        term = term.lower()
+        if len(term) < 3:
+            candidates = self.postings.keys()
+        else:
+            if self.trigrams is None:
+                self.trigrams = {}
+                for value in self.postings:
+                    self.add_trigrams(value)
+            grams = sorted((self.trigrams.get(term[i:i + 3], ()) for i in range(len(term) - 2)), key=len)
+            candidates = set(grams[0]).intersection(*grams[1:]) if grams[0] else ()
+        matches = set()
+        for value in candidates:
+            if term in value:
+                matches.update(self.postings[value])
+        return matches
+
+### Records Matching a Query
+# Each condition is looked up on its own: the cell texts of its column
+# that it accepts, from the field index, and the records showing them.
+# The one with the fewest records is made into a set, and the other
+# conditions only keep those of it they match.
+    def query(self, query):
+        if not query.conditions:
+            return set(self.record_values)
+        plans = []
+        for condition in query.conditions:
+            postings = condition.postings(self)
+            size = len(self.record_values) if postings is None else sum(map(len, postings))
+            plans.append((size, condition, postings))
+        plans.sort(key=lambda plan: plan[0])
+        matches = plans[0][1].records(self)
+        for _, condition, _ in plans[1:]:
+            matches = condition.keep(self, matches)
+        return matches
+
+    # made on the first query on the column, then kept up to date
+    def field(self, column):
+        field = self.fields.get(column)
+        if field is None:
+            field = self.fields[column] = FieldIndex(FIELD_KEYS[column])
+            field.build(values[column - 1] for values in self.record_values.values())
+        return field
+
+### Field Index
+# The distinct cell texts of one column, in the order of their key, so a
+# range of keys or a prefix is found with bisect. counts says how many
+# records show each text, a text goes when the last of them does.
+class FieldIndex:
+    def __init__(self, key):
+        self.key = key
+        self.counts = collections.Counter()
+        self.keys = []
+        self.texts = []
+
+    def build(self, texts):
+        self.counts.update(texts)
+        pairs = sorted((key, text) for key, text in ((self.key(text), text) for text in self.counts)
+                       if key is not None)
+        self.keys = [key for key, _ in pairs]
+        self.texts = [text for _, text in pairs]
+
+    def add(self, text):
+        self.counts[text] += 1
+        if self.counts[text] == 1:
+            key = self.key(text)
+            if key is not None:
+                i = bisect.bisect_right(self.keys, key)
+                self.keys.insert(i, key)
+                self.texts.insert(i, text)
+
+    def remove(self, text):
+        self.counts[text] -= 1
+        if self.counts[text] <= 0:
+            del self.counts[text]
+            key = self.key(text)
+            if key is not None:
+                i = self.texts.index(text, bisect.bisect_left(self.keys, key))
+                del self.keys[i]
+                del self.texts[i]
+
+    def between(self, low, high, low_strict=False, high_strict=False):
+        start = 0 if low is None else (bisect.bisect_right if low_strict else bisect.bisect_left)(self.keys, low)
+        stop = len(self.keys) if high is None else (bisect.bisect_left if high_strict else bisect.bisect_right)(self.keys, high)
+        return self.texts[start:stop]
+
+    def starting_with(self, prefix):
+        start = bisect.bisect_left(self.keys, prefix)
+        stop = start
+        while stop < len(self.keys) and self.keys[stop].startswith(prefix):
+            stop += 1
+        return self.texts[start:stop]
+
+### Structured Queries
+# "call:k1* band:20m mode:cw date:2025-06-01..2025-06-30 pwr:>100 qso:sent"
+# A word starting with a field name and a colon is a condition on that
+# column, every other word has to be in some cell, and a QSO has to meet
+# all of them. Text without any field word is searched as a whole, as it
+# always was. call, mode, band and qso take a value or a pattern with *
+# and ?. date, time, freq, tx, rx and pwr take a value, >, >=, <, <= or
+# a range low..high, either end left open. A date can be a year or a
+# month, 2025-06 is all of June, a time can be an hour.
+#
+# A query is compiled once into conditions on the lower case cell texts
+# of search_values. Each condition remembers what it decided for a text,
+# texts repeat a lot in a log.
+class QueryError(ValueError):
+    pass
+
+# not NaN or infinite, the keys have to sort and match parse_number's
+def number_key(text):
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+def date_key(text):
+    days = parse_date_days(text)
+    return days if days >= 0 else None
+
+def time_key(text):
+    minutes = parse_time_minutes(text)
+    return minutes if minutes >= 0 else None
+
+# lowest and highest key a query value stands for
+def date_span(text):
+    try:
+        parts = [int(part) for part in text.split('-')]
+        if len(parts) == 1:
+            first, last = datetime.date(parts[0], 1, 1), datetime.date(parts[0], 12, 31)
+        elif len(parts) == 2:
+            first = datetime.date(parts[0], parts[1], 1)
+            last = (first + datetime.timedelta(days=31)).replace(day=1) - datetime.timedelta(days=1)
+        elif len(parts) == 3:
+            first = last = datetime.date(*parts)
+        else:
+            return None
+    except ValueError:
+        return None
+    return first.toordinal() - EPOCH_ORDINAL, last.toordinal() - EPOCH_ORDINAL
+
+def time_span(text):
+    if ':' in text:
+        minutes = time_key(text)
+        return None if minutes is None else (minutes, minutes)
+    try:
+        hour = int(text)
+    except ValueError:
+        return None
+    return (hour * 60, hour * 60 + 59) if 0 <= hour <= 23 else None
+
+def number_span(text):
+    number = number_key(text)
+    return None if number is None else (number, number)
+
+QUERY_FIELDS = {'time': 1, 'date': 2, 'call': 3, 'mode': 4, 'band': 5, 'freq': 6, 'tx': 7, 'rx': 8,
+                'pwr': 9, 'qso': 10}
+RANGE_FIELDS = {'time': time_span, 'date': date_span, 'freq': number_span, 'tx': number_span,
+                'rx': number_span, 'pwr': number_span}
+FIELD_KEYS = {1: time_key, 2: date_key, 3: str, 4: str, 5: str, 6: number_key, 7: number_key,
+              8: number_key, 9: number_key, 10: str}
+
+class Condition:
+    def __init__(self, column):
+        self.column = column
+        self.hits = {}
+
+    def hit(self, text):
+        hit = self.hits.get(text)
+        if hit is None:
+            hit = self.hits[text] = self.test(text)
+        return hit
+
+    def matches(self, values):
+        return self.hit(values[self.column - 1])
+
+    # the records showing each text accepted, from the field index
+    def postings(self, index):
+        postings = index.postings
+        return [postings[text] for text in self.texts(index.field(self.column)) if text in postings]
+
+    # a text shown by as many records as it has postings is only in this column
+    def records(self, index):
+        field = index.field(self.column)
+        column = self.column - 1
+        values = index.record_values
+        matches = set()
+        for text in self.texts(field):
+            records = index.postings.get(text, ())
+            if len(records) == field.counts[text]:
+                matches |= records
+            else:
+                matches.update(record for record in records if values[record][column] == text)
+        return matches
+
+    def keep(self, index, matches):
+        values = index.record_values
+        return {record for record in matches if self.matches(values[record])}
+
+    # positions of a mapped log, see snapshot.py, out of those given
+    def positions(self, log, positions):
+        texts = log.cell_texts(self.column, positions)
+        hit = self.hit
+        if positions is None:
+            return [position for position, text in enumerate(texts) if hit(text)]
+        return [position for position, text in zip(positions, texts) if hit(text)]
+
+class TextEquals(Condition):
+    def __init__(self, column, value):
+        super().__init__(column)
+        self.value = value
+
+    def test(self, text):
+        return text == self.value
+
+    def texts(self, field):
+        return [self.value] if self.value in field.counts else []
+
+# * is any run of characters, ? any one
+class TextPattern(Condition):
+    def __init__(self, column, pattern):
+        super().__init__(column)
+        self.prefix = re.split(r'[*?]', pattern, maxsplit=1)[0]
+        self.test = re.compile('.*'.join('.'.join(map(re.escape, part.split('?')))
+                                         for part in pattern.split('*')), re.DOTALL).fullmatch
+
+    def texts(self, field):
+        test = self.test
+        return [text for text in field.starting_with(self.prefix) if test(text)]
+
+class KeyRange(Condition):
+    def __init__(self, column, low, high, low_strict=False, high_strict=False):
+        super().__init__(column)
+        self.key = FIELD_KEYS[column]
+        self.low, self.high = low, high
+        self.low_strict, self.high_strict = low_strict, high_strict
+
+    def test(self, text):
+        key = self.key(text)
+        if key is None:
+            return False
+        if self.low is not None and (key < self.low or self.low_strict and key == self.low):
+            return False
+        return self.high is None or not (key > self.high or self.high_strict and key == self.high)
+
+    def texts(self, field):
+        return field.between(self.low, self.high, self.low_strict, self.high_strict)
+
+# a word with no field, in any cell
+class AnyCell:
+    def __init__(self, term):
+        self.term = term
+
+    def matches(self, values):
+        term = self.term
+        return any(term in value for value in values)
+
+    def postings(self, index):
+        return None
+
+    def records(self, index):
+        return index.search(self.term)
+
+    # the search index is quicker than every cell of the matches
+    def keep(self, index, matches):
+        return matches & index.search(self.term)
+
+    def positions(self, log, positions):
+        return log.search(self.term, positions)
+
+### Compiling a Query
+def range_condition(field, value):
+    span = RANGE_FIELDS[field]
+    column = QUERY_FIELDS[field]
+    for operator in ('>=', '<=', '>', '<', '='):
+        if value.startswith(operator):
+            bounds = span(value[len(operator):])
+            if bounds is None:
+                break
+            low, high = bounds
+            if operator == '>=':
+                return KeyRange(column, low, None)
+            if operator == '<=':
+                return KeyRange(column, None, high)
+            if operator == '>':
+                return KeyRange(column, high, None, low_strict=True)
+            if operator == '<':
+                return KeyRange(column, None, low, high_strict=True)
+            return KeyRange(column, low, high)
+    else:
+        if '..' in value:
+            first, last = value.split('..', 1)
+            low = span(first) if first else (None, None)
+            high = span(last) if last else (None, None)
+            if low is not None and high is not None and (first or last):
+                return KeyRange(column, low[0], high[1])
+        else:
+            bounds = span(value)
+            if bounds is not None:
+                return KeyRange(column, *bounds)
+    raise QueryError(f"'{value}' is not a {field} value or range")
+
+def field_condition(field, value):
+    if not value:
+        raise QueryError(f"{field}: needs a value")
+    if field in RANGE_FIELDS:
+        return range_condition(field, value)
+    if '*' in value or '?' in value:
+        return TextPattern(QUERY_FIELDS[field], value)
+    return TextEquals(QUERY_FIELDS[field], value)
+
+class Query:
+    def __init__(self, conditions):
+        self.conditions = conditions
+
+    def matches(self, values):
+        return all(condition.matches(values) for condition in self.conditions)
+
+### Positions of a Mapped Log Matching the Query
+# Every condition reads its column of the whole log, those on fields go
+# first as they are cheaper than a search of every cell.
+    def positions(self, log):
+        positions = None
+        for condition in sorted(self.conditions, key=lambda condition: isinstance(condition, AnyCell)):
+            positions = condition.positions(log, positions)
+        if positions is None:
+            return array.array('I', range(log.count))
+        return positions if isinstance(positions, array.array) else array.array('I', positions)
+
+# raises QueryError for a field word with a value it can't use
+def compile_query(text):
+    text = text.strip().lower()
+    conditions = []
+    terms = []
+    for word in text.split():
+        field, colon, value = word.partition(':')
+        if colon and field in QUERY_FIELDS:
+            conditions.append(field_condition(field, value))
+        else:
+            terms.append(word)
+    if not conditions:
+        return Query([AnyCell(text)] if text else [])
+    return Query(conditions + [AnyCell(term) for term in terms])
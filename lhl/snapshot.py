@@ -0,0 +1,408 @@
+# LHL core: a binary copy of a .json log's records for a fast reopen.
+#
+# <log>_snapshot.bin holds the LogRecords of the .json log as they were
+# last read: a header, one fixed-width row per QSO and a string table.
+# Reading it back is one bulk read, the rows are unpacked straight into
+# LogRecords without parsing the JSON or the values again. The header
+# carries the size, modification time and SHA-1 of the .json it was made
+# from, a snapshot that doesn't match the log any more is not used and is
+# written again from the .json. The .json stays the log, the snapshot can
+# be deleted at any time.
+#
+# MappedLog maps a snapshot into memory instead of reading it, for logs
+# too large to hold as records, see paging.py.
+import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from .records import TIME_TEXTS, LogRecord, date_text, freq_text, power_text, shared_number
+
+### File Layout
+# Header: magic, .json size, mtime_ns and SHA-1, mycall and grid string
+# ids, row count, string count and string table size. Rows follow, then
+# the offset of every string in the table and one past the last, then
+# the table, the strings in UTF-8 each ended by a NUL. A full read splits
+# the whole table at once, a mapped log finds one string by its offset.
+# Strings are stored once, a call worked a hundred times is one entry,
+# and read back as one shared string.
+#
+# Row: uuid, call, mode, band and QSO string ids, the raw date and time
+# string ids (NO_STRING when the date and time are in the usual form),
+# freq, tx, rx, power as float and as int with a flag saying which,
+# datetime_key, time_key and band_key, then the raw freq, tx, rx and
+# power string ids (NO_STRING when the numbers give them back).
+MAGIC = b'LHLSNAP3'
+HEADER = struct.Struct('<8sQq20sIIIII')
+ROW = struct.Struct('<7IdqqdqBqhB4I')
+OFFSETS = struct.Struct('<QQ')
+NO_STRING = 0xFFFFFFFF
+NO_STRING_NUMBERS = (NO_STRING,) * 4
+
+### Size, mtime and SHA-1 of a Log, from the Bytes Read
+def log_signature(raw, stat):
+    return len(raw), stat.st_mtime_ns, hashlib.sha1(raw).digest()
+
+def file_signature(filename):
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return stat.st_size, stat.st_mtime_ns, digest.digest()
+
+### Where Everything is, from the Header
+# None if the data is not a snapshot of the log with this signature.
+class Layout:
+    def __init__(self, header, size):
+        magic, self.size, self.mtime, self.digest, self.mycall, self.grid, self.count, self.string_count, \
+            table_size = header
+        self.rows_start = HEADER.size
+        self.offsets_start = self.rows_start + self.count * ROW.size
+        self.table_start = self.offsets_start + (self.string_count + 1) * 8
+        self.valid = magic == MAGIC and self.table_start + table_size == size
+
+    @classmethod
+    def read(cls, data, signature):
+        try:
+            layout = cls(HEADER.unpack_from(data), len(data))
+        except struct.error:
+            return None
+        if not layout.valid or signature != (layout.size, layout.mtime, layout.digest):
+            return None
+        return layout
+
+class LogSnapshot:
+    def __init__(self, filename):
+        self.filename = filename
+
+### Packing, Row by Row as the Loader Makes the Records
+    def writer(self):
+        return SnapshotWriter(self)
+
+    def write(self, signature, mycall, grid, records):
+        writer = self.writer()
+        writer.add(records)
+        return writer.save(signature, mycall, grid)
+
+    def remove(self):
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+### {"mycall", "grid", "log": [LogRecord...]}, or None if out of Date
+# signature is that of the .json as it is now, None to work it out.
+    def read(self, log_filename, signature=None):
+        contents = self.read_rows(log_filename, signature)
+        if contents is None:
+            return None
+        mycall, grid, rows, strings = contents
+        try:
+            return {"mycall": mycall, "grid": grid, "log": unpack_records(rows, strings)}
+        except (IndexError, struct.error):
+            return None
+
+### A Writer Holding the Snapshot's Rows, to Add More to
+# Returns (mycall, grid, writer), or None if out of date.
+    def appender(self, log_filename, signature):
+        contents = self.read_rows(log_filename, signature)
+        if contents is None:
+            return None
+        mycall, grid, rows, strings = contents
+        writer = self.writer()
+        writer.ids = {text: id for id, text in enumerate(strings)}
+        writer.chunks = [rows]
+        return mycall, grid, writer
+
+    def read_rows(self, log_filename, signature=None):
+        try:
+            if signature is None:
+                signature = self.current_signature(log_filename)
+            with open(self.filename, 'rb') as file:
+                raw = file.read()
+            layout = Layout.read(raw, signature)
+            if layout is None:
+                return None
+            strings = raw[layout.table_start:].decode('utf-8').split('\0')[:-1]
+            if len(strings) != layout.string_count:
+                return None
+            return (strings[layout.mycall], strings[layout.grid],
+                    memoryview(raw)[layout.rows_start:layout.offsets_start], strings)
+        except (OSError, ValueError, IndexError):
+            return None
+
+### Signature of the .json, None if the Snapshot can't Match it
+# A size or mtime that differs from the header rules the snapshot out
+# without reading the whole .json.
+    def current_signature(self, log_filename):
+        try:
+            with open(self.filename, 'rb') as file:
+                size, mtime = HEADER.unpack(file.read(HEADER.size))[1:3]
+            stat = os.stat(log_filename)
+        except (OSError, struct.error):
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+            return None
+        return file_signature(log_filename)
+
+def unpack_records(rows, strings):
+    records = []
+    new = LogRecord.__new__
+    intern = sys.intern
+    for (uuid, call, mode, band, qso, date, time, freq, tx, rx, pwr_float, pwr_int, is_float,
+         datetime_key, time_key, band_key, raw_freq, raw_tx, raw_rx, raw_pwr) in ROW.iter_unpack(rows):
+        record = new(LogRecord)
+        record.uuid = strings[uuid]
+        record.line = 0
+        record.has_note = False
+        record.call = strings[call]
+        record.mode = intern(strings[mode])
+        record.band = intern(strings[band])
+        record.qso = intern(strings[qso])
+        record.freq_key = freq
+        record.tx_key = shared_number(tx)
+        record.rx_key = shared_number(rx)
+        record.pwr_key = pwr_float if is_float else shared_number(pwr_int)
+        record.datetime_key = datetime_key
+        record.time_key = shared_number(time_key)
+        record.band_key = band_key
+        record.raw_datetime = None if date == NO_STRING else (strings[date], strings[time])
+        record.raw_numbers = None if raw_freq == NO_STRING else \
+            (strings[raw_freq], strings[raw_tx], strings[raw_rx], strings[raw_pwr])
+        records.append(record)
+    return records
+
+### Rows Packed as They Come, Written on save
+# Anything that doesn't fit a row, such as a report too large for 64
+# bits or a text with a NUL in it, leaves no snapshot and the .json is
+# read the next time. The file is a cache, so it is renamed into place
+# but not fsynced. The loader and the LogWriter can both be saving one,
+# each writes its own temporary file and the last rename wins. If that
+# is the older one its signature no longer matches the .json.
+class SnapshotWriter:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.ids = {}
+        self.chunks = []
+        self.failed = False
+
+    def string_id(self, text):
+        id = self.ids.get(text)
+        if id is None:
+            if type(text) is not str or '\0' in text:
+                raise ValueError("text can't go in the string table")
+            id = self.ids[text] = len(self.ids)
+        return id
+
+    # front=True for records that come before those added so far
+    def add(self, records, front=False):
+        if self.failed:
+            return
+        string_id = self.string_id
+        pack = ROW.pack
+        rows = bytearray()
+        try:
+            for record in records:
+                raw = record.raw_datetime
+                numbers = record.raw_numbers
+                pwr = record.pwr_key
+                is_float = type(pwr) is float
+                rows += pack(
+                    string_id(record.uuid), string_id(record.call), string_id(record.mode),
+                    string_id(record.band), string_id(record.qso),
+                    NO_STRING if raw is None else string_id(raw[0]), NO_STRING if raw is None else string_id(raw[1]),
+                    record.freq_key, record.tx_key, record.rx_key, pwr if is_float else 0.0,
+                    0 if is_float else pwr, is_float, record.datetime_key, record.time_key, record.band_key,
+                    *(NO_STRING_NUMBERS if numbers is None else map(string_id, numbers)))
+        except (struct.error, OverflowError, ValueError):
+            self.failed = True
+            self.chunks = []
+            return
+        self.chunks.insert(0 if front else len(self.chunks), rows)
+
+    def save(self, signature, mycall, grid):
+        try:
+            header_ids = self.string_id(str(mycall)), self.string_id(str(grid))
+        except ValueError:
+            self.failed = True
+        if self.failed:
+            self.snapshot.remove()
+            return False
+        table = [text.encode('utf-8') + b'\0' for text in self.ids]
+        offsets = array.array('Q', [0])
+        for text in table:
+            offsets.append(offsets[-1] + len(text))
+        table_size = offsets[-1]
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        count = sum(len(rows) for rows in self.chunks) // ROW.size
+        header = HEADER.pack(MAGIC, *signature, *header_ids, count, len(table), table_size)
+        directory, name = os.path.split(os.path.abspath(self.snapshot.filename))
+        try:
+            fd, temp_name = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=directory)
+        except OSError:
+            return False
+        try:
+            with open(fd, 'wb') as file:
+                file.writelines([header] + self.chunks + [offsets.tobytes()] + table)
+            os.replace(temp_name, self.snapshot.filename)
+        except OSError:
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+            return False
+        return True
+
+### Values Worked out Once per Key
+class Memo(dict):
+    def __init__(self, compute):
+        super().__init__()
+        self.compute = compute
+
+    def __missing__(self, key):
+        value = self[key] = self.compute(key)
+        return value
+
+### A Snapshot Mapped into Memory
+# Nothing is read up front: rows and strings are read from the mapping
+# when asked for, and the operating system pages the file in and out as
+# it needs. Positions are row numbers in log order, oldest first.
+#
+# Sort keys by table column, the row field of the keys held in the row
+# and the string id field of the text columns. Power is the remaining
+# column, a float or an int.
+ROW_KEYS = {1: 14, 2: 13, 5: 15, 6: 7, 7: 8, 8: 9}
+ROW_STRINGS = {3: 1, 4: 2, 10: 4, 11: 0}
+
+class MappedLog:
+    def __init__(self, file, data, layout):
+        self.file = file
+        self.data = data
+        self.count = layout.count
+        self.rows_start = layout.rows_start
+        self.offsets_start = layout.offsets_start
+        self.table_start = layout.table_start
+        self.mycall = self.string(layout.mycall)
+        self.grid = self.string(layout.grid)
+
+    # None if there is no snapshot matching the signature
+    @classmethod
+    def open(cls, filename, signature):
+        try:
+            file = open(filename, 'rb')
+        except OSError:
+            return None
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            file.close()
+            return None
+        layout = Layout.read(data, signature)
+        try:
+            if layout is not None:
+                return cls(file, data, layout)
+        except (struct.error, UnicodeDecodeError):
+            pass
+        data.close()
+        file.close()
+        return None
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def string(self, id):
+        start, end = OFFSETS.unpack_from(self.data, self.offsets_start + id * 8)
+        return self.data[self.table_start + start:self.table_start + end - 1].decode('utf-8')
+
+    def rows(self, start=0, stop=None):
+        stop = self.count if stop is None else stop
+        return memoryview(self.data)[self.rows_start + start * ROW.size:self.rows_start + stop * ROW.size]
+
+### LogRecords at Positions start to stop, Numbered like the Table
+    def records(self, start, stop):
+        with self.rows(start, stop) as rows:
+            records = unpack_records(rows, Memo(self.string))
+        for line, record in enumerate(records, start=start + 1):
+            record.line = line
+        return records
+
+### Sort Key of Every Position, for One Column
+    def sort_keys(self, column):
+        with self.rows() as rows:
+            if column in ROW_KEYS:
+                field = ROW_KEYS[column]
+                return [row[field] for row in ROW.iter_unpack(rows)]
+            if column in ROW_STRINGS:
+                field = ROW_STRINGS[column]
+                strings = Memo(self.string) if column != 11 else None
+                string = self.string if strings is None else strings.__getitem__
+                return [string(row[field]) for row in ROW.iter_unpack(rows)]
+            return [row[10] if row[12] else row[11] for row in ROW.iter_unpack(rows)]
+
+### Lower Case Cell Text of Every Position, for One Column
+# As search_values has it, for the field conditions of a query. Given
+# positions, only the rows at those are read, in the same order.
+    def cell_texts(self, column, positions=None):
+        strings = Memo(lambda id: self.string(id).lower())
+        with self.rows() as view:
+            if positions is None:
+                rows = ROW.iter_unpack(view)
+            else:
+                rows = (ROW.unpack_from(view, position * ROW.size) for position in positions)
+            if column == 1:
+                return [TIME_TEXTS[row[13] % 1440] if row[5] == NO_STRING else strings[row[6]] for row in rows]
+            if column == 2:
+                return [date_text(row[13] // 1440) if row[5] == NO_STRING else strings[row[5]] for row in rows]
+            if column == 5:
+                return [strings[row[3]] for row in rows]
+            if column in ROW_STRINGS:
+                field = ROW_STRINGS[column]
+                return [strings[row[field]] for row in rows]
+            raw = column + 10
+            if column == 6:
+                texts = Memo(freq_text)
+                return [texts[row[7]] if row[16] == NO_STRING else strings[row[raw]] for row in rows]
+            if column == 9:
+                texts = Memo(power_text)
+                return [texts[row[10] if row[12] else row[11]] if row[16] == NO_STRING else strings[row[raw]]
+                        for row in rows]
+            field = ROW_KEYS[column]
+            texts = Memo(str)
+            return [texts[row[field]] if row[16] == NO_STRING else strings[row[raw]] for row in rows]
+
+### Positions of the QSOs with any Cell Containing the Term
+# The cells of search_values, worked out from the row. Strings, days,
+# times and numbers repeat, so each is checked once and remembered.
+# Given positions, only the rows at those are checked.
+    def search(self, term, positions=None):
+        term = term.lower()
+        strings = Memo(self.string)
+        string_hit = Memo(lambda id: term in strings[id].lower())
+        day_hit = Memo(lambda days: term in date_text(days))
+        time_hit = [term in text for text in TIME_TEXTS]
+        number_hit = Memo(lambda number: term in str(number))
+        power_hit = Memo(lambda power: term in power_text(power))
+        found = array.array('I')
+        with self.rows() as view:
+            if positions is None:
+                rows = enumerate(ROW.iter_unpack(view))
+            else:
+                rows = ((position, ROW.unpack_from(view, position * ROW.size)) for position in positions)
+            for position, (uuid, call, mode, band, qso, date, time, freq, tx, rx, pwr_float, pwr_int, is_float,
+                           datetime_key, time_key, band_key, raw_freq, raw_tx, raw_rx, raw_pwr) in rows:
+                if date == NO_STRING:
+                    hit = day_hit[datetime_key // 1440] or time_hit[datetime_key % 1440]
+                else:
+                    hit = string_hit[date] or string_hit[time]
+                if raw_freq == NO_STRING:
+                    hit = (hit or number_hit[tx] or number_hit[rx]
+                           or (power_hit[pwr_float] if is_float else number_hit[pwr_int])
+                           or term in freq_text(freq))
+                else:
+                    hit = (hit or string_hit[raw_freq] or string_hit[raw_tx] or string_hit[raw_rx]
+                           or string_hit[raw_pwr])
+                if hit or string_hit[call] or string_hit[mode] or string_hit[band] or string_hit[qso]:
+                    found.append(position)
+        return found
@@ -0,0 +1,747 @@
+# LHL core: reading and writing .json and SQLite logs and their notes.
+import json
+import os
+import shutil
+import threading
+import uuid
+
+from .records import LOG_FIELDS, LogRecord, datetime_key
+
+# sqlite3 and snapshot.py, with hashlib and mmap, are imported where a log
+# first needs them, so LHL.py starts without them.
+
+### Crash-safe File Writes
+# The new contents go to <file>.tmp and are fsynced before the rename over
+# the old file, so a crash or power cut leaves either the old or the new
+# file, never half of one. backup_filename is pointed at the old file
+# first, as a hard link where the file system allows it.
+def write_file_atomic(filename, chunks, backup_filename=None):
+    temp_name = filename + ".tmp"
+    try:
+        with open(temp_name, 'w', encoding='utf-8', buffering=1 << 16) as file:
+            file.writelines(chunks)
+            file.flush()
+            os.fsync(file.fileno())
+        if backup_filename is not None and os.path.exists(filename):
+            if os.path.exists(backup_filename):
+                os.remove(backup_filename)
+            try:
+                os.link(filename, backup_filename)
+            except OSError:
+                shutil.copyfile(filename, backup_filename)
+        os.replace(temp_name, filename)
+        fsync_directory(filename)
+    finally:
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+
+def fsync_directory(filename):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY)
+    except OSError:
+        return  # Windows can't open a directory, renames there need no fsync
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+### Notes Cache
+# The <log>_notes.json file is read once per log and kept in memory. It is only
+# read again if its modification time changes, e.g. edited outside of LHL.
+class NotesCache:
+    def __init__(self, filename):
+        self.filename = filename
+        self.notes = {}
+        self.mtime = None
+        self.lock = threading.RLock()
+        self.reload_if_changed()
+
+    def file_mtime(self):
+        try:
+            return os.stat(self.filename).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload_if_changed(self):
+        with self.lock:
+            mtime = self.file_mtime()
+            if mtime != self.mtime:
+                self.notes = {}
+                if mtime is not None:
+                    with open(self.filename, "r") as file:
+                        self.notes = json.load(file)
+                self.mtime = mtime
+            return self.notes
+
+    def all(self):
+        with self.lock:
+            return dict(self.reload_if_changed())
+
+    def get(self, uuid):
+        return self.reload_if_changed().get(uuid, "")
+
+    def has_note(self, uuid):
+        return bool(self.get(uuid).strip())
+
+    def set(self, uuid, text):
+        with self.lock:
+            self.reload_if_changed()[uuid] = text
+            self.save()
+
+    def update(self, notes, deleted=()):
+        with self.lock:
+            current = self.reload_if_changed()
+            deleted = [entry_uuid for entry_uuid in deleted if entry_uuid in current]
+            if notes or deleted:
+                current.update(notes)
+                for entry_uuid in deleted:
+                    del current[entry_uuid]
+                self.save()
+
+    def delete(self, uuid):
+        with self.lock:
+            if uuid in self.reload_if_changed():
+                del self.notes[uuid]
+                self.save()
+
+    def save(self):
+        with self.lock:
+            write_file_atomic(self.filename, [json.dumps(self.notes, indent=4)])
+            self.mtime = self.file_mtime()
+
+
+### Files Kept Beside a .json Log
+# <log>_journal.jsonl, <log>_notes.json and <log>_snapshot.bin, <log>
+# being the log's path without its .json in whatever case it has. A log
+# not named .json keeps its whole name, so no file beside it is the log.
+def sidecar_filename(log_filename, suffix):
+    base, ext = os.path.splitext(log_filename)
+    return (base if ext.lower() == '.json' else log_filename) + suffix
+
+def same_file_name(a, b):
+    return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+### Append-only Journal
+# New contacts are appended to <log>_journal.jsonl one record per line instead of
+# rewriting the whole log. The journal is folded back into the .json log
+# (compaction) every COMPACT_EVERY records, on load, on save and on exit.
+# Records are {"op": "add", "entry"}, and for saved edits {"op": "update",
+# "uuid", "fields"}, {"op": "delete", "uuid"}, {"op": "header", "mycall",
+# "grid"} and {"op": "order", "start", "uuids"}, which puts the entries
+# from position start on into the given order.
+#
+# Compaction writes the log atomically and keeps the previous one as
+# <log>.bak. A crash can leave a torn last journal line, which is cut off
+# on open, or a journal that was already folded in, whose adds are then
+# skipped by uuid.
+#
+# Compaction also keeps <log>_snapshot.bin, see snapshot.py, up to date
+# if it matched the log before.
+class LogJournal:
+    COMPACT_EVERY = 500
+
+    def __init__(self, log_filename):
+        self.log_filename = log_filename
+        self.backup_filename = log_filename + ".bak"
+        self.filename = sidecar_filename(log_filename, "_journal.jsonl")
+        from .snapshot import LogSnapshot
+        self.snapshot = LogSnapshot(sidecar_filename(log_filename, "_snapshot.bin"))
+        self.recovered = False
+        self.pending = len(self.repair())
+
+    def append(self, entry):
+        self.extend([entry])
+
+    def extend(self, entries):
+        self.write([{"op": "add", "entry": entry} for entry in entries])
+
+### Several Records with a Single fsync
+    def write(self, records):
+        with open(self.filename, 'a') as file:
+            file.write("".join(json.dumps(record) + "\n" for record in records))
+            file.flush()
+            os.fsync(file.fileno())
+        self.pending += len(records)
+
+### Cuts a Torn Last Line off so New Records don't Follow it
+    def repair(self):
+        if same_file_name(self.filename, self.log_filename):
+            raise ValueError(f"The journal of {self.log_filename} would be the log itself")
+        records = []
+        if not os.path.exists(self.filename):
+            return records
+        good = 0
+        complete = True
+        with open(self.filename, 'rb') as file:
+            for line in file:
+                try:
+                    record = json.loads(line) if line.strip() else None
+                except ValueError:
+                    break
+                if record is not None:
+                    records.append(record)
+                good += len(line)
+                complete = line.endswith(b'\n')
+            size = file.seek(0, os.SEEK_END)
+        if good < size or not complete:
+            with open(self.filename, 'r+b') as file:
+                file.truncate(good)
+                if not complete:
+                    file.seek(good)
+                    file.write(b'\n')
+                file.flush()
+                os.fsync(file.fileno())
+        return records
+
+    def read_records(self):
+        records = []
+        if os.path.exists(self.filename):
+            with open(self.filename, 'r') as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        break  # torn last line from a crash, ignore the rest
+        return records
+
+### Journal Records over the Log Entries, or over LogRecords
+# With make=LogRecord the log holds LogRecords, added entries are made
+# into LogRecords and updates go through LogRecord.update.
+    def replay(self, data, records=None, make=None):
+        log_entries = data.setdefault('log', [])
+        records = self.read_records() if records is None else records
+        if not records:
+            return data
+        if make is None:
+            by_uuid = {entry.get("uuid"): entry for entry in log_entries}
+        else:
+            by_uuid = {record.uuid: record for record in log_entries}
+        for record in records:
+            op = record.get("op")
+            if op == "add":
+                entry = record["entry"]
+                if entry.get("uuid") is None or entry["uuid"] not in by_uuid:
+                    item = entry if make is None else make(entry)
+                    log_entries.append(item)
+                    by_uuid[entry.get("uuid")] = item
+            elif op == "update":
+                if record["uuid"] in by_uuid:
+                    by_uuid[record["uuid"]].update(record["fields"])
+            elif op == "delete":
+                entry = by_uuid.pop(record["uuid"], None)
+                if entry is not None:
+                    log_entries[:] = [other for other in log_entries if other is not entry]
+            elif op == "header":
+                data['mycall'] = record["mycall"]
+                data['grid'] = record["grid"]
+            elif op == "order":
+                start = record["start"]
+                log_entries[start:] = [by_uuid[uuid] for uuid in record["uuids"] if uuid in by_uuid]
+        return data
+
+### Log file plus any journaled entries
+    def load(self):
+        return self.replay(self.read_log()[0])
+
+### A Damaged Log is Moved to <log>.broken and the .bak Put Back
+# Returns the parsed log and the signature of the bytes it came from.
+    def read_log(self, parse=json.loads):
+        try:
+            return self.parse_log_file(parse)
+        except (ValueError, IndexError):
+            if not os.path.exists(self.backup_filename):
+                raise
+        os.replace(self.log_filename, self.log_filename + ".broken")
+        shutil.copyfile(self.backup_filename, self.log_filename)
+        self.recovered = True
+        return self.parse_log_file(parse)
+
+    def parse_log_file(self, parse):
+        from .snapshot import log_signature
+        with open(self.log_filename, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            raw = file.read()
+        return parse(raw.decode('utf-8')), log_signature(raw, stat)
+
+    def needs_compaction(self):
+        return self.pending >= self.COMPACT_EVERY
+
+    def compact(self, data=None):
+        signature = None
+        if data is None:
+            records = self.read_records()
+            data, signature = self.read_log()
+            data = self.replay(data, records)
+        write_file_atomic(self.log_filename, log_text_chunks(data), self.backup_filename)
+        self.clear()
+        if signature is not None:
+            self.update_snapshot(signature, records)
+        return data
+
+### Snapshot of the Compacted Log from the One Before
+# signature is that of the log before compaction. When the journal only
+# added new QSOs their rows are put after the old ones, otherwise the
+# records are replayed over the old snapshot's LogRecords.
+    def update_snapshot(self, signature, records):
+        from .snapshot import file_signature
+        new_signature = file_signature(self.log_filename)
+        if all(record.get("op") == "add" for record in records):
+            appender = self.snapshot.appender(self.log_filename, signature)
+            if appender is None:
+                return
+            mycall, grid, writer = appender
+            for record in records:
+                entry = record["entry"]
+                if entry.get("uuid") is not None and entry["uuid"] in writer.ids:
+                    break  # maybe in the log already, the replay below skips it if so
+                writer.add([LogRecord(entry)])
+            else:
+                writer.save(new_signature, mycall, grid)
+                return
+        cached = self.snapshot.read(self.log_filename, signature)
+        if cached is not None:
+            cached = self.replay(cached, records, LogRecord)
+            self.snapshot.write(new_signature, cached['mycall'], cached['grid'], cached['log'])
+
+    def clear(self):
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+        self.pending = 0
+
+### .json Log Text, One Entry per Line
+# json.dump with indent goes through the pure Python encoder, which makes
+# compacting a large log slow. Entries on their own lines keep the file
+# readable and each one is encoded by the C encoder.
+def log_text_chunks(data):
+    yield "{\n"
+    for key, value in data.items():
+        if key != 'log':
+            yield f"    {json.dumps(key)}: {json.dumps(value)},\n"
+    yield '    "log": ['
+    separator = "\n        "
+    for entry in data.get('log', []):
+        yield separator + json.dumps(entry)
+        separator = ",\n        "
+    yield "\n    ]\n}\n"
+
+### Log Storage
+# MainWindow reads and writes the open log through a storage object.
+# JsonLogStorage is the .json log with its journal and notes file.
+# SqliteLogStorage keeps the QSOs and notes in an indexed SQLite database,
+# which suits very large logs. Both load and save the same
+# {"mycall", "grid", "log": [...]} data, so logs convert either way.
+SQLITE_SUFFIXES = ('.sqlite', '.db')
+LOG_SUFFIXES = ('.json',) + SQLITE_SUFFIXES
+
+def open_log_storage(filename):
+    if filename.lower().endswith(SQLITE_SUFFIXES):
+        return SqliteLogStorage(filename)
+    return JsonLogStorage(filename)
+
+# entries, oldest first, are written with the new log rather than added
+# after it, which for a .json would rewrite it and leave a .bak.
+def create_log_storage(filename, mycall, grid, entries=()):
+    if filename.lower().endswith(SQLITE_SUFFIXES):
+        return SqliteLogStorage.create(filename, mycall, grid, entries)
+    return JsonLogStorage.create(filename, mycall, grid, entries)
+
+### Parses a .json Log One Entry at a Time
+# json.loads holds the GIL for the whole document, which freezes the
+# window while a large log loads on the loader thread.
+def parse_log_text(text):
+    decoder = json.JSONDecoder()
+    whitespace = ' \t\n\r'
+
+    def skip(pos, expected=None):
+        while pos < len(text) and text[pos] in whitespace:
+            pos += 1
+        if expected is not None:
+            if text[pos:pos + 1] != expected:
+                raise ValueError(f"Expected '{expected}' at position {pos}")
+            pos += 1
+        return pos
+
+    data = {}
+    pos = skip(0, '{')
+    if text[skip(pos)] == '}':
+        return data
+    while True:
+        key, pos = decoder.raw_decode(text, skip(pos))
+        pos = skip(pos, ':')
+        if key == 'log' and text[skip(pos)] == '[':
+            log_entries = []
+            pos = skip(skip(pos, '['))
+            while text[pos] != ']':
+                entry, pos = decoder.raw_decode(text, pos)
+                log_entries.append(entry)
+                pos = skip(pos)
+                if text[pos] == ',':
+                    pos = skip(pos + 1)
+            data[key] = log_entries
+            pos += 1
+        else:
+            data[key], pos = decoder.raw_decode(text, skip(pos))
+        pos = skip(pos)
+        if text[pos:pos + 1] == ',':
+            pos += 1
+        else:
+            skip(pos, '}')
+            return data
+
+class JsonLogStorage:
+    def __init__(self, filename):
+        self.filename = filename
+        self.journal = LogJournal(filename)
+        self.notes = NotesCache(sidecar_filename(filename, "_notes.json"))
+        self.reading = False
+        self.mapped = None
+        self.leftover = self.journal.pending > 0
+
+    @property
+    def recovered(self):
+        return self.journal.recovered
+
+    @classmethod
+    def create(cls, filename, mycall, grid, entries=()):
+        write_file_atomic(filename, log_text_chunks({"mycall": mycall, "grid": grid, "log": entries}))
+        storage = cls(filename)
+        storage.journal.clear()
+        return storage
+
+### Whole Log, any Leftover Journal is Folded in First
+    def load(self):
+        return self.journal.compact() if self.journal.pending and self.can_compact() else self.journal.load()
+
+# Not while the loader reads the files, nor while the snapshot is mapped,
+# compaction would write a new one over it.
+    def can_compact(self):
+        return not self.reading and self.mapped is None
+
+### Newest First Batches of LogRecords for LogLoader
+# begin_read runs on the window's thread and notes how many journal
+# records there are. stream runs on the loader thread and reads the .json
+# plus those records, entries appended meanwhile are already in the
+# table. Compaction waits until both files have been read.
+#
+# The LogRecords come from the snapshot when it matches the .json.
+# Otherwise the .json is parsed and, if there was nothing to replay, the
+# records are packed into a new snapshot batch by batch, which is written
+# once the last batch has been handed over.
+    def begin_read(self):
+        self.reading = True
+        return self.journal.pending
+
+    def stream(self, batch_size, snapshot=None):
+        try:
+            records = self.journal.read_records()[:snapshot]
+            data = self.journal.snapshot.read(self.filename)
+            cached = data is not None
+            if not cached:
+                data, signature = self.journal.read_log(parse_log_text)
+        finally:
+            self.reading = False
+        writer = None
+        if cached:
+            data = self.journal.replay(data, records, LogRecord)
+        else:
+            if not records:
+                writer = self.journal.snapshot.writer()
+            data = self.journal.replay(data, records)
+        log_entries = data.get('log', [])
+        mycall, grid = data.get('mycall', ''), data.get('grid', '')
+
+        def batches():
+            for end in range(len(log_entries), 0, -batch_size):
+                batch = log_entries[max(end - batch_size, 0):end]
+                if not cached:
+                    batch = [LogRecord(entry) for entry in batch]
+                    if writer is not None:
+                        writer.add(batch, front=True)
+                yield batch[::-1]
+            if writer is not None:
+                writer.save(signature, mycall, grid)
+        return mycall, grid, len(log_entries), batches()
+
+### The Log Mapped from its Snapshot, for Paging
+# Instead of stream, for a log too large to hold in memory. Only a log
+# with no journal records to replay is mapped, the snapshot rows are the
+# log as it is on disk. A missing or stale snapshot is written from the
+# .json first. Returns the MappedLog, or None with reading left on for
+# stream to follow.
+    def map_log(self, snapshot=None):
+        if self.journal.read_records()[:snapshot]:
+            return None
+        from .snapshot import MappedLog
+        signature = self.journal.snapshot.current_signature(self.filename)
+        mapped = MappedLog.open(self.journal.snapshot.filename, signature) if signature else None
+        if mapped is None:
+            try:
+                data, signature = self.journal.read_log(parse_log_text)
+            except Exception:
+                self.reading = False
+                raise
+            writer = self.journal.snapshot.writer()
+            writer.add(LogRecord(entry) for entry in data.get('log', []))
+            if not writer.save(signature, data.get('mycall', ''), data.get('grid', '')):
+                return None
+            mapped = MappedLog.open(self.journal.snapshot.filename, signature)
+            if mapped is None:
+                return None
+        self.mapped = mapped
+        self.reading = False
+        return mapped
+
+    def unmap_log(self):
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+
+### A Journal Left by a Session that Ended Early
+# Opening the log only notes it, stream replays it like any other
+# records. Once the log has loaded the window queues compact_leftover on
+# its LogWriter, so the .json is rewritten off the window's thread.
+    def compact_leftover(self):
+        if self.leftover and self.journal.pending and self.can_compact():
+            self.journal.compact()
+        self.leftover = False
+
+    def append(self, entry):
+        self.extend([entry])
+
+### Large Batches (ADIF Import) go Straight into One Compaction
+    def extend(self, entries):
+        if not entries:
+            return
+        if len(entries) >= LogJournal.COMPACT_EVERY and self.can_compact():
+            data = self.journal.load()
+            data['log'].extend(entries)
+            self.journal.compact(data)
+            return
+        self.journal.extend(entries)
+        if self.journal.needs_compaction() and self.can_compact():
+            self.journal.compact()
+
+    def replace_all(self, mycall, grid, entries):
+        data = self.journal.load()
+        data['log'] = entries
+        data['mycall'] = mycall
+        data['grid'] = grid
+        self.journal.compact(data)
+
+### Saved Edits as Journal Records
+# header is (mycall, grid) or None, updated maps uuid to the changed
+# fields, order is (start, uuids) or None, see LogJournal.
+    def apply_changes(self, header, deleted, updated, inserted, order):
+        records = []
+        if header is not None:
+            records.append({"op": "header", "mycall": header[0], "grid": header[1]})
+        records += [{"op": "delete", "uuid": uuid} for uuid in deleted]
+        records += [{"op": "update", "uuid": uuid, "fields": fields} for uuid, fields in updated.items()]
+        records += [{"op": "add", "entry": entry} for entry in inserted]
+        if order is not None:
+            records.append({"op": "order", "start": order[0], "uuids": order[1]})
+        if not records:
+            return
+        if len(records) >= LogJournal.COMPACT_EVERY and self.can_compact():
+            self.journal.compact(self.journal.replay(self.journal.load(), records))
+            return
+        self.journal.write(records)
+        if self.journal.needs_compaction() and self.can_compact():
+            self.journal.compact()
+
+    def close(self):
+        self.unmap_log()
+        if self.journal.pending:
+            self.journal.compact()
+
+class SqliteLogStorage:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS qso (
+            seq INTEGER PRIMARY KEY,
+            uuid TEXT NOT NULL UNIQUE,
+            time, date, call, mode, band, freq, tx, rx, pwr, qso,
+            datetime INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS qso_call ON qso (call);
+        CREATE INDEX IF NOT EXISTS qso_band_mode ON qso (band, mode);
+        CREATE INDEX IF NOT EXISTS qso_datetime ON qso (datetime);
+        CREATE TABLE IF NOT EXISTS notes (uuid TEXT PRIMARY KEY, text TEXT NOT NULL);
+    """
+
+    def __init__(self, filename):
+        import sqlite3
+        self.filename = filename
+        self.db = sqlite3.connect(filename, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=FULL")
+        self.db.executescript(self.SCHEMA)
+        self.lock = threading.RLock()
+        self.notes = SqliteNotes(self.db, self.lock)
+        self.recovered = False
+        self.leftover = False
+
+    @classmethod
+    def create(cls, filename, mycall, grid, entries=()):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(filename + suffix):
+                os.remove(filename + suffix)
+        storage = cls(filename)
+        with storage.db:
+            storage.set_header(mycall, grid)
+            storage.db.executemany(cls.INSERT, (storage.row_for(entry) for entry in entries))
+        return storage
+
+    def set_header(self, mycall, grid):
+        self.db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                            [("mycall", mycall), ("grid", grid)])
+
+    def row_for(self, entry):
+        if not entry.get('uuid'):
+            entry['uuid'] = str(uuid.uuid4())
+        return [entry['uuid']] + [entry.get(field, '') for field in LOG_FIELDS] + \
+               [datetime_key(entry.get('date', ''), entry.get('time', ''))]
+
+    def load(self):
+        columns = ", ".join(['uuid'] + LOG_FIELDS)
+        with self.lock:
+            meta = dict(self.db.execute("SELECT key, value FROM meta"))
+            log_entries = [dict(zip(['uuid'] + LOG_FIELDS, row))
+                           for row in self.db.execute(f"SELECT {columns} FROM qso ORDER BY seq")]
+        return {"mycall": meta.get("mycall", ""), "grid": meta.get("grid", ""), "log": log_entries}
+
+### Newest First Batches of LogRecords for LogLoader
+# begin_read notes the last seq on the window's thread, stream reads up to
+# it on the loader thread through a second connection, so QSOs logged
+# meanwhile are not delivered twice.
+    def begin_read(self):
+        with self.lock:
+            return self.db.execute("SELECT coalesce(max(seq), 0) FROM qso").fetchone()[0]
+
+    def stream(self, batch_size, snapshot=None):
+        import sqlite3
+        db = sqlite3.connect(self.filename)
+        last_seq = snapshot if snapshot is not None else (1 << 62)
+        try:
+            db.execute("BEGIN")
+            meta = dict(db.execute("SELECT key, value FROM meta"))
+            total = db.execute("SELECT count(*) FROM qso WHERE seq <= ?", (last_seq,)).fetchone()[0]
+        except Exception:
+            db.close()
+            raise
+        columns = ", ".join(['uuid'] + LOG_FIELDS)
+
+        def batches():
+            try:
+                cursor = db.execute(f"SELECT {columns} FROM qso WHERE seq <= ? ORDER BY seq DESC", (last_seq,))
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [LogRecord(dict(zip(['uuid'] + LOG_FIELDS, row))) for row in rows]
+            finally:
+                db.close()
+        return meta.get("mycall", ""), meta.get("grid", ""), total, batches()
+
+### Single Row Changes
+    INSERT = "INSERT INTO qso (uuid, time, date, call, mode, band, freq, tx, rx, pwr, qso, datetime) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+    def append(self, entry):
+        self.extend([entry])
+
+    def extend(self, entries):
+        with self.lock, self.db:
+            self.db.executemany(self.INSERT, [self.row_for(entry) for entry in entries])
+
+    def update(self, entry):
+        row = self.row_for(entry)
+        with self.lock, self.db:
+            self.db.execute("UPDATE qso SET time=?, date=?, call=?, mode=?, band=?, freq=?, tx=?, rx=?, pwr=?, qso=?, datetime=? WHERE uuid=?",
+                            row[1:] + row[:1])
+
+    def delete(self, entry_uuid):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM qso WHERE uuid=?", (entry_uuid,))
+            self.db.execute("DELETE FROM notes WHERE uuid=?", (entry_uuid,))
+
+    def replace_all(self, mycall, grid, entries):
+        with self.lock, self.db:
+            self.set_header(mycall, grid)
+            self.db.execute("DELETE FROM qso")
+            self.db.executemany(self.INSERT, (self.row_for(entry) for entry in entries))
+
+### Saved Edits in One Transaction, Same Arguments as JsonLogStorage
+# Reordered rows swap seq values among themselves, through negative
+# values so the primary key never clashes.
+    def apply_changes(self, header, deleted, updated, inserted, order):
+        with self.lock, self.db:
+            if header is not None:
+                self.set_header(*header)
+            for entry_uuid in deleted:
+                self.db.execute("DELETE FROM qso WHERE uuid=?", (entry_uuid,))
+                self.db.execute("DELETE FROM notes WHERE uuid=?", (entry_uuid,))
+            for entry_uuid, fields in updated.items():
+                columns = [field for field in LOG_FIELDS if field in fields]
+                if columns:
+                    self.db.execute(f"UPDATE qso SET {', '.join(f'{column}=?' for column in columns)} WHERE uuid=?",
+                                    [fields[column] for column in columns] + [entry_uuid])
+                if 'date' in fields or 'time' in fields:
+                    row = self.db.execute("SELECT date, time FROM qso WHERE uuid=?", (entry_uuid,)).fetchone()
+                    if row is not None:
+                        self.db.execute("UPDATE qso SET datetime=? WHERE uuid=?", (datetime_key(*row), entry_uuid))
+            self.db.executemany(self.INSERT, [self.row_for(entry) for entry in inserted])
+            if order is not None:
+                start, uuids = order
+                seqs = [row[0] for row in self.db.execute("SELECT seq FROM qso ORDER BY seq LIMIT -1 OFFSET ?", (start,))]
+                if seqs:
+                    self.db.execute("UPDATE qso SET seq = -seq WHERE seq >= ?", (seqs[0],))
+                    self.db.executemany("UPDATE qso SET seq=? WHERE uuid=?", zip(seqs, uuids))
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+### Notes Table with the Same Calls as NotesCache
+class SqliteNotes:
+    def __init__(self, db, lock):
+        self.db = db
+        self.lock = lock
+
+    def all(self):
+        with self.lock:
+            return dict(self.db.execute("SELECT uuid, text FROM notes"))
+
+    def get(self, uuid):
+        with self.lock:
+            row = self.db.execute("SELECT text FROM notes WHERE uuid=?", (uuid,)).fetchone()
+        return row[0] if row else ""
+
+    def has_note(self, uuid):
+        return bool(self.get(uuid).strip())
+
+    def set(self, uuid, text):
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO notes (uuid, text) VALUES (?, ?)", (uuid, text))
+
+    def update(self, notes, deleted=()):
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO notes (uuid, text) VALUES (?, ?)", notes.items())
+            self.db.executemany("DELETE FROM notes WHERE uuid=?", [(uuid,) for uuid in deleted])
+
+    def delete(self, uuid):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM notes WHERE uuid=?", (uuid,))
+
+### Copy a Log into a New .json or SQLite Log
+def copy_log(source, target_filename):
+    data = source.load()
+    target = create_log_storage(target_filename, data.get('mycall', ''), data.get('grid', ''), data.get('log', []))
+    try:
+        target.notes.update(source.notes.all())
+    finally:
+        target.close()
@@ -0,0 +1,103 @@
+# LHL core: decoding WSJT-X / JTDX UDP datagrams into log entries.
+import datetime
+import io
+import struct
+from datetime import timezone
+
+from .adif import adif_entry, iter_adif_records
+from .records import band_for_freq, log_mode
+
+### WSJT-X / JTDX UDP Messages
+# WSJT-X and JTDX send a datagram to 127.0.0.1:2237 for every logged QSO,
+# as a QSO Logged message (type 5) followed by a Logged ADIF message
+# (type 12). Numbers are big endian QDataStream values, strings are a
+# quint32 byte count followed by UTF-8 (0xffffffff for a null string).
+WSJTX_MAGIC = 0xadbccbda
+WSJTX_QSO_LOGGED = 5
+WSJTX_LOGGED_ADIF = 12
+WSJTX_HOST = '127.0.0.1'
+WSJTX_PORT = 2237
+
+class WsjtxReader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def unpack(self, fmt):
+        values = struct.unpack_from('>' + fmt, self.data, self.pos)
+        self.pos += struct.calcsize('>' + fmt)
+        return values if len(values) > 1 else values[0]
+
+    def utf8(self):
+        length = self.unpack('I')
+        if length == 0xffffffff:
+            return ""
+        if self.pos + length > len(self.data):
+            raise ValueError("String runs past the end of the datagram")
+        text = self.data[self.pos:self.pos + length].decode('utf-8', 'replace')
+        self.pos += length
+        return text
+
+### QDateTime, Julian Day + msecs Since Midnight + Time Spec
+    def datetime(self):
+        julian_day, msecs, spec = self.unpack('qIB')
+        offset = self.unpack('i') if spec == 2 else 0
+        if spec == 3:
+            self.utf8()  # time zone id, WSJT-X always sends UTC
+        if msecs == 0xffffffff:
+            msecs = 0
+        value = datetime.datetime.fromordinal(julian_day - 1721425) + datetime.timedelta(milliseconds=msecs)
+        if spec == 0:
+            return value.astimezone(timezone.utc)
+        return (value - datetime.timedelta(seconds=offset)).replace(tzinfo=timezone.utc)
+
+    def at_end(self):
+        return self.pos >= len(self.data)
+
+### Decoded QSO as a Log Entry, None for Other Messages
+# The extra 'comment' key holds the WSJT-X comment for the notes file.
+def read_wsjtx_qso(data):
+    try:
+        reader = WsjtxReader(data)
+        magic, schema, message_type = reader.unpack('III')
+        if magic != WSJTX_MAGIC:
+            return None
+        reader.utf8()  # client id, e.g. "WSJT-X"
+
+        if message_type == WSJTX_QSO_LOGGED:
+            reader.datetime()  # time off
+            call = reader.utf8()
+            reader.utf8()  # dx grid
+            freq = reader.unpack('Q') / 1e6
+            mode = reader.utf8()
+            tx = reader.utf8()
+            rx = reader.utf8()
+            pwr = reader.utf8()
+            comment = reader.utf8()
+            reader.utf8()  # name
+            time_on = reader.datetime()
+            date_text = time_on.strftime("%Y-%m-%d")
+            time_text = time_on.strftime("%H:%M")
+
+        elif message_type == WSJTX_LOGGED_ADIF:
+            records = list(iter_adif_records(io.BytesIO(reader.utf8().encode('utf-8'))))
+            return adif_entry(records[0]) if records else None
+        else:
+            return None
+    except (struct.error, ValueError, OverflowError):
+        return None
+
+    if not call:
+        return None
+    return {
+        'time': time_text,
+        'date': date_text,
+        'call': call.upper(),
+        'mode': log_mode(mode),
+        'band': band_for_freq(freq),
+        'freq': f"{freq:.6f}".rstrip('0').rstrip('.'),
+        'tx': tx.strip() or 0,
+        'rx': rx.strip() or 0,
+        'pwr': pwr.strip() or 0,
+        'comment': comment.strip()
+    }
@@ -0,0 +1,40 @@
+import io
+import unittest
+
+from lhl.adif import adif_entry, iter_adif_records
+
+ADI = ("Some header text <ADIF_VER:5>3.1.4 <EOH>\n"
+       "<CALL:5>DL1AB <QSO_DATE:8>20240102 <TIME_ON:4>1234 <FREQ:6>14.074 <MODE:3>FT8 "
+       "<RST_SENT:3>-05 <COMMENT:6>Grüß <EOR>\n"
+       "<call:4>K1XY <mode:4>MFSK <submode:3>FT4 <freq:5>7.047 <eor>\n"
+       "<QSO_DATE:8>20240103 <EOR>\n")
+
+class TokenizerTest(unittest.TestCase):
+    def records(self, chunk_size):
+        return list(iter_adif_records(io.BytesIO(ADI.encode('utf-8')), chunk_size))
+
+    def test_fields_after_the_header(self):
+        records = self.records(1 << 16)
+        self.assertEqual(len(records), 3)
+        self.assertNotIn('adif_ver', records[0])
+        self.assertEqual(records[0]['call'], "DL1AB")
+        self.assertEqual(records[1]['submode'], "FT4")
+
+    def test_lengths_count_bytes(self):
+        self.assertEqual(self.records(1 << 16)[0]['comment'], "Grüß")
+
+    def test_tags_across_chunks(self):
+        expected = self.records(1 << 16)
+        for chunk_size in (1, 2, 3, 7, 16):
+            self.assertEqual(self.records(chunk_size), expected, chunk_size)
+
+class EntryTest(unittest.TestCase):
+    def test_entry(self):
+        fields = list(iter_adif_records(io.BytesIO(ADI.encode('utf-8'))))
+        entry = adif_entry(fields[0])
+        self.assertEqual((entry['call'], entry['date'], entry['time'], entry['band'], entry['tx']),
+                         ("DL1AB", "2024-01-02", "12:34", "20m", "-05"))
+        self.assertEqual(adif_entry(fields[1])['mode'], "FT4")
+
+    def test_no_call(self):
+        self.assertIsNone(adif_entry({'qso_date': "20240103"}))
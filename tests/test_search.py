@@ -0,0 +1,49 @@
+import unittest
+
+from lhl.records import LogRecord, parse_number
+from lhl.search import QueryError, compile_query, search_values
+
+def values(**fields):
+    entry = {'time': "12:34", 'date': "2024-01-02", 'call': "DL1AB", 'mode': "FT8", 'band': "20m",
+             'freq': "14.074", 'tx': "-05", 'rx': "-10", 'pwr': "100", 'qso': "Sent"}
+    entry.update(fields)
+    return search_values(LogRecord(entry))
+
+class QueryTest(unittest.TestCase):
+    def matches(self, text, **fields):
+        return compile_query(text).matches(values(**fields))
+
+    def test_words(self):
+        self.assertTrue(self.matches("dl1"))
+        self.assertTrue(self.matches(""))
+        self.assertFalse(self.matches("k1xy"))
+
+    def test_fields(self):
+        self.assertTrue(self.matches("call:dl1ab mode:ft8"))
+        self.assertFalse(self.matches("call:dl1"))
+        self.assertTrue(self.matches("call:dl1*"))
+        self.assertTrue(self.matches("band:20m sent"))
+        self.assertFalse(self.matches("band:40m"))
+
+    def test_ranges(self):
+        self.assertTrue(self.matches("date:2024-01"))
+        self.assertTrue(self.matches("date:2023-12-31..2024-01-02"))
+        self.assertFalse(self.matches("date:>2024-01-02"))
+        self.assertTrue(self.matches("freq:>=14 freq:<15"))
+        self.assertTrue(self.matches("tx:<0"))
+        self.assertFalse(self.matches("time:<12:00"))
+
+    def test_bad_values(self):
+        for text in ("date:yesterday", "freq:>abc", "call:"):
+            with self.assertRaises(QueryError, msg=text):
+                compile_query(text)
+
+class NumberTest(unittest.TestCase):
+    def test_not_finite_is_zero(self):
+        for text in ("inf", "-inf", "nan", "1e999"):
+            self.assertEqual(parse_number(text), 0, text)
+
+    def test_record_keeps_the_text(self):
+        record = LogRecord({'freq': "inf", 'tx': "nan", 'rx': "1e999", 'pwr': "5"})
+        self.assertEqual((record.freq, record.tx, record.rx, record.pwr), ("inf", "nan", "1e999", "5"))
+        self.assertEqual(record.tx_key, 0)
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from lhl.records import LogRecord
+from lhl.snapshot import LogSnapshot, MappedLog, file_signature
+
+ENTRIES = [
+    {'uuid': "a", 'time': "12:34", 'date': "2024-01-02", 'call': "DL1AB", 'mode': "FT8", 'band': "20m",
+     'freq': "14.074", 'tx': "-05", 'rx': "-10", 'pwr': "100", 'qso': "Sent"},
+    {'uuid': "b", 'time': "1234", 'date': "02.01.2024", 'call': "K1XY", 'mode': "CW", 'band': "40m",
+     'freq': "7.03", 'tx': "599", 'rx': "579", 'pwr': "5.5", 'qso': "Rcvd"},
+]
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.log = os.path.join(self.dir, "log.json")
+        with open(self.log, 'w') as file:
+            file.write("{}")
+        self.snapshot = LogSnapshot(os.path.join(self.dir, "log_snapshot.bin"))
+        self.assertTrue(self.snapshot.write(file_signature(self.log), "DL0XX", "JO62",
+                                            [LogRecord(entry) for entry in ENTRIES]))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_round_trip(self):
+        data = self.snapshot.read(self.log)
+        self.assertEqual((data['mycall'], data['grid']), ("DL0XX", "JO62"))
+        for record, entry in zip(data['log'], ENTRIES):
+            self.assertEqual(record.to_entry(), entry)
+        self.assertIsNotNone(data['log'][1].raw_datetime)
+        self.assertIsNotNone(data['log'][0].raw_numbers)
+
+    def test_mapped(self):
+        mapped = MappedLog.open(self.snapshot.filename, file_signature(self.log))
+        try:
+            self.assertEqual(mapped.count, 2)
+            self.assertEqual(mapped.cell_texts(3), ["dl1ab", "k1xy"])
+            self.assertEqual(mapped.cell_texts(2), ["2024-01-02", "02.01.2024"])
+            self.assertEqual(mapped.cell_texts(7), ["-05", "599"])
+            self.assertEqual(list(mapped.search("k1x")), [1])
+            self.assertEqual(list(mapped.search("2024")), [0, 1])
+            self.assertEqual(mapped.records(1, 2)[0].call, "K1XY")
+        finally:
+            mapped.close()
+
+    def test_stale(self):
+        with open(self.log, 'w') as file:
+            file.write("{ }")
+        self.assertIsNone(self.snapshot.read(self.log))
+        self.assertIsNone(MappedLog.open(self.snapshot.filename, file_signature(self.log)))
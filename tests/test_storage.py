@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from lhl.storage import JsonLogStorage, LogJournal, sidecar_filename
+
+def entry(n):
+    return {'uuid': f"u{n}", 'time': "12:00", 'date': "2024-01-02", 'call': f"DL{n}AB", 'mode': "CW",
+            'band': "20m", 'freq': "14.030", 'tx': "599", 'rx': "599", 'pwr': "100", 'qso': "Sent"}
+
+class StorageTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def test_sidecar_filename(self):
+        self.assertEqual(sidecar_filename("log.json", "_journal.jsonl"), "log_journal.jsonl")
+        self.assertEqual(sidecar_filename("LOG.JSON", "_journal.jsonl"), "LOG_journal.jsonl")
+        self.assertEqual(sidecar_filename("log.txt", "_journal.jsonl"), "log.txt_journal.jsonl")
+        self.assertEqual(sidecar_filename("my.json.d/log", ".bin"), "my.json.d/log.bin")
+
+    def test_round_trip(self):
+        for name in ("log.json", "Log.JSON", "log.txt", "log"):
+            filename = self.path(name)
+            storage = JsonLogStorage.create(filename, "DL0XX", "JO62", [entry(1)])
+            storage.append(entry(2))
+            self.assertNotEqual(storage.journal.filename, filename)
+            self.assertTrue(os.path.exists(storage.journal.filename))
+            storage.close()
+            data = JsonLogStorage(filename).load()
+            self.assertEqual([e['call'] for e in data['log']], ["DL1AB", "DL2AB"], name)
+            self.assertEqual(data['mycall'], "DL0XX")
+
+    def test_empty_extend(self):
+        storage = JsonLogStorage.create(self.path("log.json"), "DL0XX", "JO62")
+        storage.extend([])
+        self.assertFalse(os.path.exists(storage.journal.filename))
+
+    def test_journal_that_is_the_log(self):
+        filename = self.path("log_journal.jsonl")
+        journal = LogJournal.__new__(LogJournal)
+        journal.log_filename = filename
+        journal.filename = filename
+        with self.assertRaises(ValueError):
+            journal.repair()
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.log = os.path.join(self.dir, "log.json")
+        JsonLogStorage.create(self.log, "DL0XX", "JO62", [entry(1)]).close()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_torn_line_is_cut(self):
+        journal_filename = sidecar_filename(self.log, "_journal.jsonl")
+        with open(journal_filename, 'w') as file:
+            file.write(json.dumps({"op": "add", "entry": entry(2)}) + "\n" + '{"op": "add", "ent')
+        journal = LogJournal(self.log)
+        self.assertEqual(journal.pending, 1)
+        journal.append(entry(3))
+        with open(journal_filename) as file:
+            self.assertEqual([json.loads(line)['entry']['uuid'] for line in file], ["u2", "u3"])
+        self.assertEqual([e['uuid'] for e in journal.load()['log']], ["u1", "u2", "u3"])
+
+    def test_damaged_log_from_backup(self):
+        storage = JsonLogStorage(self.log)
+        storage.journal.extend([entry(2)])
+        storage.journal.compact()
+        storage.close()
+        with open(self.log, 'w') as file:
+            file.write('{"mycall": "DL0XX", "log": [')
+        storage = JsonLogStorage(self.log)
+        data = storage.load()
+        self.assertTrue(storage.recovered)
+        self.assertEqual([e['uuid'] for e in data['log']], ["u1"])
+        with open(self.log + ".broken") as file:
+            self.assertTrue(file.read().endswith("["))
@@ -0,0 +1,272 @@
+### LHL Benchmarks
+# Times the main window's own code paths on synthetic logs, without a
+# display, and writes the results as JSON so runs can be compared.
+#
+#   python tools/bench.py                                  1k, 10k and 100k QSOs
+#   python tools/bench.py --sizes 1000,1000000 --format sqlite
+#   python tools/bench.py --output before.json
+#   python tools/bench.py --output after.json --compare before.json
+#   python tools/bench.py --sizes 1000000 --ops records     memory per QSO
+#   python tools/bench.py --sizes 1000000 --paged           .json paged from disk
+#
+# Each operation is run --repeat times for the wall time (the median is
+# reported), then once more under tracemalloc for the peak memory it
+# allocated. Logs come from generate_log.py with the same seed every
+# time, so runs on different versions see the same data.
+#
+#   records     read the log into LogRecords, also reports the bytes
+#               per QSO the records hold on to
+#   load        open the log and wait until every row is in the table
+#   append      log APPENDS QSOs through the Update button, until on disk
+#   search      search for a call, a prefix and a missing term, then clear
+#   sort_<col>  sort the table by each column
+#   save_edits  Edit, change EDITS cells, Done, until on disk
+#   export_adi  write every QSO to an .adi file
+#
+# --ops picks operations, sort stands for all sort_<col>. The table
+# operations always load the log first. --paged loads .json logs of any
+# size with File > Page Large Logs from Disk, save_edits is skipped as
+# a paged log can't be edited.
+#
+# --compare prints the change against an earlier --output file and exits
+# with 1 if any operation got slower by more than --threshold percent.
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TOOLS)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, TOOLS)
+
+from PyQt5.QtCore import QSettings, Qt
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+import LHL
+from generate_log import write_log
+from lhl.adif import ADIF_PROGRAM_VERSION, write_adif
+from lhl.records import LOG_FIELDS
+from lhl.storage import open_log_storage
+
+APPENDS = 100
+EDITS = 10
+SORT_COLUMNS = ['line'] + LOG_FIELDS + ['uuid']
+OPS = ['records', 'load', 'append', 'search', 'sort', 'save_edits', 'export_adi']
+
+### Message Boxes would Wait for a Click
+def silence_dialogs():
+    for name in ('information', 'warning', 'critical', 'question'):
+        setattr(QMessageBox, name, staticmethod(lambda *args, **kwargs: QMessageBox.Ok))
+
+def wait_for_load(app, window):
+    while window.loader is not None:
+        app.processEvents()
+        time.sleep(0.001)
+
+### Wall Times and Peak Memory of One Operation
+# setup runs before every run and is not timed.
+def measure(name, size, repeat, run, setup=None, memory=True):
+    seconds = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+    result = {"op": name, "size": size, "seconds": statistics.median(seconds), "runs": seconds}
+    if memory:
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        try:
+            run()
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    print(f"{size:>9} {name:<14} {result['seconds'] * 1000:10.1f} ms"
+          + (f" {result['peak_bytes'] / 1e6:9.1f} MB" if memory else ""), file=sys.stderr)
+    return result
+
+### Bytes per QSO Held by the Records of a Loaded Log
+def read_records(file_name):
+    storage = open_log_storage(file_name)
+    try:
+        _, _, _, batches = storage.stream(LHL.LogLoader.BATCH_SIZE, storage.begin_read())
+        return [record for records in batches for record in records]
+    finally:
+        storage.close()
+
+def measure_records(size, repeat, file_name):
+    result = measure("records", size, repeat, lambda: read_records(file_name), memory=False)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        records = read_records(file_name)
+        gc.collect()
+        result["bytes_per_qso"] = round(tracemalloc.get_traced_memory()[0] / max(len(records), 1))
+    finally:
+        tracemalloc.stop()
+    print(f"{size:>9} {'':<14} {result['bytes_per_qso']:10} bytes per QSO", file=sys.stderr)
+    return result
+
+def bench_size(app, size, log_format, repeat, memory, work_dir, ops, paged=False):
+    file_name = os.path.join(work_dir, f"bench_{size}.{log_format}")
+    write_log(file_name, size)
+    results = []
+    if 'records' in ops:
+        results.append(measure_records(size, repeat, file_name))
+    if not set(ops) - {'records'}:
+        return results
+
+    window = LHL.MainWindow()
+    window.settings = QSettings(os.path.join(work_dir, "bench.ini"), QSettings.IniFormat)  # keep the user's last log
+    window.paged_action.setChecked(paged)
+    window.show()
+
+    def load():
+        window.open_log_file(file_name)
+        wait_for_load(app, window)
+    results.append(measure("load", size, repeat, load, memory=memory))
+
+    def append():
+        for i in range(APPENDS):
+            window.call.setText(f"B{i % 10}ENCH")
+            window.freq.setText("14.074")
+            window.update_data()
+        window.writer.flush()
+    if 'append' in ops:
+        results.append(measure("append", size, repeat, append, memory=memory))
+
+    records = window.log_model.records
+    terms = [records[len(records) // 2].call, records[0].call[:2], "zz9zzz"]
+
+    def search():
+        for term in terms:
+            window.search.setText(term)
+            window.search_log()
+            window.clear_search()
+    if 'search' in ops:
+        results.append(measure("search", size, repeat, search, memory=memory))
+
+    for col, column in enumerate(SORT_COLUMNS if 'sort' in ops else []):
+        def unsort():
+            window.log.sortByColumn(0 if col else 1, Qt.DescendingOrder)
+
+        def sort():
+            window.log.sortByColumn(col, Qt.AscendingOrder)
+        results.append(measure(f"sort_{column}", size, repeat, sort, unsort, memory))
+    window.log.sortByColumn(0, Qt.DescendingOrder)
+
+    def edit():
+        window.toggle_edit_mode()
+        model = window.log_model
+        step = max(model.rowCount() // EDITS, 1)
+        for i in range(EDITS):
+            model.setData(model.index(i * step, 3), f"E{i}DIT")
+
+    def save_edits():
+        window.save_edits()
+        window.writer.flush()
+    if 'save_edits' in ops and not paged:
+        results.append(measure("save_edits", size, repeat, save_edits, edit, memory))
+
+    exports = iter(range(repeat + 1))
+
+    def export_adi():
+        records = window.log_model.records
+        write_adif(os.path.join(work_dir, f"bench_{size}_{next(exports)}.adi"),
+                   records.all_records() if paged else list(records), "bench", datetime.datetime.now(datetime.timezone.utc))
+    if 'export_adi' in ops:
+        results.append(measure("export_adi", size, repeat, export_adi, memory=memory))
+
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+### Change Against an Earlier Run, Returns True if Anything got Slower
+def compare(results, old_file, threshold):
+    with open(old_file, 'r') as file:
+        old = {(result["size"], result["op"]): result for result in json.load(file)["results"]}
+    slower = False
+    print(f"{'size':>9} {'op':<14} {'before':>10} {'after':>10} {'change':>8}", file=sys.stderr)
+    for result in results:
+        before = old.get((result["size"], result["op"]))
+        if before is None or not before["seconds"]:
+            continue
+        change = (result["seconds"] / before["seconds"] - 1) * 100
+        flag = " slower" if change > threshold else ""
+        slower = slower or bool(flag)
+        print(f"{result['size']:>9} {result['op']:<14} {before['seconds'] * 1000:8.1f}ms "
+              f"{result['seconds'] * 1000:8.1f}ms {change:+7.1f}%{flag}", file=sys.stderr)
+        if before.get("bytes_per_qso") and result.get("bytes_per_qso"):
+            change = (result["bytes_per_qso"] / before["bytes_per_qso"] - 1) * 100
+            print(f"{'':>9} {'bytes per QSO':<14} {before['bytes_per_qso']:10} {result['bytes_per_qso']:10} {change:+7.1f}%",
+                  file=sys.stderr)
+    return slower
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LHL on synthetic logs.")
+    parser.add_argument('--sizes', default="1000,10000,100000", help="comma separated QSO counts")
+    parser.add_argument('--format', choices=['json', 'sqlite'], default='json', help="log file format")
+    parser.add_argument('--ops', default=",".join(OPS), help="comma separated operations: " + ", ".join(OPS))
+    parser.add_argument('--paged', action='store_true', help="page .json logs from disk")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per operation")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc run")
+    parser.add_argument('--output', help="write the results to this .json file instead of stdout")
+    parser.add_argument('--compare', help="results .json of an earlier run")
+    parser.add_argument('--threshold', type=float, default=20.0, help="percent slower that counts as a regression")
+    args = parser.parse_args()
+    ops = args.ops.split(',')
+    unknown = set(ops) - set(OPS)
+    if unknown:
+        parser.error(f"unknown operations: {', '.join(sorted(unknown))}")
+    if args.paged:
+        LHL.PAGED_LOG_BYTES = 0
+
+    app = QApplication(sys.argv[:1])
+    silence_dialogs()
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in [int(size) for size in args.sizes.split(',')]:
+            results += bench_size(app, size, args.format, args.repeat, not args.no_memory, work_dir, ops, args.paged)
+
+    report = {
+        "lhl_version": ADIF_PROGRAM_VERSION,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "format": args.format,
+        "paged": args.paged,
+        "repeat": args.repeat,
+        "date": datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
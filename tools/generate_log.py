@@ -0,0 +1,106 @@
+### Synthetic Log Generator
+# Writes a made up log of any size, in the same format LHL writes, for
+# benchmarks and for trying LHL on a big log.
+#
+#   python tools/generate_log.py big.json --count 100000
+#   python tools/generate_log.py big.sqlite --count 1000000 --notes 0.1
+#
+# QSOs are in time order over several years, calls are drawn from a
+# pool so stations are worked again on other bands, and frequencies and
+# reports match the band and mode. --notes is the fraction of QSOs that
+# get a note in <log>_notes.json (or the notes table). The same --seed
+# always gives the same log.
+import argparse
+import datetime
+import os
+import random
+import sys
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lhl.records import BAND_EDGES
+from lhl.storage import create_log_storage
+
+PREFIXES = ["K", "W", "N", "AA", "AB", "KA", "KB", "KC", "KD", "WA", "WB", "VE", "VA", "G", "M",
+            "DL", "DK", "F", "I", "EA", "JA", "JH", "VK", "ZL", "PY", "LU", "SP", "OK", "ON", "PA"]
+BANDS = ["160m", "80m", "40m", "30m", "20m", "17m", "15m", "12m", "10m", "6m", "2m", "70cm"]
+BAND_WEIGHTS = [2, 6, 14, 4, 22, 6, 12, 3, 9, 5, 4, 1]
+MODES = ["SSB", "CW", "FT-8", "FM", "AM", "WSPR"]
+MODE_WEIGHTS = [35, 20, 35, 6, 2, 2]
+POWERS = ["5", "10", "50", "100", "100", "100", "500", "1500"]
+NOTES = ["Name {name}, QTH {qth}", "QSL via bureau", "POTA {park}", "Worked with {rig}",
+         "{name} in {qth}, very strong signal", "Contest QSO, serial {serial}", "LoTW confirmed"]
+NAMES = ["Bob", "Ann", "Jim", "Sue", "Ken", "Liz", "Tom", "Eva", "Raj", "Ola", "Ike", "Mia"]
+QTHS = ["Ohio", "Texas", "Maine", "Ontario", "Bavaria", "Kyoto", "Bristol", "Madrid", "Perth"]
+RIGS = ["IC-7300", "FT-991A", "K3", "TS-590", "FT-818", "a wire dipole"]
+START = datetime.datetime(2015, 1, 1)
+
+def random_call(rng):
+    return rng.choice(PREFIXES) + str(rng.randint(0, 9)) + \
+        "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rng.randint(1, 3)))
+
+def report(rng, mode):
+    if mode in ("FT-8", "WSPR"):
+        return f"{rng.randint(-24, 10):+03d}"
+    if mode == "CW":
+        return rng.choice(["599", "599", "579", "559", "449"])
+    return rng.choice(["59", "59", "57", "55", "44"])
+
+def random_note(rng):
+    return rng.choice(NOTES).format(name=rng.choice(NAMES), qth=rng.choice(QTHS), rig=rng.choice(RIGS),
+                                    park=f"K-{rng.randint(1, 9999):04d}", serial=rng.randint(1, 2000))
+
+### Entries Oldest First, Notes Go into the notes Dict by uuid
+def qso_entries(count, seed=1, notes_fraction=0.05, notes=None):
+    rng = random.Random(seed)
+    band_edges = {band: (low, high) for low, high, band in BAND_EDGES}
+    pool = [random_call(rng) for _ in range(max(count // 3, 1))]
+    when = START
+    for _ in range(count):
+        when += datetime.timedelta(minutes=int(rng.expovariate(1 / 40)) + 1)
+        band = rng.choices(BANDS, BAND_WEIGHTS)[0]
+        mode = rng.choices(MODES, MODE_WEIGHTS)[0]
+        low, high = band_edges[band]
+        entry = {
+            "uuid": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "time": when.strftime("%H:%M"),
+            "date": when.strftime("%Y-%m-%d"),
+            "call": rng.choice(pool) if rng.random() < 0.7 else random_call(rng),
+            "mode": mode,
+            "band": band,
+            "freq": f"{rng.uniform(low, high):.3f}",
+            "tx": report(rng, mode),
+            "rx": report(rng, mode),
+            "pwr": rng.choice(POWERS),
+            "qso": "Rcvd" if rng.random() < 0.3 else "Sent"
+        }
+        if notes is not None and rng.random() < notes_fraction:
+            notes[entry["uuid"]] = random_note(rng)
+        yield entry
+
+### Streams the Entries Straight into a New .json or SQLite Log
+def write_log(file_name, count, seed=1, notes_fraction=0.05, mycall="AC1NE", grid="FN42"):
+    notes = {}
+    storage = create_log_storage(file_name, mycall, grid, qso_entries(count, seed, notes_fraction, notes))
+    try:
+        storage.notes.update(notes)
+    finally:
+        storage.close()
+    return notes
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic LHL log (.json or .sqlite).")
+    parser.add_argument('file')
+    parser.add_argument('--count', type=int, default=10000, help="number of QSOs")
+    parser.add_argument('--notes', type=float, default=0.05, help="fraction of QSOs with a note")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--mycall', default='AC1NE')
+    parser.add_argument('--grid', default='FN42')
+    args = parser.parse_args()
+    notes = write_log(args.file, args.count, args.seed, args.notes, args.mycall, args.grid)
+    print(f"{args.count} QSOs, {len(notes)} notes written to {args.file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+### WSJT-X UDP Replay Tool
+# Sends WSJT-X datagrams to LHL so the WSJT-X Listener can be tried
+# without a radio.
+#
+#   python tools/wsjtx_replay.py record qsos.txt      save datagrams sent to port 2237
+#   python tools/wsjtx_replay.py replay qsos.txt      send recorded datagrams again
+#   python tools/wsjtx_replay.py demo --count 20      send made up FT8 QSOs
+#
+# Recordings have one datagram per line as hex. record needs port 2237
+# free, so run it with LHL's listener off (or pick another --port).
+import argparse
+import datetime
+import random
+import socket
+import string
+import struct
+import time
+
+MAGIC = 0xadbccbda
+SCHEMA = 3
+QSO_LOGGED = 5
+LOGGED_ADIF = 12
+
+
+def utf8(text):
+    data = text.encode('utf-8')
+    return struct.pack('>I', len(data)) + data
+
+
+def qdatetime(value):
+    julian_day = value.date().toordinal() + 1721425
+    msecs = ((value.hour * 60 + value.minute) * 60 + value.second) * 1000
+    return struct.pack('>qIB', julian_day, msecs, 1)
+
+
+def header(message_type, client_id):
+    return struct.pack('>III', MAGIC, SCHEMA, message_type) + utf8(client_id)
+
+
+def qso_logged(client_id, time_on, call, grid, freq_hz, mode, sent, rcvd, pwr, comment, mycall, mygrid):
+    return (header(QSO_LOGGED, client_id) + qdatetime(time_on + datetime.timedelta(seconds=15)) +
+            utf8(call) + utf8(grid) + struct.pack('>Q', freq_hz) + utf8(mode) +
+            utf8(sent) + utf8(rcvd) + utf8(pwr) + utf8(comment) + utf8("") +
+            qdatetime(time_on) + utf8("") + utf8(mycall) + utf8(mygrid) +
+            utf8("") + utf8("") + utf8(""))
+
+
+def logged_adif(client_id, time_on, call, grid, freq_hz, mode, sent, rcvd, pwr, comment, mycall, mygrid):
+    fields = [("call", call), ("gridsquare", grid), ("mode", mode),
+              ("rst_sent", sent), ("rst_rcvd", rcvd),
+              ("qso_date", time_on.strftime("%Y%m%d")), ("time_on", time_on.strftime("%H%M%S")),
+              ("freq", f"{freq_hz / 1e6:.6f}"), ("tx_pwr", pwr), ("comment", comment),
+              ("station_callsign", mycall), ("my_gridsquare", mygrid)]
+    adif = "<adif_ver:5>3.1.0\n<programid:6>WSJT-X\n<EOH>\n"
+    adif += "".join(f"<{name}:{len(value)}>{value} " for name, value in fields if value) + "<EOR>"
+    return header(LOGGED_ADIF, client_id) + utf8(adif)
+
+
+def random_call():
+    prefix = random.choice(["K", "W", "N", "AA", "VE", "G", "DL", "JA", "EA"])
+    return prefix + str(random.randint(0, 9)) + "".join(random.choice(string.ascii_uppercase) for _ in range(random.randint(2, 3)))
+
+
+def record(args):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((args.host, args.port))
+    print(f"Recording datagrams on {args.host}:{args.port}, Ctrl+C to stop")
+    count = 0
+    with open(args.file, 'a') as file:
+        try:
+            while True:
+                data = sock.recv(65536)
+                file.write(data.hex() + "\n")
+                file.flush()
+                count += 1
+        except KeyboardInterrupt:
+            pass
+    print(f"{count} datagrams written to {args.file}")
+
+
+def replay(args):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    count = 0
+    with open(args.file, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            sock.sendto(bytes.fromhex(line), (args.host, args.port))
+            count += 1
+            time.sleep(args.interval)
+    print(f"{count} datagrams sent to {args.host}:{args.port}")
+
+
+def demo(args):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for i in range(args.count):
+        time_on = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, microsecond=0)
+        qso = ("WSJT-X", time_on, random_call(), "FN42", 14074000 + random.randint(200, 2800), "FT8",
+               f"{random.randint(-24, 10):+03d}", f"{random.randint(-24, 10):+03d}", "50",
+               "demo QSO" if i % 5 == 0 else "", args.mycall, "FN42")
+        sock.sendto(qso_logged(*qso), (args.host, args.port))
+        sock.sendto(logged_adif(*qso), (args.host, args.port))
+        print(f"Sent {qso[2]}")
+        time.sleep(args.interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record, replay or fake WSJT-X UDP datagrams.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2237)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help="save datagrams sent to the port")
+    record_parser.add_argument('file')
+    record_parser.set_defaults(run=record)
+
+    replay_parser = commands.add_parser('replay', help="send recorded datagrams")
+    replay_parser.add_argument('file')
+    replay_parser.add_argument('--interval', type=float, default=0.05, help="seconds between datagrams")
+    replay_parser.set_defaults(run=replay)
+
+    demo_parser = commands.add_parser('demo', help="send made up FT8 QSOs")
+    demo_parser.add_argument('--count', type=int, default=10)
+    demo_parser.add_argument('--interval', type=float, default=1.0, help="seconds between QSOs")
+    demo_parser.add_argument('--mycall', default='AC1NE')
+    demo_parser.set_defaults(run=demo)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()